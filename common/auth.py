@@ -2,19 +2,40 @@
 通用 JWT 认证模块
 提供可复用的 JWT 验证和认证依赖，供各个服务使用
 """
-from typing import Optional, Dict, Any, List
+import hashlib
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from common.config import BaseServiceSettings
 from common.utils.logger import get_logger
+from common.utils.lru_cache import TTLLRUCache
 
 logger = get_logger(__name__)
 
 # HTTP Bearer 安全方案
 security = HTTPBearer(auto_error=False)
 
+# 已验证令牌缓存的最大条目数
+VERIFIED_TOKEN_CACHE_SIZE = 10000
+
+# 没有 exp 的令牌在缓存中的保留时间（秒）
+VERIFIED_TOKEN_DEFAULT_TTL = 300.0
+
+# 已验证令牌缓存：(密钥指纹, 令牌摘要) -> payload，条目在令牌 exp 时过期。
+# get_jwt_auth 每次都会创建新实例，缓存放在模块级别供所有实例共用；
+# 同步依赖在线程池中执行，访问时需要加锁
+_verified_tokens: TTLLRUCache[Tuple[str, bytes], Dict[str, Any]] = TTLLRUCache(
+    maxsize=VERIFIED_TOKEN_CACHE_SIZE
+)
+_verified_tokens_lock = threading.Lock()
+
+# request.state 中保存本请求令牌验证结果的属性名
+_REQUEST_STATE_ATTR = "jwt_payload"
+
 
 class JWTAuth:
     """JWT 认证工具类"""
@@ -29,27 +50,47 @@ class JWTAuth:
         self.secret = settings.JWT_SECRET
         self.algorithm = settings.JWT_ALGORITHM
         self.expiration = getattr(settings, 'JWT_EXPIRATION', 86400000)  # 默认24小时
+        # 密钥指纹，区分不同密钥/算法验证的令牌
+        self._key_fingerprint = hashlib.sha256(
+            f"{self.algorithm}:{self.secret}".encode("utf-8")
+        ).hexdigest()
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """
         验证 JWT 令牌
         
+        验证通过的令牌按摘要缓存到 exp，缓存期内不再重复验证签名。
+        
         Args:
             token: JWT 令牌字符串
             
         Returns:
             解码后的 payload 字典，如果验证失败返回 None
         """
+        cache_key = (self._key_fingerprint, hashlib.sha256(token.encode("utf-8")).digest())
+        with _verified_tokens_lock:
+            cached = _verified_tokens.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
         try:
             payload = jwt.decode(
                 token,
                 self.secret,
                 algorithms=[self.algorithm]
             )
-            return payload
         except JWTError as e:
             logger.warning(f"JWT 验证失败: {str(e)}")
             return None
+        
+        ttl = VERIFIED_TOKEN_DEFAULT_TTL
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = exp - time.time()
+        if ttl > 0:
+            with _verified_tokens_lock:
+                _verified_tokens.set(cache_key, dict(payload), ttl=ttl)
+        return payload
     
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """
@@ -143,6 +184,26 @@ def extract_token_from_request(request: Request) -> Optional[str]:
     return None
 
 
+def _verify_request_token(request: Request, jwt_auth: JWTAuth, token: str) -> Optional[Dict[str, Any]]:
+    """
+    验证请求中的令牌，结果保存在 request.state 上，同一请求内只验证一次
+    
+    Args:
+        request: FastAPI Request 对象
+        jwt_auth: JWT 认证实例
+        token: JWT 令牌字符串
+        
+    Returns:
+        JWT payload 字典，如果验证失败返回 None
+    """
+    verified = getattr(request.state, _REQUEST_STATE_ATTR, None)
+    if verified is not None and verified[0] == token:
+        return verified[1]
+    payload = jwt_auth.verify_token(token)
+    setattr(request.state, _REQUEST_STATE_ATTR, (token, payload))
+    return payload
+
+
 def get_token_payload_from_request(
     request: Request,
     settings: BaseServiceSettings
@@ -162,7 +223,7 @@ def get_token_payload_from_request(
     # 从 Authorization 头获取
     token = extract_token_from_request(request)
     if token:
-        payload = jwt_auth.verify_token(token)
+        payload = _verify_request_token(request, jwt_auth, token)
         if payload:
             return payload
     
@@ -190,14 +251,14 @@ def get_token_payload(
     # 优先从 HTTPBearer 获取（标准方式，通过依赖注入）
     if credentials and hasattr(credentials, 'credentials') and credentials.credentials:
         token = credentials.credentials
-        payload = jwt_auth.verify_token(token)
+        payload = _verify_request_token(request, jwt_auth, token)
         if payload:
             return payload
     
     # 从 Authorization 头获取
     token = extract_token_from_request(request)
     if token:
-        payload = jwt_auth.verify_token(token)
+        payload = _verify_request_token(request, jwt_auth, token)
         if payload:
             return payload
     
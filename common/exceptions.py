@@ -25,6 +25,12 @@ class PasswordIncorrectError(BusinessException):
         super().__init__(status_code=status.HTTP_401_UNAUTHORIZED, detail="密码错误")
 
 
+class PasswordServiceBusyError(BusinessException):
+    """密码校验繁忙（密码哈希队列已满）"""
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="登录请求过多，请稍后重试")
+
+
 class OrganizationNotFoundError(BusinessException):
     """组织不存在"""
     def __init__(self):
@@ -53,3 +59,9 @@ class RoleNotFoundError(BusinessException):
     """角色不存在"""
     def __init__(self):
         super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail="角色不存在")
+
+
+class NotFoundError(BusinessException):
+    """资源不存在"""
+    def __init__(self, detail: str = "资源不存在"):
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
@@ -55,6 +55,7 @@ from common.models.lead_follow_up import LeadFollowUp
 from common.models.lead_note import LeadNote
 from common.models.opportunity import Opportunity, OpportunityProduct, OpportunityPaymentStage
 from common.models.audit_log import AuditLog
+from common.models.analytics_daily import AnalyticsDaily
 __all__ = [
     "User",
     "Organization",
@@ -104,5 +105,6 @@ __all__ = [
     "ProductPriceHistory",
     "VendorProductFinancial",
     "AuditLog",
+    "AnalyticsDaily",
 ]
 
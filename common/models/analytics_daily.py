@@ -0,0 +1,31 @@
+"""
+每日分析汇总模型（共享定义）
+按日期、组织、货币汇总新增客户数、订单数、订单金额和收入，由后台增量任务维护
+"""
+from sqlalchemy import Column, String, Integer, Date, DateTime, Numeric, Index
+from sqlalchemy.sql import func
+from common.database import Base
+
+
+class AnalyticsDaily(Base):
+    """每日分析汇总模型（共享定义）"""
+    __tablename__ = "analytics_daily"
+    
+    # 主键（日期 + 组织 + 货币）
+    stat_date = Column(Date, primary_key=True, comment="统计日期")
+    organization_id = Column(String(36), primary_key=True, default="", comment="组织ID（客户所属组织，未知时为空字符串）")
+    currency_code = Column(String(10), primary_key=True, default="", comment="货币代码（只有新增客户的行为空字符串）")
+    
+    # 汇总值
+    new_customers = Column(Integer, nullable=False, default=0, comment="新增客户数")
+    order_count = Column(Integer, nullable=False, default=0, comment="新增订单数")
+    order_amount = Column(Numeric(18, 2), nullable=False, default=0, comment="新增订单金额（final_amount，为空时取 total_amount）")
+    revenue = Column(Numeric(18, 2), nullable=False, default=0, comment="收入（当天创建且已完成订单的金额）")
+    
+    # 重算时间（增量任务以最大值作为下一次扫描的起点）
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), comment="重算时间")
+    
+    __table_args__ = (
+        Index("ix_analytics_daily_org_date", "organization_id", "stat_date"),
+        Index("ix_analytics_daily_updated", "updated_at"),
+    )
@@ -2,7 +2,7 @@
 客户模型（共享定义）
 所有微服务共享的客户表结构定义
 """
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, JSON, CheckConstraint
+from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, JSON, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from common.database import Base
@@ -82,6 +82,8 @@ class Customer(Base):
     __table_args__ = (
         CheckConstraint("customer_type IN ('individual', 'organization')", name="chk_customer_type"),
         CheckConstraint("customer_source_type IN ('own', 'agent')", name="chk_customer_source_type"),
+        Index("ix_customers_created_at", "created_at"),
+        Index("ix_customers_updated_at", "updated_at"),
         {'extend_existing': True},
     )
 
@@ -82,5 +82,6 @@ class Order(Base):
         Index("ix_orders_sales", "sales_user_id"),
         Index("ix_orders_status", "status_code"),
         Index("ix_orders_created", "created_at"),
+        Index("ix_orders_updated", "updated_at"),
     )
 
@@ -4,6 +4,7 @@
 from .logger import Logger, get_logger, default_logger
 from .repository import BaseRepository
 from .service import BaseService
+from .lru_cache import TTLLRUCache
 
 __all__ = [
     "Logger",
@@ -11,5 +12,6 @@ __all__ = [
     "default_logger",
     "BaseRepository",
     "BaseService",
+    "TTLLRUCache",
 ]
 
@@ -5,16 +5,23 @@ BANTU CRM 统一日志模块
 """
 import sys
 import os
+import time
+from collections import deque
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Deque, List
 from datetime import datetime
 from loguru import logger
-from queue import Queue
-from threading import Thread
+from threading import Condition, Event, Thread
 
 
 class MongoDBSink:
-    """MongoDB 日志 Sink（异步写入）"""
+    """
+    MongoDB 日志 Sink（后台线程批量写入）
+    
+    - 有界队列：队列满时丢弃最旧的记录并计数，内存占用有上限
+    - 批量写入：达到条数上限、字节数上限或刷新间隔时写入一批
+    - 写入失败按指数退避重试，重试耗尽后追加到本地 spool 文件，恢复后自动补写
+    """
     
     def __init__(
         self,
@@ -25,8 +32,16 @@ class MongoDBSink:
         username: Optional[str] = None,
         password: Optional[str] = None,
         auth_source: str = "bantu_crm",
-        batch_size: int = 10,
+        batch_size: int = 500,
         flush_interval: float = 5.0,
+        max_batch_bytes: int = 1024 * 1024,
+        max_queue_size: int = 50000,
+        max_retries: int = 5,
+        retry_backoff: float = 0.5,
+        max_retry_backoff: float = 30.0,
+        spool_path: Optional[str] = None,
+        max_spool_bytes: int = 100 * 1024 * 1024,
+        service_name: Optional[str] = None,
     ):
         """
         初始化 MongoDB Sink
@@ -39,8 +54,16 @@ class MongoDBSink:
             username: 用户名
             password: 密码
             auth_source: 认证数据库
-            batch_size: 批量写入大小
-            flush_interval: 刷新间隔（秒）
+            batch_size: 单批最大条数
+            flush_interval: 刷新间隔（秒），不足一批时最长等待时间
+            max_batch_bytes: 单批最大字节数（按文档估算大小累计）
+            max_queue_size: 队列最大长度，超出时丢弃最旧的记录
+            max_retries: 单批写入失败后的最大重试次数
+            retry_backoff: 首次重试等待时间（秒），之后按 2 倍递增
+            max_retry_backoff: 单次重试最长等待时间（秒）
+            spool_path: 本地 spool 文件路径（为空时重试耗尽的批次直接丢弃）
+            max_spool_bytes: spool 文件最大字节数，超出后不再追加
+            service_name: 写入文档的 service 字段（为空时取日志记录 extra 中的 service）
         """
         self.collection_name = collection_name
         self.database_name = database_name
@@ -51,12 +74,31 @@ class MongoDBSink:
         self.auth_source = auth_source
         self.batch_size = batch_size
         self.flush_interval = flush_interval
+        self.max_batch_bytes = max_batch_bytes
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.spool_path = Path(spool_path) if spool_path else None
+        self.max_spool_bytes = max_spool_bytes
+        self.service_name = service_name
         
-        self._queue: Queue = Queue()
+        # 队列中保存日志记录字段的轻量元组，文档在后台线程构建（见 __call__）
+        self._queue: Deque[tuple] = deque()
+        self._condition = Condition()
+        self._stop_event = Event()
         self._thread: Optional[Thread] = None
         self._running = False
         self._client = None
         self._collection = None
+        self._last_error: Optional[str] = None
+        
+        # 统计计数
+        self.enqueued_count = 0
+        self.written_count = 0
+        self.dropped_count = 0
+        self.spooled_count = 0
+        self.retry_count = 0
         
     def _init_mongodb(self):
         """初始化 MongoDB 连接（使用 pymongo 同步客户端）"""
@@ -85,14 +127,7 @@ class MongoDBSink:
             self._collection = db[self.collection_name]
             
             # 创建索引
-            try:
-                self._collection.create_index([("timestamp", -1)])
-                self._collection.create_index([("level", 1)])
-                self._collection.create_index([("service", 1)])
-                self._collection.create_index([("name", 1)])
-                print(f"[MongoDB Sink] ✅ 索引创建成功，集合: {self.collection_name}")
-            except Exception as index_error:
-                print(f"[MongoDB Sink] ⚠️  索引创建失败（可能已存在）: {index_error}")
+            self.ensure_indexes(self._collection)
             
         except ImportError:
             error_msg = "pymongo 未安装，请运行: pip install pymongo"
@@ -104,57 +139,271 @@ class MongoDBSink:
             logger.error(error_msg)
             raise
     
+    @staticmethod
+    def ensure_indexes(collection):
+        """
+        创建日志查询所需的索引（已存在的索引不会重复创建）
+        
+        - (service, level, timestamp)：按服务、级别过滤并按时间倒序分页
+        - file / function：支持锚定前缀匹配（^前缀）走索引范围扫描
+        - message 文本索引：关键词搜索使用 $text，不再逐条正则扫描
+        
+        Args:
+            collection: pymongo 集合
+        """
+        try:
+            collection.create_index([("timestamp", -1)])
+            collection.create_index([("level", 1)])
+            collection.create_index([("service", 1)])
+            collection.create_index([("name", 1)])
+            collection.create_index([("service", 1), ("level", 1), ("timestamp", -1)])
+            collection.create_index([("file", 1)])
+            collection.create_index([("function", 1)])
+            print(f"[MongoDB Sink] ✅ 索引创建成功，集合: {collection.name}")
+        except Exception as index_error:
+            print(f"[MongoDB Sink] ⚠️  索引创建失败（可能已存在）: {index_error}")
+        
+        # 每个集合只能有一个文本索引，单独创建以免与已有文本索引冲突时影响其他索引
+        try:
+            # default_language=none：不做词干提取和停用词过滤，日志中的英文单词按原样分词
+            collection.create_index([("message", "text")], default_language="none")
+        except Exception as index_error:
+            print(f"[MongoDB Sink] ⚠️  message 文本索引创建失败（可能已存在）: {index_error}")
+    
     def _worker(self):
-        """后台工作线程：批量写入 MongoDB"""
+        """后台工作线程：凑批后批量写入 MongoDB，退出前写完（或 spool）剩余日志"""
         try:
             self._init_mongodb()
             print(f"[MongoDB Sink] ✅ 工作线程已启动，开始处理日志队列")
-        except Exception as e:
-            print(f"[MongoDB Sink] ❌ 工作线程启动失败: {e}")
+        except ImportError:
             self._running = False
             return
-        
-        batch = []
-        last_flush = datetime.now()
+        except Exception as e:
+            # 启动时 MongoDB 不可用：继续运行，写入时按退避策略重连，期间的日志进入 spool
+            print(f"[MongoDB Sink] ⚠️  MongoDB 暂不可用，将在写入时重试: {e}", file=sys.stderr)
         
         while self._running:
             try:
-                # 从队列获取日志（带超时）
-                try:
-                    log_record = self._queue.get(timeout=1.0)
-                    batch.append(log_record)
-                except:
-                    # 超时，检查是否需要刷新
-                    pass
-                
-                # 检查是否需要刷新
-                now = datetime.now()
-                should_flush = (
-                    len(batch) >= self.batch_size or
-                    (batch and (now - last_flush).total_seconds() >= self.flush_interval)
-                )
-                
-                if should_flush and batch:
-                    try:
-                        result = self._collection.insert_many(batch, ordered=False)
-                        print(f"[MongoDB Sink] ✅ 批量写入成功: {len(batch)} 条日志 -> {self.collection_name}")
-                        batch.clear()
-                        last_flush = now
-                    except Exception as e:
-                        # 写入失败，记录错误但不阻塞
-                        print(f"[MongoDB Sink] ❌ 批量写入失败: {e}", file=sys.stderr)
-                        batch.clear()
-                        
+                batch = self._next_batch()
+                if batch:
+                    self._flush(batch)
             except Exception as e:
                 print(f"MongoDB Sink 工作线程错误: {e}", file=sys.stderr)
         
-        # 退出前刷新剩余日志
-        if batch and self._collection:
+        # 退出前写完剩余日志（不再退避等待，失败直接 spool）
+        while True:
+            batch = self._next_batch(wait=False)
+            if not batch:
+                break
+            self._flush(batch)
+    
+    def _next_batch(self, wait: bool = True) -> List[Dict[str, Any]]:
+        """
+        从队列取出一批日志并构建 MongoDB 文档
+        
+        在 flush_interval 内凑批，达到条数上限或字节数上限时立即返回；
+        wait=False 时只取出当前队列中已有的日志。文档在释放队列锁之后构建，
+        不阻塞日志调用线程入队。
+        """
+        items: List[tuple] = []
+        batch_bytes = 0
+        deadline = time.monotonic() + self.flush_interval
+        with self._condition:
+            while True:
+                while self._queue and len(items) < self.batch_size and batch_bytes < self.max_batch_bytes:
+                    item = self._queue.popleft()
+                    items.append(item)
+                    batch_bytes += self._estimate_size(item)
+                
+                if len(items) >= self.batch_size or batch_bytes >= self.max_batch_bytes:
+                    break
+                remaining = deadline - time.monotonic()
+                if not wait or remaining <= 0 or not self._running:
+                    break
+                self._condition.wait(timeout=remaining)
+        
+        batch: List[Dict[str, Any]] = []
+        for item in items:
+            try:
+                batch.append(self._build_document(item))
+            except Exception as e:
+                self.dropped_count += 1
+                print(f"MongoDB Sink 处理日志失败: {e}", file=sys.stderr)
+        return batch
+    
+    @staticmethod
+    def _estimate_size(item: tuple) -> int:
+        """估算日志文档的 BSON 大小（固定字段开销 + 消息长度 + 异常信息）"""
+        size = 256 + len(item[2])
+        if item[10]:
+            size += 2048
+        return size
+    
+    def _build_document(self, item: tuple) -> Dict[str, Any]:
+        """
+        根据 __call__ 入队的字段元组构建 MongoDB 文档（在后台线程执行）
+        
+        Args:
+            item: (time, level, message, name, function, line, file, module,
+                   thread, process, exception, extra)
+        
+        Returns:
+            MongoDB 文档
+        """
+        (record_time, level, message, name, function, line, file,
+         module, thread, process, exception, extra) = item
+        
+        log_doc = {
+            "timestamp": datetime.fromtimestamp(record_time.timestamp()),
+            "level": level,
+            "message": message,
+            "service": self.service_name or (extra or {}).get("service", "unknown"),
+            "name": name or "",
+            "function": function or "",
+            "line": line or 0,
+            "file": file.path if file else "",
+            "module": module or "",
+            "thread": thread.id if thread else 0,
+            "process": process.id if process else 0,
+        }
+        
+        # 添加异常信息（如果有）
+        if exception:
+            log_doc["exception"] = {
+                "type": exception.type.__name__ if hasattr(exception.type, "__name__") else str(exception.type),
+                "value": str(exception.value) if exception.value else "",
+                "traceback": str(exception.traceback) if exception.traceback else "",
+            }
+        
+        # 添加额外字段（排除 service，已单独处理）
+        if extra:
+            extra_copy = {k: v for k, v in extra.items() if k != "service"}
+            if extra_copy:
+                log_doc["extra"] = extra_copy
+        
+        return log_doc
+    
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """写入一批日志，重试耗尽后写入 spool 文件；写入成功后补写 spool 中的积压日志"""
+        if self._write_with_retry(batch):
+            if self._running and self._has_spool():
+                self._replay_spool()
+        else:
+            self._spool(batch)
+    
+    def _write_with_retry(self, batch: List[Dict[str, Any]]) -> bool:
+        """
+        按指数退避重试写入一批日志
+        
+        Returns:
+            bool: 是否写入成功
+        """
+        attempts = self.max_retries + 1 if self._running else 1
+        for attempt in range(attempts):
+            if attempt:
+                self.retry_count += 1
+                delay = min(self.retry_backoff * (2 ** (attempt - 1)), self.max_retry_backoff)
+                # 停止时立即结束等待，剩余批次直接进入 spool
+                if self._stop_event.wait(delay):
+                    return False
             try:
-                result = self._collection.insert_many(batch, ordered=False)
-                print(f"[MongoDB Sink] ✅ 退出前刷新成功: {len(batch)} 条日志")
+                self.written_count += self._insert_batch(batch)
+                if self._last_error is not None:
+                    print(f"[MongoDB Sink] ✅ MongoDB 写入已恢复: {self.collection_name}", file=sys.stderr)
+                    self._last_error = None
+                return True
+            except ImportError:
+                return False
             except Exception as e:
-                print(f"[MongoDB Sink] ❌ 退出前刷新失败: {e}", file=sys.stderr)
+                error = str(e)
+                # 同一错误只输出一次，避免故障期间刷屏
+                if error != self._last_error:
+                    print(f"[MongoDB Sink] ❌ 批量写入失败（将重试）: {error}", file=sys.stderr)
+                    self._last_error = error
+        return False
+    
+    def _insert_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        写入一批日志
+        
+        insert_many 会为文档分配 _id，重试时已写入的文档报重复键错误，视为已写入。
+        
+        Returns:
+            int: 本次新写入的条数
+        """
+        from pymongo.errors import BulkWriteError
+        
+        if self._collection is None:
+            # 启动时连接失败：关闭未完成初始化的客户端后重新连接
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+            self._init_mongodb()
+        try:
+            result = self._collection.insert_many(batch, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            details = e.details or {}
+            errors = [err for err in details.get("writeErrors", []) if err.get("code") != 11000]
+            if errors or details.get("writeConcernErrors"):
+                raise
+            return details.get("nInserted", 0)
+    
+    def _spool(self, batch: List[Dict[str, Any]]) -> None:
+        """将写入失败的批次追加到本地 spool 文件（JSON Lines，保留 BSON 类型）"""
+        if self.spool_path is None:
+            self.dropped_count += len(batch)
+            return
+        try:
+            from bson import json_util
+            
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.spool_path.exists() and self.spool_path.stat().st_size >= self.max_spool_bytes:
+                self.dropped_count += len(batch)
+                return
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                for doc in batch:
+                    f.write(json_util.dumps(doc, ensure_ascii=False))
+                    f.write("\n")
+            self.spooled_count += len(batch)
+        except Exception as e:
+            self.dropped_count += len(batch)
+            print(f"[MongoDB Sink] ❌ 写入 spool 文件失败: {e}", file=sys.stderr)
+    
+    def _spool_replay_path(self) -> Path:
+        """补写中的 spool 文件路径"""
+        return self.spool_path.with_name(self.spool_path.name + ".replay")
+    
+    def _has_spool(self) -> bool:
+        """是否有待补写的 spool 文件"""
+        if self.spool_path is None:
+            return False
+        return self.spool_path.exists() or self._spool_replay_path().exists()
+    
+    def _replay_spool(self) -> None:
+        """MongoDB 恢复后补写 spool 文件中的日志（补写过程中失败时保留文件，下次再试）"""
+        from bson import json_util
+        
+        # 先改名再读取，补写期间新的失败批次写入新的 spool 文件
+        replay_path = self._spool_replay_path()
+        try:
+            if not replay_path.exists():
+                self.spool_path.rename(replay_path)
+            batch: List[Dict[str, Any]] = []
+            with open(replay_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    batch.append(json_util.loads(line))
+                    if len(batch) >= self.batch_size:
+                        self.written_count += self._insert_batch(batch)
+                        batch = []
+            if batch:
+                self.written_count += self._insert_batch(batch)
+            replay_path.unlink()
+            print(f"[MongoDB Sink] ✅ spool 文件补写完成: {self.spool_path}", file=sys.stderr)
+        except Exception as e:
+            print(f"[MongoDB Sink] ⚠️  spool 文件补写失败，稍后重试: {e}", file=sys.stderr)
     
     def start(self):
         """启动后台线程"""
@@ -162,81 +411,66 @@ class MongoDBSink:
             return
         
         self._running = True
-        self._thread = Thread(target=self._worker, daemon=True)
+        self._stop_event.clear()
+        self._thread = Thread(target=self._worker, name="mongodb-log-sink", daemon=True)
         self._thread.start()
     
-    def stop(self):
-        """停止后台线程"""
+    def stop(self, timeout: float = 5.0):
+        """停止后台线程（写完或 spool 剩余日志后退出）"""
         self._running = False
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
         if self._thread:
-            self._thread.join(timeout=5.0)
+            self._thread.join(timeout=timeout)
         if self._client:
             self._client.close()
     
+    def _enqueue(self, item: tuple) -> None:
+        """放入有界队列，队列满时丢弃最旧的记录"""
+        with self._condition:
+            if len(self._queue) >= self.max_queue_size:
+                self._queue.popleft()
+                self.dropped_count += 1
+            self._queue.append(item)
+            self.enqueued_count += 1
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取 Sink 统计信息"""
+        return {
+            "queue_size": len(self._queue),
+            "enqueued": self.enqueued_count,
+            "written": self.written_count,
+            "dropped": self.dropped_count,
+            "spooled": self.spooled_count,
+            "retries": self.retry_count,
+        }
+    
     def __call__(self, message):
-        """Loguru sink 接口"""
+        """
+        Loguru sink 接口
+        
+        在日志调用线程上执行，只把需要的记录字段（引用）打包成元组入队，
+        时间转换、extra 复制等文档构建工作由后台线程完成（见 _build_document）。
+        """
         try:
             record = message.record
-            
-            # 解析文件路径
-            file_path = ""
-            if hasattr(record, "file") and record.file:
-                if hasattr(record.file, "path"):
-                    file_path = record.file.path
-                elif isinstance(record.file, dict):
-                    file_path = record.file.get("path", "")
-                else:
-                    file_path = str(record.file)
-            
-            # 解析线程和进程信息
-            thread_id = 0
-            if hasattr(record, "thread") and record.thread:
-                if hasattr(record.thread, "id"):
-                    thread_id = record.thread.id
-                elif isinstance(record.thread, dict):
-                    thread_id = record.thread.get("id", 0)
-            
-            process_id = 0
-            if hasattr(record, "process") and record.process:
-                if hasattr(record.process, "id"):
-                    process_id = record.process.id
-                elif isinstance(record.process, dict):
-                    process_id = record.process.get("id", 0)
-            
-            # 解析日志记录
-            log_doc = {
-                "timestamp": datetime.fromtimestamp(record["time"].timestamp()),
-                "level": record["level"].name,
-                "message": record["message"],
-                "service": record.get("extra", {}).get("service", "unknown"),
-                "name": record.get("name", ""),
-                "function": record.get("function", ""),
-                "line": record.get("line", 0),
-                "file": file_path,
-                "module": record.get("module", ""),
-                "thread": thread_id,
-                "process": process_id,
-            }
-            
-            # 添加异常信息（如果有）
-            if record.get("exception"):
-                exc = record["exception"]
-                log_doc["exception"] = {
-                    "type": exc.type.__name__ if hasattr(exc.type, "__name__") else str(exc.type),
-                    "value": str(exc.value) if exc.value else "",
-                    "traceback": str(exc.traceback) if hasattr(exc, "traceback") else "",
-                }
-            
-            # 添加额外字段（排除 service，已单独处理）
-            extra = record.get("extra", {})
-            if extra:
-                extra_copy = {k: v for k, v in extra.items() if k != "service"}
-                if extra_copy:
-                    log_doc["extra"] = extra_copy
-            
-            # 添加到队列
-            self._queue.put(log_doc)
-            
+            self._enqueue((
+                record["time"],
+                record["level"].name,
+                record["message"],
+                record["name"],
+                record["function"],
+                record["line"],
+                record["file"],
+                record["module"],
+                record["thread"],
+                record["process"],
+                record["exception"],
+                record["extra"],
+            ))
         except Exception as e:
             # 避免日志记录本身出错导致循环
             print(f"MongoDB Sink 处理日志失败: {e}", file=sys.stderr)
@@ -266,6 +500,10 @@ class Logger:
         mongodb_username: Optional[str] = None,
         mongodb_password: Optional[str] = None,
         mongodb_auth_source: str = "bantu_crm",
+        mongodb_batch_size: int = 500,
+        mongodb_max_batch_bytes: int = 1024 * 1024,
+        mongodb_max_queue_size: int = 50000,
+        mongodb_spool_path: Optional[str] = None,
     ):
         """
         初始化日志配置
@@ -285,6 +523,10 @@ class Logger:
             mongodb_username: MongoDB 用户名
             mongodb_password: MongoDB 密码
             mongodb_auth_source: MongoDB 认证数据库
+            mongodb_batch_size: MongoDB 单批写入最大条数
+            mongodb_max_batch_bytes: MongoDB 单批写入最大字节数
+            mongodb_max_queue_size: MongoDB 写入队列最大长度（超出时丢弃最旧的日志）
+            mongodb_spool_path: MongoDB 不可用时的本地 spool 文件（默认: 日志目录/{集合名}.spool.jsonl）
         """
         if cls._initialized:
             logger.warning("Logger 已经初始化，跳过重复初始化")
@@ -369,6 +611,11 @@ class Logger:
                 if mongodb_password is None:
                     mongodb_password = os.getenv("MONGODB_PASSWORD")
                 
+                # MongoDB 不可用时的 spool 文件默认放在日志目录下
+                if mongodb_spool_path is None:
+                    spool_dir = Path(log_dir) if log_dir else Path(__file__).parent.parent.parent / "logs"
+                    mongodb_spool_path = str(spool_dir / f"{mongodb_collection}.spool.jsonl")
+                
                 # 创建 MongoDB Sink
                 cls._mongodb_sink = MongoDBSink(
                     collection_name=mongodb_collection,
@@ -378,6 +625,11 @@ class Logger:
                     username=mongodb_username,
                     password=mongodb_password,
                     auth_source=mongodb_auth_source,
+                    batch_size=mongodb_batch_size,
+                    max_batch_bytes=mongodb_max_batch_bytes,
+                    max_queue_size=mongodb_max_queue_size,
+                    spool_path=mongodb_spool_path,
+                    service_name=service_name,
                 )
                 
                 # 启动后台线程
@@ -386,29 +638,11 @@ class Logger:
                 cls._mongodb_sink.start()
                 print(f"[Logger] ✅ MongoDB Sink 线程已启动")
                 
-                # 创建一个包装函数，为日志记录添加 service 标识
-                class ServiceMongoDBSink:
-                    """包装 MongoDB Sink，自动添加 service 字段"""
-                    def __init__(self, sink, service_name):
-                        self.sink = sink
-                        self.service_name = service_name
-                    
-                    def __call__(self, message):
-                        # 确保 extra 字典存在
-                        if not hasattr(message.record, "extra"):
-                            message.record["extra"] = {}
-                        # 添加 service 字段
-                        message.record["extra"]["service"] = self.service_name
-                        # 调用原始 sink
-                        return self.sink(message)
-                
-                # 使用包装后的 sink
-                wrapped_sink = ServiceMongoDBSink(cls._mongodb_sink, service_name)
-                
                 # 添加到 loguru（直接添加到主 logger）
+                # Sink 只使用 record 字段，格式只取 {message}，避免在调用线程上做无用的格式化
                 logger.add(
-                    wrapped_sink,
-                    format=log_format,
+                    cls._mongodb_sink,
+                    format="{message}",
                     level=log_level,
                 )
                 
@@ -422,6 +656,18 @@ class Logger:
         cls._initialized = True
         logger.info(f"Logger 初始化完成 - 服务: {service_name}, 级别: {log_level}")
     
+    @classmethod
+    def get_mongodb_stats(cls) -> Optional[Dict[str, int]]:
+        """
+        获取 MongoDB Sink 统计信息（入队、写入、丢弃、spool 条数等）
+        
+        Returns:
+            统计信息字典；未启用 MongoDB 日志时返回 None
+        """
+        if cls._mongodb_sink is None:
+            return None
+        return cls._mongodb_sink.get_stats()
+    
     @classmethod
     def get_logger(cls, name: Optional[str] = None):
         """
@@ -0,0 +1,91 @@
+"""
+进程内 LRU 缓存（支持过期时间）
+用于权限、认证上下文等热点数据的本地缓存，配合 Redis 版本号实现跨进程失效
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLLRUCache(Generic[K, V]):
+    """
+    带过期时间的 LRU 缓存
+    
+    超出容量时淘汰最久未使用的条目；读取时发现过期的条目直接删除。
+    只在事件循环线程中使用，不做加锁。
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        初始化缓存
+        
+        Args:
+            maxsize: 最大条目数
+            ttl: 默认过期时间（秒），为 None 时不过期
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[K, Tuple[Optional[float], V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: K, default: Any = None) -> Any:
+        """
+        读取缓存
+        
+        Args:
+            key: 缓存键
+            default: 未命中或已过期时的返回值
+        
+        Returns:
+            缓存值
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """
+        写入缓存
+        
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 本条目的过期时间（秒），为 None 时使用默认过期时间
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def pop(self, key: K, default: Any = None) -> Any:
+        """删除并返回缓存值（不检查过期）"""
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, key: object) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+
+_MISSING = object()
@@ -2,7 +2,7 @@
 数据分析 API
 """
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -42,13 +42,19 @@ async def get_customer_summary(
 @router.get("/customers/trend", response_model=Result[CustomerTrendResponse])
 async def get_customer_trend(
     period: str = Query(default="day", description="统计周期：day, week, month"),
+    start_date: Optional[date] = Query(None, description="开始日期（默认按周期取最近一段时间）"),
+    end_date: Optional[date] = Query(None, description="结束日期（默认今天）"),
+    organization_id: Optional[str] = Query(None, description="组织ID"),
     db: AsyncSession = Depends(get_db)
 ):
     """获取客户增长趋势"""
-    logger.info(f"API: 获取客户增长趋势: period={period}")
+    logger.info(
+        f"API: 获取客户增长趋势: period={period}, start_date={start_date}, "
+        f"end_date={end_date}, organization_id={organization_id}"
+    )
     try:
         service = AnalyticsService(db)
-        trend = await service.get_customer_trend(period)
+        trend = await service.get_customer_trend(period, start_date, end_date, organization_id)
         return Result.success(data=trend, message="获取客户增长趋势成功")
     except Exception as e:
         logger.error(f"API: 获取客户增长趋势失败: {str(e)}", exc_info=True)
@@ -75,13 +81,20 @@ async def get_order_summary(
 @router.get("/orders/revenue", response_model=Result[RevenueResponse])
 async def get_revenue(
     period: str = Query(default="month", description="统计周期：day, week, month"),
+    start_date: Optional[date] = Query(None, description="开始日期（默认按周期取最近一段时间）"),
+    end_date: Optional[date] = Query(None, description="结束日期（默认今天）"),
+    currency_code: Optional[str] = Query(None, description="货币代码（默认汇总所有货币）"),
+    organization_id: Optional[str] = Query(None, description="组织ID"),
     db: AsyncSession = Depends(get_db)
 ):
     """获取收入统计"""
-    logger.info(f"API: 获取收入统计: period={period}")
+    logger.info(
+        f"API: 获取收入统计: period={period}, start_date={start_date}, end_date={end_date}, "
+        f"currency_code={currency_code}, organization_id={organization_id}"
+    )
     try:
         service = AnalyticsService(db)
-        revenue = await service.get_revenue(period)
+        revenue = await service.get_revenue(period, start_date, end_date, currency_code, organization_id)
         return Result.success(data=revenue, message="获取收入统计成功")
     except Exception as e:
         logger.error(f"API: 获取收入统计失败: {str(e)}", exc_info=True)
@@ -27,17 +27,22 @@ async def query_logs(query: LogQueryRequest):
     - 服务名称过滤（services）
     - 日志级别过滤（levels）
     - 时间范围过滤（start_time, end_time）
-    - 关键词搜索（keyword，在 message 字段中搜索）
-    - 文件名过滤（file，支持部分匹配）
-    - 函数名过滤（function，支持部分匹配）
+    - 关键词搜索（keyword，在 message 字段中搜索；普通英文单词/短语使用文本索引按整词匹配）
+    - 文件名过滤（file，支持部分匹配；以 ^ 开头为前缀匹配，可走索引）
+    - 函数名过滤（function，支持部分匹配；以 ^ 开头为前缀匹配，可走索引）
+    - 近似总数（approximate_total，跳过精确计数）
     
-    结果按时间戳倒序排列（最新的在前），支持分页。
+    结果按时间戳倒序排列（最新的在前），支持分页；
+    深分页请使用响应中的 next_cursor 作为下一次请求的 cursor。
     """
     logger.info(f"API: 查询日志 - services={query.services}, levels={query.levels}, page={query.page}")
     try:
         service = LogService()
         result = await service.query_logs(query)
         return Result.success(data=result, message="查询日志成功")
+    except ValueError as e:
+        logger.warning(f"API: 查询日志参数错误: {str(e)}")
+        return Result.error(code=400, message=str(e))
     except RuntimeError as e:
         logger.error(f"API: MongoDB 连接失败: {str(e)}", exc_info=True)
         return Result.error(code=503, message=f"MongoDB 连接失败: {str(e)}")
@@ -52,11 +57,13 @@ async def query_logs_get(
     levels: Optional[str] = Query(None, description="日志级别列表，逗号分隔（如：ERROR,WARNING）"),
     start_time: Optional[datetime] = Query(None, description="开始时间（ISO 8601 格式）"),
     end_time: Optional[datetime] = Query(None, description="结束时间（ISO 8601 格式）"),
-    keyword: Optional[str] = Query(None, description="关键词搜索（在 message 字段中搜索）"),
-    file: Optional[str] = Query(None, description="文件名过滤（支持部分匹配）"),
-    function: Optional[str] = Query(None, description="函数名过滤（支持部分匹配）"),
+    keyword: Optional[str] = Query(None, description="关键词搜索（在 message 字段中搜索，普通英文单词/短语按整词匹配）"),
+    file: Optional[str] = Query(None, description="文件名过滤（支持部分匹配，以 ^ 开头为前缀匹配）"),
+    function: Optional[str] = Query(None, description="函数名过滤（支持部分匹配，以 ^ 开头为前缀匹配）"),
     page: int = Query(1, ge=1, description="页码（从1开始）"),
     page_size: int = Query(50, ge=1, le=500, description="每页数量（最大500）"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页响应中的 next_cursor）"),
+    approximate_total: bool = Query(False, description="是否使用近似总数（大集合上更快）"),
 ):
     """
     查询日志（GET 方式，方便浏览器直接访问）
@@ -83,6 +90,8 @@ async def query_logs_get(
         function=function,
         page=page,
         page_size=page_size,
+        cursor=cursor,
+        approximate_total=approximate_total,
     )
     
     logger.info(f"API: 查询日志（GET）- services={services_list}, levels={levels_list}, page={page}")
@@ -90,6 +99,9 @@ async def query_logs_get(
         service = LogService()
         result = await service.query_logs(query)
         return Result.success(data=result, message="查询日志成功")
+    except ValueError as e:
+        logger.warning(f"API: 查询日志参数错误: {str(e)}")
+        return Result.error(code=400, message=str(e))
     except RuntimeError as e:
         logger.error(f"API: MongoDB 连接失败: {str(e)}", exc_info=True)
         return Result.error(code=503, message=f"MongoDB 连接失败: {str(e)}")
@@ -18,6 +18,7 @@ from common.auth import (
 from foundation_service.config import settings
 from foundation_service.repositories.product_dependency_repository import ProductDependencyRepository
 from foundation_service.services.product_dependency_service import ProductDependencyService
+from foundation_service.utils.product_dependency_graph import invalidate_product_dependency_graph
 from foundation_service.schemas.product_dependency import (
     ProductDependencyResponse,
     ProductDependencyCreateRequest,
@@ -244,7 +245,8 @@ async def create_product_dependency(
         description=request.description,
     )
     
-    await db.add(dependency)
+    db.add(dependency)
+    await invalidate_product_dependency_graph(db)
     await db.commit()
     await db.refresh(dependency)
     
@@ -309,6 +311,7 @@ async def update_product_dependency(
     for key, value in update_data.items():
         setattr(dependency, key, value)
     
+    await invalidate_product_dependency_graph(db)
     await db.commit()
     await db.refresh(dependency)
     await db.refresh(dependency, ["product", "depends_on_product"])
@@ -366,6 +369,7 @@ async def delete_product_dependency(
         raise BusinessException(detail="产品依赖关系不存在", status_code=404)
     
     await db.delete(dependency)
+    await invalidate_product_dependency_graph(db)
     await db.commit()
     
     return Result.success(message="产品依赖关系删除成功")
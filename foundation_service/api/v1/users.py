@@ -107,9 +107,8 @@ async def reset_password(
     - 当前用户必须拥有 ADMIN 角色
     - 当前用户必须是目标用户所属组织的 admin，或者是 BANTU 内部组织的 admin
     """
-    from foundation_service.dependencies import get_current_user_id, get_current_user_roles
+    from foundation_service.dependencies import get_current_user_id, get_current_user_roles, get_auth_context
     from foundation_service.repositories.organization_employee_repository import OrganizationEmployeeRepository
-    from foundation_service.repositories.organization_repository import OrganizationRepository
     from foundation_service.repositories.user_repository import UserRepository
     from fastapi import HTTPException, status
     
@@ -126,11 +125,11 @@ async def reset_password(
     # 2. 验证 ADMIN 角色
     # 优先从请求头获取（Gateway 传递）
     current_user_roles = get_current_user_roles(request_obj)
-    # 如果请求头中没有角色信息，从数据库查询（兼容直接访问 Foundation Service 的情况）
-    if not current_user_roles:
-        user_repo = UserRepository(db)
-        user_roles = await user_repo.get_user_roles(current_user_id)
-        current_user_roles = [role.code for role in user_roles]
+    # 当前用户的认证上下文（同一请求内只构建一次）
+    auth_context = await get_auth_context(request_obj, db)
+    # 如果请求头中没有角色信息，使用认证上下文中的角色（兼容直接访问 Foundation Service 的情况）
+    if not current_user_roles and auth_context:
+        current_user_roles = list(auth_context.role_codes)
     
     if "ADMIN" not in current_user_roles:
         raise HTTPException(
@@ -157,12 +156,7 @@ async def reset_password(
         )
     
     # 5. 验证组织权限
-    org_repo = OrganizationRepository(db)
-    bantu_org = await org_repo.get_bantu_organization()
-    
-    # 获取当前用户的组织
-    current_employee = await employee_repo.get_primary_by_user_id(current_user_id)
-    if not current_employee:
+    if not auth_context or not auth_context.primary_organization_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="当前用户未关联到任何组织"
@@ -172,10 +166,10 @@ async def reset_password(
     # - BANTU admin 可以重置任何用户的密码
     # - 组织 admin 只能重置同组织用户的密码
     has_permission = False
-    if bantu_org and current_employee.organization_id == bantu_org.id:
+    if auth_context.is_bantu:
         # BANTU admin 可以重置任何用户的密码
         has_permission = True
-    elif current_employee.organization_id == target_employee.organization_id:
+    elif auth_context.primary_organization_id == target_employee.organization_id:
         # 同组织的 admin 可以重置该组织用户的密码
         has_permission = True
     
@@ -42,8 +42,70 @@ class Settings(BaseServiceSettings):
     ALERT_WHATSAPP_ENABLED: bool = False
     ALERT_EMAIL_RECIPIENTS: str = ""
     CACHE_ENABLED: bool = True  # 是否启用缓存
-    CACHE_TTL: int = 300  # 缓存过期时间（秒），5分钟
+    CACHE_TTL: int = 300  # 缓存软过期时间（秒），5分钟，超过后返回旧数据并后台刷新
+    CACHE_HARD_TTL: int = 1800  # 缓存硬过期时间（秒），超过后必须重新查询
+    CACHE_LOCK_TTL: int = 30  # 缓存重算锁的过期时间（秒）
+    CACHE_LOCK_WAIT: float = 5.0  # 其他进程重算时等待结果的最长时间（秒）
     CACHE_KEY_PREFIX: str = "analytics:"  # 缓存键前缀
+    
+    # 审计日志异步写入配置
+    AUDIT_QUEUE_MAX_SIZE: int = 10000  # 审计队列最大长度（超出后丢弃并计数）
+    AUDIT_BATCH_SIZE: int = 200  # 单次批量写入的最大记录数
+    AUDIT_FLUSH_INTERVAL: float = 1.0  # 批量写入最长等待时间（秒）
+    AUDIT_SHUTDOWN_TIMEOUT: float = 10.0  # 关闭时等待队列写完的最长时间（秒）
+    
+    # 最后登录时间批量写入配置
+    LAST_LOGIN_MAX_PENDING: int = 50000  # 最多等待写入的用户数（超出后登录请求直接更新）
+    LAST_LOGIN_BATCH_SIZE: int = 500  # 单次批量更新的最大用户数
+    LAST_LOGIN_FLUSH_INTERVAL: float = 5.0  # 写入周期（秒）
+    LAST_LOGIN_SHUTDOWN_TIMEOUT: float = 10.0  # 关闭时等待剩余更新写完的最长时间（秒）
+    
+    # 分析计数器配置（看板摘要接口读取增量维护的计数）
+    ANALYTICS_COUNTERS_ENABLED: bool = True  # 是否启用分析计数器（关闭时摘要接口查询数据库）
+    ANALYTICS_COUNTERS_KEY_PREFIX: str = "analytics:counters:"  # 计数哈希键前缀
+    ANALYTICS_COUNTERS_RECONCILE_INTERVAL: float = 600.0  # 对账周期（秒），也是活跃客户/用户数的刷新周期
+    ANALYTICS_COUNTERS_SHUTDOWN_TIMEOUT: float = 10.0  # 关闭时等待未完成增量写入的最长时间（秒）
+    
+    # 每日分析汇总配置（analytics_daily，趋势和收入接口读取）
+    ANALYTICS_ROLLUP_ENABLED: bool = True  # 是否启动每日汇总增量任务
+    ANALYTICS_ROLLUP_INTERVAL: float = 300.0  # 增量重算周期（秒）
+    ANALYTICS_ROLLUP_LOOKBACK_DAYS: int = 2  # 每次固定重算的最近天数（包含今天）
+    ANALYTICS_ROLLUP_CHUNK_DAYS: int = 31  # 单个事务重算的最大天数
+    ANALYTICS_ROLLUP_SHUTDOWN_TIMEOUT: float = 10.0  # 关闭时等待当前重算完成的最长时间（秒）
+    
+    # 日志查询计数配置（approximate_total 模式）
+    LOG_COUNT_LIMIT: int = 10000  # 带过滤条件时的计数上限
+    LOG_COUNT_CACHE_TTL: int = 30  # 计数缓存过期时间（秒）
+    LOG_COUNT_CACHE_KEY_PREFIX: str = "logs:count:"  # 计数缓存键前缀
+    
+    # MongoDB 日志 Sink 写入配置
+    LOG_SINK_BATCH_SIZE: int = 500  # 单批写入最大条数
+    LOG_SINK_MAX_BATCH_BYTES: int = 1024 * 1024  # 单批写入最大字节数
+    LOG_SINK_MAX_QUEUE_SIZE: int = 50000  # 写入队列最大长度（超出时丢弃最旧的日志）
+    
+    # 用户权限缓存配置
+    PERMISSION_CACHE_KEY_PREFIX: str = "perm:"  # 权限缓存键前缀
+    PERMISSION_CACHE_TTL: int = 3600  # Redis 中权限集合的过期时间（秒）
+    PERMISSION_CACHE_LOCAL_SIZE: int = 10000  # 进程内缓存的最大用户数
+    PERMISSION_CACHE_LOCAL_TTL: float = 60.0  # 进程内缓存过期时间（秒）
+    
+    # 密码哈希线程池配置（bcrypt 在专用线程池中执行，避免阻塞事件循环）
+    PASSWORD_HASH_WORKERS: int = 4  # 线程池大小
+    PASSWORD_HASH_MAX_PENDING: int = 256  # 最多等待中的任务数（超出后拒绝登录请求）
+    
+    # 认证上下文缓存配置
+    AUTH_CONTEXT_CACHE_SIZE: int = 10000  # 进程内缓存的最大用户数
+    AUTH_CONTEXT_CACHE_TTL: float = 10.0  # 进程内缓存过期时间（秒）
+    
+    # 产品依赖图缓存配置
+    PRODUCT_DEPENDENCY_GRAPH_KEY_PREFIX: str = "product_dependency:"  # 缓存键前缀（版本号键为 {前缀}version）
+    PRODUCT_DEPENDENCY_GRAPH_REDIS_TTL: int = 3600  # Redis 中依赖边列表的过期时间（秒）
+    PRODUCT_DEPENDENCY_GRAPH_LOCAL_TTL: float = 300.0  # 进程内依赖图过期时间（秒），Redis 不可用时限制陈旧时间
+    
+    # 产品价格簿缓存配置
+    PRICE_BOOK_KEY_PREFIX: str = "price_book:"  # 缓存键前缀（价格变更时递增 {前缀}version）
+    PRICE_BOOK_REDIS_TTL: int = 3600  # Redis 中价格记录的过期时间（秒）
+    PRICE_BOOK_LOCAL_TTL: float = 300.0  # 进程内价格簿过期时间（秒），Redis 不可用时限制陈旧时间
 
 
 settings = Settings()
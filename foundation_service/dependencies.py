@@ -8,9 +8,7 @@ from fastapi import Request, HTTPException, status, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from common.utils.logger import get_logger
 from foundation_service.database import get_db
-from foundation_service.repositories.organization_repository import OrganizationRepository
-from foundation_service.repositories.user_repository import UserRepository
-from foundation_service.repositories.organization_employee_repository import OrganizationEmployeeRepository
+from foundation_service.utils.auth_context import AuthContext, auth_context_cache
 from foundation_service.config import settings
 
 logger = get_logger(__name__)
@@ -120,6 +118,26 @@ async def get_database_session(
     return db
 
 
+async def get_auth_context(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+) -> Optional[AuthContext]:
+    """
+    获取当前用户的认证上下文（同一请求内最多构建一次）
+    
+    上下文同时保存在 request.state.auth_context 中；未认证或用户不存在时返回 None。
+    """
+    auth_context = getattr(request.state, "auth_context", None)
+    if auth_context is not None:
+        return auth_context
+    user_id = get_current_user_id(request)
+    if not user_id:
+        return None
+    auth_context = await auth_context_cache.get(db, user_id)
+    request.state.auth_context = auth_context
+    return auth_context
+
+
 async def require_bantu_admin(
     request: Request,
     db: AsyncSession = Depends(get_db)
@@ -132,31 +150,16 @@ async def require_bantu_admin(
             detail="需要认证"
         )
     
-    # 检查用户是否是 BANTU 的 admin
-    org_repo = OrganizationRepository(db)
-    user_repo = UserRepository(db)
-    employee_repo = OrganizationEmployeeRepository(db)
-    
-    # 获取 BANTU 组织
-    bantu_org = await org_repo.get_bantu_organization()
-    if not bantu_org:
+    # 检查 BANTU 组织是否存在
+    if not await auth_context_cache.get_bantu_organization_id(db):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="系统配置错误：BANTU 组织不存在"
         )
     
-    # 检查用户是否属于 BANTU 组织
-    bantu_employee = await employee_repo.get_primary_by_user_id(user_id)
-    if not bantu_employee or bantu_employee.organization_id != bantu_org.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="只有 BANTU 的 admin 用户可以创建组织"
-        )
-    
-    # 检查用户是否拥有 ADMIN 角色
-    user_roles = await user_repo.get_user_roles(user_id)
-    role_codes = [role.code for role in user_roles]
-    if "ADMIN" not in role_codes:
+    # 检查用户是否属于 BANTU 组织且拥有 ADMIN 角色
+    auth_context = await get_auth_context(request, db)
+    if not auth_context or not auth_context.is_bantu_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="只有 BANTU 的 admin 用户可以创建组织"
@@ -12,7 +12,7 @@ import json
 
 from common.schemas.response import Result
 from common.exceptions import BusinessException
-from common.utils.logger import Logger, get_logger
+from common.utils.logger import Logger, get_logger, cleanup_logger
 from common.redis_client import init_redis, get_redis
 from common.mongodb_client import init_mongodb
 from foundation_service.api.v1 import (
@@ -25,6 +25,13 @@ from foundation_service.api.v1 import (
 from foundation_service.api.v1.customer_levels import router as customer_levels_router
 from foundation_service.config import settings
 from foundation_service.utils.jwt import verify_token
+from foundation_service.utils.audit_writer import audit_writer
+from foundation_service.utils.last_login_writer import last_login_writer
+from foundation_service.utils.analytics_counters import analytics_counters
+from foundation_service.utils.analytics_rollup import analytics_daily_rollup
+from foundation_service.utils.price_book import get_product_price_book
+from foundation_service.utils.password import password_hasher
+from foundation_service.middleware.audit_routes import audit_route_table
 
 # 导入所有模型，确保它们被注册到 SQLAlchemy metadata 中
 from common.models import (
@@ -52,6 +59,9 @@ Logger.initialize(
     mongodb_username=settings.MONGO_USERNAME,
     mongodb_password=settings.MONGO_PASSWORD,
     mongodb_auth_source=settings.MONGO_AUTH_SOURCE,
+    mongodb_batch_size=settings.LOG_SINK_BATCH_SIZE,
+    mongodb_max_batch_bytes=settings.LOG_SINK_MAX_BATCH_BYTES,
+    mongodb_max_queue_size=settings.LOG_SINK_MAX_QUEUE_SIZE,
 )
 
 # 获取 logger
@@ -107,9 +117,51 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️ MongoDB 连接初始化失败: {str(e)}，日志查询功能将不可用")
     
+    # 根据已注册路由构建审计分类表，启动审计日志后台写入任务
+    audit_route_table.build(app.routes)
+    audit_writer.start()
+    
+    # 启动最后登录时间批量写入任务
+    last_login_writer.start()
+    
+    # 启动分析计数器（提交后增量 + 定期对账）
+    if settings.ANALYTICS_COUNTERS_ENABLED:
+        analytics_counters.start()
+    
+    # 启动每日分析汇总增量任务
+    if settings.ANALYTICS_ROLLUP_ENABLED:
+        analytics_daily_rollup.start()
+    
+    # 预加载产品价格簿
+    try:
+        from foundation_service.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            price_book = await get_product_price_book(db)
+        logger.info(f"✅ 产品价格簿已加载: {price_book.size} 条价格记录")
+    except Exception as e:
+        logger.warning(f"⚠️ 产品价格簿加载失败: {str(e)}，将在首次查询价格时加载")
+    
     yield
     # 关闭时执行
     logger.info("🛑 Foundation Service 关闭中...")
+    
+    # 写完队列中剩余的审计日志
+    await audit_writer.stop(timeout=settings.AUDIT_SHUTDOWN_TIMEOUT)
+    
+    # 写完剩余的最后登录时间
+    await last_login_writer.stop(timeout=settings.LAST_LOGIN_SHUTDOWN_TIMEOUT)
+    
+    # 停止分析计数对账任务，等待未完成的增量写入
+    await analytics_counters.stop(timeout=settings.ANALYTICS_COUNTERS_SHUTDOWN_TIMEOUT)
+    
+    # 停止每日分析汇总任务
+    await analytics_daily_rollup.stop(timeout=settings.ANALYTICS_ROLLUP_SHUTDOWN_TIMEOUT)
+    
+    # 关闭密码哈希线程池
+    password_hasher.shutdown()
+    
+    # 写完（或 spool）MongoDB 日志队列中剩余的日志
+    cleanup_logger()
 
 
 app = FastAPI(
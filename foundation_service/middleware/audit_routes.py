@@ -0,0 +1,195 @@
+"""
+审计路由分类表
+启动时根据 app.routes 预先计算每个路由模板对应的资源类型、资源ID参数名和操作分类，
+请求时通过已匹配的路由直接查表，不再对请求路径做字符串切分和逐项匹配。
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from starlette.routing import Route
+from starlette.types import Scope
+from common.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 路由前缀 -> 操作分类（按路由模板的路径段前缀匹配）
+CATEGORY_PREFIXES: List[Tuple[str, str]] = [
+    ("/api/foundation/users", "user_management"),
+    ("/api/foundation/organizations", "organization_management"),
+    ("/api/foundation/roles", "role_management"),
+    ("/api/foundation/permissions", "permission_management"),
+    ("/api/foundation/menus", "menu_management"),
+    ("/api/foundation/organization-domains", "organization_domain_management"),
+    ("/api/foundation/audit-logs", "audit_management"),
+    ("/api/foundation/auth", "authentication"),
+    ("/api/order-workflow/orders", "order_management"),
+    ("/api/order-workflow/order-items", "order_item_management"),
+    ("/api/order-workflow/order-comments", "order_comment_management"),
+    ("/api/order-workflow/order-files", "order_file_management"),
+    ("/api/order-workflow/leads", "lead_management"),
+    ("/api/order-workflow/opportunities", "opportunity_management"),
+    ("/api/order-workflow/collection-tasks", "collection_task_management"),
+    ("/api/order-workflow/temporary-links", "temporary_link_management"),
+    ("/api/order-workflow/notifications", "notification_management"),
+    ("/api/order-workflow/product-dependencies", "product_dependency_management"),
+    ("/api/service-management/customers", "customer_management"),
+    ("/api/service-management/contacts", "contact_management"),
+    ("/api/service-management/products", "product_management"),
+    ("/api/service-management/categories", "product_category_management"),
+    ("/api/service-management/service-types", "service_type_management"),
+    ("/api/service-management/service-records", "service_record_management"),
+    ("/api/service-management/industries", "industry_management"),
+    ("/api/service-management/customer-sources", "customer_source_management"),
+    ("/api/analytics-monitoring/analytics", "analytics"),
+    ("/api/analytics-monitoring/monitoring", "monitoring"),
+    ("/api/analytics-monitoring/logs", "log_management"),
+]
+
+# 路由模板中 API 前缀所占的路径段数（例如 /api/foundation）
+API_PREFIX_SEGMENTS = 2
+
+
+class RouteAuditInfo(NamedTuple):
+    """单个路由的审计分类信息"""
+    path: str
+    resource_type: Optional[str]
+    id_param: Optional[str]
+    category: Optional[str]
+
+
+def classify_route_path(path: str) -> RouteAuditInfo:
+    """
+    根据路由模板计算审计分类信息
+    
+    资源ID取模板中最后一个路径参数，资源类型取该参数之前最近的静态路径段；
+    没有路径参数时资源类型取 API 前缀后的第一个路径段（即路由挂载的资源）。
+    
+    Args:
+        path: 路由模板，例如 /api/foundation/users/{user_id}
+    
+    Returns:
+        RouteAuditInfo: 审计分类信息
+    """
+    segments = [segment for segment in path.strip("/").split("/") if segment]
+    resource_segments = segments[API_PREFIX_SEGMENTS:]
+    
+    param_indexes = [
+        index for index, segment in enumerate(resource_segments) if segment.startswith("{")
+    ]
+    id_param = None
+    resource_type = None
+    if param_indexes:
+        id_index = param_indexes[-1]
+        # 去掉 {name:converter} 中的转换器部分
+        id_param = resource_segments[id_index][1:-1].split(":", 1)[0]
+        for segment in reversed(resource_segments[:id_index]):
+            if not segment.startswith("{"):
+                resource_type = segment
+                break
+    elif resource_segments:
+        resource_type = resource_segments[0]
+    
+    category = None
+    for prefix, prefix_category in CATEGORY_PREFIXES:
+        if path == prefix or path.startswith(prefix + "/"):
+            category = prefix_category
+            break
+    
+    return RouteAuditInfo(
+        path=path,
+        resource_type=resource_type[:50] if resource_type else None,
+        id_param=id_param,
+        category=category,
+    )
+
+
+class AuditRouteTable:
+    """审计路由分类表（按路由对象和端点函数索引）"""
+    
+    def __init__(self):
+        self._by_path: Dict[str, RouteAuditInfo] = {}
+        self._by_endpoint: Dict[Any, List[Tuple[Optional[frozenset], frozenset, RouteAuditInfo]]] = {}
+        self._built = False
+    
+    @property
+    def is_built(self) -> bool:
+        """分类表是否已构建"""
+        return self._built
+    
+    def build(self, routes: Iterable[Any]) -> None:
+        """
+        根据应用路由构建分类表（应用启动时调用一次）
+        
+        Args:
+            routes: app.routes
+        """
+        by_path: Dict[str, RouteAuditInfo] = {}
+        by_endpoint: Dict[Any, List[Tuple[Optional[frozenset], frozenset, RouteAuditInfo]]] = {}
+        for route in routes:
+            if not isinstance(route, Route):
+                continue
+            info = by_path.get(route.path) or classify_route_path(route.path)
+            by_path[route.path] = info
+            methods = frozenset(route.methods) if route.methods else None
+            by_endpoint.setdefault(route.endpoint, []).append(
+                (methods, frozenset(route.param_convertors), info)
+            )
+        self._by_path = by_path
+        self._by_endpoint = by_endpoint
+        self._built = True
+        logger.info(f"审计路由分类表已构建: routes={len(by_path)}")
+    
+    def lookup(self, scope: Scope) -> Optional[RouteAuditInfo]:
+        """
+        查找已匹配路由的审计分类信息（需在路由匹配完成后调用）
+        
+        优先使用 scope["route"]；旧版 Starlette 未提供该字段时，
+        通过 scope["endpoint"] 与方法、路径参数名定位路由。
+        
+        Args:
+            scope: ASGI scope
+        
+        Returns:
+            RouteAuditInfo: 分类信息；未匹配到路由（例如 404）时返回 None
+        """
+        if not self._built and "app" in scope:
+            self.build(scope["app"].routes)
+        
+        route = scope.get("route")
+        if route is not None:
+            return self._by_path.get(getattr(route, "path", None))
+        
+        candidates = self._by_endpoint.get(scope.get("endpoint"))
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0][2]
+        
+        method = scope.get("method")
+        param_names = frozenset(scope.get("path_params", {}))
+        for methods, route_params, info in candidates:
+            if (methods is None or method in methods) and route_params == param_names:
+                return info
+        return candidates[0][2]
+    
+    def classify(self, scope: Scope) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        获取请求的资源类型、资源ID和操作分类
+        
+        Args:
+            scope: ASGI scope（路由匹配完成后）
+        
+        Returns:
+            (资源类型, 资源ID, 操作分类)
+        """
+        info = self.lookup(scope)
+        if info is None:
+            return None, None, None
+        resource_id = None
+        if info.id_param:
+            value = scope.get("path_params", {}).get(info.id_param)
+            if value is not None:
+                resource_id = str(value)[:36]
+        return info.resource_type, resource_id, info.category
+
+
+# 全局审计路由分类表
+audit_route_table = AuditRouteTable()
@@ -0,0 +1,197 @@
+"""
+每日分析汇总数据访问层
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, delete, insert, case, and_, Date
+from common.models.analytics_daily import AnalyticsDaily
+from common.models.customer import Customer
+from common.models.order import Order
+from common.utils.repository import BaseRepository
+
+# 计入收入的订单状态
+REVENUE_STATUS_CODES = ("completed",)
+
+
+class AnalyticsDailyRepository(BaseRepository[AnalyticsDaily]):
+    """每日分析汇总仓库"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, AnalyticsDaily)
+    
+    async def get_database_now(self) -> datetime:
+        """获取数据库当前时间（与 created_at / updated_at 使用同一时钟）"""
+        result = await self.db.execute(select(func.now()))
+        return result.scalar()
+    
+    async def get_watermark(self) -> Optional[datetime]:
+        """获取上一次重算的时间（汇总表为空时返回 None）"""
+        result = await self.db.execute(select(func.max(AnalyticsDaily.updated_at)))
+        return result.scalar()
+    
+    async def get_data_start_date(self) -> Optional[date]:
+        """获取最早的客户或订单创建日期（全量重建的起点），没有数据时返回 None"""
+        customer_result = await self.db.execute(select(func.min(Customer.created_at)))
+        order_result = await self.db.execute(select(func.min(Order.created_at)))
+        starts = [value for value in (customer_result.scalar(), order_result.scalar()) if value is not None]
+        return min(starts).date() if starts else None
+    
+    async def get_changed_dates(self, since: datetime) -> Set[date]:
+        """
+        获取自 since 以来新增或更新的客户、订单所在的创建日期
+        
+        Args:
+            since: 起始时间（上一次重算的时间）
+        
+        Returns:
+            需要重算的日期集合
+        """
+        dates: Set[date] = set()
+        for model in (Customer, Order):
+            result = await self.db.execute(
+                select(func.date(model.created_at, type_=Date)).where(model.updated_at >= since).distinct()
+            )
+            dates.update(value for value in result.scalars() if value is not None)
+        return dates
+    
+    async def get_customer_order_dates(self, customer_ids: Iterable[str]) -> Set[date]:
+        """
+        获取客户订单的创建日期（客户所属组织变更后需要重算这些日期）
+        
+        Args:
+            customer_ids: 客户ID列表
+        
+        Returns:
+            订单创建日期集合
+        """
+        customer_ids = list(customer_ids)
+        if not customer_ids:
+            return set()
+        result = await self.db.execute(
+            select(func.date(Order.created_at, type_=Date)).where(Order.customer_id.in_(customer_ids)).distinct()
+        )
+        return {value for value in result.scalars() if value is not None}
+    
+    async def rebuild_range(self, start_date: date, end_date: date, rebuilt_at: datetime) -> int:
+        """
+        重算日期范围内的汇总行（先删除后插入，调用方负责提交）
+        
+        Args:
+            start_date: 开始日期（包含）
+            end_date: 结束日期（包含）
+            rebuilt_at: 重算时间（写入 updated_at，作为下一次增量扫描的起点）
+        
+        Returns:
+            写入的汇总行数
+        """
+        start_at = datetime.combine(start_date, time.min)
+        end_at = datetime.combine(end_date + timedelta(days=1), time.min)
+        rows: Dict[Tuple[date, str, str], Dict[str, object]] = {}
+        
+        def row(stat_date: date, organization_id: Optional[str], currency_code: Optional[str]) -> Dict[str, object]:
+            key = (stat_date, organization_id or "", currency_code or "")
+            if key not in rows:
+                rows[key] = {
+                    "stat_date": key[0],
+                    "organization_id": key[1],
+                    "currency_code": key[2],
+                    "new_customers": 0,
+                    "order_count": 0,
+                    "order_amount": Decimal("0"),
+                    "revenue": Decimal("0"),
+                    "updated_at": rebuilt_at,
+                }
+            return rows[key]
+        
+        # 新增客户（按创建日期、所属组织）
+        customer_date = func.date(Customer.created_at, type_=Date)
+        customer_results = await self.db.execute(
+            select(
+                customer_date.label("stat_date"),
+                Customer.organization_id,
+                func.count(Customer.id).label("count")
+            ).where(
+                and_(Customer.created_at >= start_at, Customer.created_at < end_at)
+            ).group_by(customer_date, Customer.organization_id)
+        )
+        for result_row in customer_results:
+            row(result_row.stat_date, result_row.organization_id, None)["new_customers"] = result_row.count
+        
+        # 订单数、订单金额、收入（按创建日期、客户所属组织、货币）
+        order_date = func.date(Order.created_at, type_=Date)
+        amount = func.coalesce(Order.final_amount, Order.total_amount, 0)
+        order_results = await self.db.execute(
+            select(
+                order_date.label("stat_date"),
+                Customer.organization_id,
+                Order.currency_code,
+                func.count(Order.id).label("count"),
+                func.sum(amount).label("amount"),
+                func.sum(case((Order.status_code.in_(REVENUE_STATUS_CODES), amount), else_=0)).label("revenue")
+            ).join(
+                Customer, Customer.id == Order.customer_id
+            ).where(
+                and_(Order.created_at >= start_at, Order.created_at < end_at)
+            ).group_by(order_date, Customer.organization_id, Order.currency_code)
+        )
+        for result_row in order_results:
+            target = row(result_row.stat_date, result_row.organization_id, result_row.currency_code)
+            target["order_count"] = result_row.count
+            target["order_amount"] = Decimal(result_row.amount or 0)
+            target["revenue"] = Decimal(result_row.revenue or 0)
+        
+        await self.db.execute(
+            delete(AnalyticsDaily).where(
+                and_(AnalyticsDaily.stat_date >= start_date, AnalyticsDaily.stat_date <= end_date)
+            )
+        )
+        if rows:
+            await self.db.execute(insert(AnalyticsDaily), list(rows.values()))
+        return len(rows)
+    
+    async def clear(self) -> None:
+        """清空汇总表（调用方负责提交）"""
+        await self.db.execute(delete(AnalyticsDaily))
+    
+    async def get_daily_totals(
+        self,
+        start_date: date,
+        end_date: date,
+        organization_id: Optional[str] = None,
+        currency_code: Optional[str] = None,
+    ) -> List:
+        """
+        按日期、货币读取汇总值（汇总了各组织）
+        
+        Args:
+            start_date: 开始日期（包含）
+            end_date: 结束日期（包含）
+            organization_id: 组织ID（可选）
+            currency_code: 货币代码（可选）
+        
+        Returns:
+            行列表，字段：stat_date, currency_code, new_customers, order_count, order_amount, revenue
+        """
+        conditions = [AnalyticsDaily.stat_date >= start_date, AnalyticsDaily.stat_date <= end_date]
+        if organization_id:
+            conditions.append(AnalyticsDaily.organization_id == organization_id)
+        if currency_code:
+            conditions.append(AnalyticsDaily.currency_code == currency_code)
+        
+        result = await self.db.execute(
+            select(
+                AnalyticsDaily.stat_date,
+                AnalyticsDaily.currency_code,
+                func.sum(AnalyticsDaily.new_customers).label("new_customers"),
+                func.sum(AnalyticsDaily.order_count).label("order_count"),
+                func.sum(AnalyticsDaily.order_amount).label("order_amount"),
+                func.sum(AnalyticsDaily.revenue).label("revenue")
+            ).where(
+                and_(*conditions)
+            ).group_by(
+                AnalyticsDaily.stat_date, AnalyticsDaily.currency_code
+            ).order_by(AnalyticsDaily.stat_date)
+        )
+        return list(result)
@@ -4,8 +4,9 @@
 from typing import Optional, List, Tuple, Dict, Any
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc
+from sqlalchemy import select, func, and_, or_, desc, insert
 from common.models.audit_log import AuditLog
+from common.models.user import User
 from common.utils.repository import BaseRepository
 
 
@@ -85,6 +86,34 @@ class AuditRepository(BaseRepository[AuditLog]):
         
         return await self.create(audit_log)
     
+    async def bulk_create_audit_logs(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        批量写入审计日志（单条 INSERT 语句 executemany）
+        
+        未提供 user_name 的记录会通过一次 IN 查询补全用户名称。
+        
+        Args:
+            rows: 审计日志字段字典列表
+        
+        Returns:
+            int: 写入的记录数
+        """
+        if not rows:
+            return 0
+        
+        user_ids = {row["user_id"] for row in rows if row.get("user_id") and not row.get("user_name")}
+        if user_ids:
+            result = await self.db.execute(
+                select(User.id, User.display_name, User.username).where(User.id.in_(user_ids))
+            )
+            user_names = {row.id: row.display_name or row.username for row in result}
+            for row in rows:
+                if row.get("user_id") and not row.get("user_name"):
+                    row["user_name"] = user_names.get(row["user_id"])
+        
+        await self.db.execute(insert(AuditLog), rows)
+        return len(rows)
+    
     async def get_audit_logs(
         self,
         page: int = 1,
@@ -1,11 +1,11 @@
 """
 订单数据访问层
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
 from datetime import date
-from common.models import Order
+from common.models import Order, OrderItem, Customer, User
 from common.utils.repository import BaseRepository
 
 
@@ -67,6 +67,47 @@ class OrderRepository(BaseRepository[Order]):
         
         return list(orders), total
     
+    async def get_list_relations(
+        self,
+        orders: List[Order],
+    ) -> Tuple[Dict[str, List[OrderItem]], Dict[str, str], Dict[str, str]]:
+        """
+        批量查询订单列表的关联数据（整页固定三次查询，与页大小无关）
+        
+        Returns:
+            (订单ID -> 订单项列表, 客户ID -> 客户名称, 用户ID -> 用户名)
+        """
+        order_ids = [order.id for order in orders]
+        customer_ids = {order.customer_id for order in orders if order.customer_id}
+        sales_user_ids = {order.sales_user_id for order in orders if order.sales_user_id}
+        
+        items_by_order: Dict[str, List[OrderItem]] = {order_id: [] for order_id in order_ids}
+        if order_ids:
+            items_query = (
+                select(OrderItem)
+                .where(OrderItem.order_id.in_(order_ids))
+                .order_by(OrderItem.order_id, OrderItem.item_number)
+            )
+            items_result = await self.db.execute(items_query)
+            for item in items_result.scalars().all():
+                items_by_order[item.order_id].append(item)
+        
+        customer_names: Dict[str, str] = {}
+        if customer_ids:
+            customer_result = await self.db.execute(
+                select(Customer.id, Customer.name).where(Customer.id.in_(customer_ids))
+            )
+            customer_names = {row.id: row.name for row in customer_result}
+        
+        sales_usernames: Dict[str, str] = {}
+        if sales_user_ids:
+            user_result = await self.db.execute(
+                select(User.id, User.username).where(User.id.in_(sales_user_ids))
+            )
+            sales_usernames = {row.id: row.username for row in user_result}
+        
+        return items_by_order, customer_names, sales_usernames
+    
     async def get_by_customer_id(
         self,
         customer_id: str,
@@ -1,7 +1,7 @@
 """
 权限数据访问层
 """
-from typing import Optional, List
+from typing import Optional, List, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, delete
 from common.models.permission import Permission, RolePermission, Menu, MenuPermission
@@ -85,6 +85,24 @@ class RolePermissionRepository:
         )
         return list(result.scalars().all())
     
+    async def get_user_permission_codes(self, user_id: str) -> List[str]:
+        """获取用户的所有权限编码（通过角色，只查询编码列）"""
+        from common.models.user_role import UserRole
+        
+        result = await self.db.execute(
+            select(Permission.code)
+            .join(RolePermission, Permission.id == RolePermission.permission_id)
+            .join(UserRole, RolePermission.role_id == UserRole.role_id)
+            .where(
+                and_(
+                    UserRole.user_id == user_id,
+                    Permission.is_active == True
+                )
+            )
+            .distinct()
+        )
+        return [row[0] for row in result.all()]
+    
     async def assign_permissions_to_role(self, role_id: str, permission_ids: List[str]) -> None:
         """为角色分配权限"""
         # 删除旧权限
@@ -178,24 +196,39 @@ class MenuPermissionRepository:
         )
         return list(result.scalars().all())
     
-    async def get_user_menus(self, user_id: str) -> List[Menu]:
-        """获取用户可访问的菜单（根据权限过滤）"""
-        from common.models.user_role import UserRole
-        
-        # 获取用户的所有权限
+    async def get_permissions_by_menu(self) -> Dict[str, List[Permission]]:
+        """一次查询所有菜单关联的激活权限，按菜单ID分组"""
         result = await self.db.execute(
-            select(Permission.id)
-            .join(RolePermission, Permission.id == RolePermission.permission_id)
-            .join(UserRole, RolePermission.role_id == UserRole.role_id)
-            .where(
-                and_(
-                    UserRole.user_id == user_id,
-                    Permission.is_active == True
+            select(MenuPermission.menu_id, Permission)
+            .join(Permission, Permission.id == MenuPermission.permission_id)
+            .where(Permission.is_active == True)
+        )
+        permissions_by_menu: Dict[str, List[Permission]] = {}
+        for menu_id, permission in result.all():
+            permissions_by_menu.setdefault(menu_id, []).append(permission)
+        return permissions_by_menu
+    
+    async def get_role_menus(self, role_ids: List[str]) -> List[Menu]:
+        """
+        获取角色集合可访问的菜单（按 display_order 排序的扁平列表）
+        
+        菜单没有关联权限，或者角色集合拥有任一关联权限时可访问。
+        """
+        # 获取角色集合的所有权限
+        user_permission_ids = set()
+        if role_ids:
+            result = await self.db.execute(
+                select(Permission.id)
+                .join(RolePermission, Permission.id == RolePermission.permission_id)
+                .where(
+                    and_(
+                        RolePermission.role_id.in_(role_ids),
+                        Permission.is_active == True
+                    )
                 )
+                .distinct()
             )
-            .distinct()
-        )
-        user_permission_ids = {row[0] for row in result.all()}
+            user_permission_ids = {row[0] for row in result.all()}
         
         # 获取所有激活的菜单
         all_menus_result = await self.db.execute(
@@ -212,35 +245,20 @@ class MenuPermissionRepository:
         
         # 获取菜单权限关联
         menu_permissions_result = await self.db.execute(
-            select(MenuPermission)
+            select(MenuPermission.menu_id, MenuPermission.permission_id)
         )
-        menu_permissions_map = {}
-        for mp in menu_permissions_result.scalars().all():
-            if mp.menu_id not in menu_permissions_map:
-                menu_permissions_map[mp.menu_id] = []
-            menu_permissions_map[mp.menu_id].append(mp.permission_id)
+        menu_permissions_map: Dict[str, List[str]] = {}
+        for menu_id, permission_id in menu_permissions_result.all():
+            menu_permissions_map.setdefault(menu_id, []).append(permission_id)
         
-        # 过滤菜单：如果菜单没有关联权限，或者用户拥有任一关联权限，则显示
+        # 过滤菜单：如果菜单没有关联权限，或者拥有任一关联权限，则显示
         accessible_menus = []
         for menu in all_menus:
             required_permissions = menu_permissions_map.get(menu.id, [])
-            # 如果菜单没有关联权限，或者用户拥有任一关联权限，则显示
             if not required_permissions or any(pid in user_permission_ids for pid in required_permissions):
                 accessible_menus.append(menu)
         
-        # 构建菜单树（使用临时属性 _children）
-        menu_map = {menu.id: menu for menu in accessible_menus}
-        root_menus = []
-        for menu in accessible_menus:
-            if menu.parent_id and menu.parent_id in menu_map:
-                parent = menu_map[menu.parent_id]
-                if not hasattr(parent, '_children'):
-                    parent._children = []
-                parent._children.append(menu)
-            else:
-                root_menus.append(menu)
-        
-        return root_menus
+        return accessible_menus
     
     async def assign_permissions_to_menu(self, menu_id: str, permission_ids: List[str]) -> None:
         """为菜单分配权限"""
@@ -3,7 +3,7 @@
 """
 from typing import Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, literal
 from sqlalchemy.orm import joinedload
 from common.models.product_dependency import ProductDependency
 from common.utils.repository import BaseRepository
@@ -34,6 +34,16 @@ class ProductDependencyRepository(BaseRepository[ProductDependency]):
         result = await self.db.execute(query)
         return list(result.unique().scalars().all())
     
+    async def get_all_edges(self) -> List[Tuple[str, str, str]]:
+        """获取全部依赖边 (产品ID, 依赖的产品ID, 依赖类型)，按创建时间排序（用于构建内存依赖图）"""
+        query = select(
+            ProductDependency.product_id,
+            ProductDependency.depends_on_product_id,
+            ProductDependency.dependency_type
+        ).order_by(ProductDependency.created_at.asc(), ProductDependency.id.asc())
+        result = await self.db.execute(query)
+        return [tuple(row) for row in result.all()]
+    
     async def get_dependent_products(
         self, 
         product_id: str
@@ -102,43 +112,30 @@ class ProductDependencyRepository(BaseRepository[ProductDependency]):
         检查逻辑：
         1. 如果 A 依赖 B，则不能创建 B 依赖 A（直接循环）
         2. 如果 A 依赖 B，B 依赖 C，则不能创建 C 依赖 A（间接循环）
+        
+        即 depends_on_product_id 的依赖（直接或间接）中是否包含 product_id，
+        使用一条 WITH RECURSIVE 查询沿依赖边展开（UNION 去重，图中已有循环时也会终止）。
         """
-        # 检查直接循环：如果 depends_on_product_id 已经依赖 product_id，则存在循环
-        reverse_query = select(ProductDependency).where(
-            and_(
-                ProductDependency.product_id == depends_on_product_id,
-                ProductDependency.depends_on_product_id == product_id
-            )
-        )
-        reverse_result = await self.db.execute(reverse_query)
-        if reverse_result.scalar_one_or_none():
+        if product_id == depends_on_product_id:
             return True
         
-        # 检查间接循环：使用递归查询检查依赖链
-        # 如果 depends_on_product_id 的任何依赖（直接或间接）包含 product_id，则存在循环
-        visited = set()
-        to_check = [depends_on_product_id]
-        
-        while to_check:
-            current_product_id = to_check.pop(0)
-            if current_product_id == product_id:
-                return True
-            if current_product_id in visited:
-                continue
-            visited.add(current_product_id)
-            
-            # 查询当前产品依赖的所有产品
-            deps_query = select(ProductDependency).where(
-                ProductDependency.product_id == current_product_id
-            )
-            deps_result = await self.db.execute(deps_query)
-            deps = deps_result.scalars().all()
-            
-            for dep in deps:
-                if dep.depends_on_product_id not in visited:
-                    to_check.append(dep.depends_on_product_id)
-        
-        return False
+        reachable = (
+            select(ProductDependency.depends_on_product_id.label("product_id"))
+            .where(ProductDependency.product_id == depends_on_product_id)
+            .cte("reachable", recursive=True)
+        )
+        reachable = reachable.union(
+            select(ProductDependency.depends_on_product_id)
+            .join(reachable, ProductDependency.product_id == reachable.c.product_id)
+        )
+        query = (
+            select(literal(1))
+            .select_from(reachable)
+            .where(reachable.c.product_id == product_id)
+            .limit(1)
+        )
+        result = await self.db.execute(query)
+        return result.scalar() is not None
     
     async def get_by_product_pair(
         self,
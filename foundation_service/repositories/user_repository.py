@@ -1,10 +1,12 @@
 """
 用户数据访问层
 """
-from typing import Optional, List
+from datetime import datetime
+from typing import Dict, Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, and_
 from common.models.user import User
+from common.models.organization import Organization
 from common.models.organization_employee import OrganizationEmployee
 from common.models.user_role import UserRole
 from common.models.role import Role
@@ -85,3 +87,74 @@ class UserRepository(BaseRepository[User]):
             .where(UserRole.user_id == user_id)
         )
         return list(result.scalars().all())
+    
+    async def get_login_profile(
+        self, email: str
+    ) -> Optional[Tuple[User, Optional[Organization], List[str], List[str]]]:
+        """
+        一次查询加载登录所需的用户信息
+        
+        用户 LEFT JOIN 激活的组织员工记录（主要组织再关联组织表）和角色，
+        结果行数为 组织数 × 角色数，在内存中去重。
+        
+        Args:
+            email: 登录邮箱
+        
+        Returns:
+            (用户, 主要组织, 所有激活组织ID（主要组织在前）, 角色编码)；用户不存在时返回 None
+        """
+        result = await self.db.execute(
+            select(User, OrganizationEmployee.organization_id, Organization, Role.code)
+            .outerjoin(
+                OrganizationEmployee,
+                and_(
+                    OrganizationEmployee.user_id == User.id,
+                    OrganizationEmployee.is_active == True
+                )
+            )
+            .outerjoin(
+                Organization,
+                and_(
+                    Organization.id == OrganizationEmployee.organization_id,
+                    OrganizationEmployee.is_primary == True
+                )
+            )
+            .outerjoin(UserRole, UserRole.user_id == User.id)
+            .outerjoin(Role, Role.id == UserRole.role_id)
+            .where(User.email == email)
+            .order_by(OrganizationEmployee.is_primary.desc())
+        )
+        rows = result.all()
+        if not rows:
+            return None
+        
+        user = rows[0][0]
+        primary_organization = None
+        organization_ids: Dict[str, None] = {}
+        role_codes: Dict[str, None] = {}
+        for _, organization_id, organization, role_code in rows:
+            if organization_id:
+                organization_ids[organization_id] = None
+            if organization is not None and primary_organization is None:
+                primary_organization = organization
+            if role_code:
+                role_codes[role_code] = None
+        return user, primary_organization, list(organization_ids), list(role_codes)
+    
+    async def bulk_update_last_login(self, last_logins: Dict[str, datetime]) -> int:
+        """
+        批量更新最后登录时间
+        
+        Args:
+            last_logins: 用户ID -> 最后登录时间
+        
+        Returns:
+            更新的用户数
+        """
+        if not last_logins:
+            return 0
+        await self.db.execute(
+            update(User),
+            [{"id": user_id, "last_login_at": login_at} for user_id, login_at in last_logins.items()],
+        )
+        return len(last_logins)
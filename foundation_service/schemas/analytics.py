@@ -73,20 +73,42 @@ class OrderSummaryResponse(BaseModel):
         }
 
 
+class RevenueDataPoint(BaseModel):
+    """收入趋势数据点"""
+    date: str = Field(..., description="日期")
+    value: float = Field(..., description="收入（已完成订单的金额）")
+    order_count: int = Field(default=0, description="新增订单数")
+    order_amount: float = Field(default=0.0, description="新增订单金额")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "date": "2025-01",
+                "value": 20000.0,
+                "order_count": 12,
+                "order_amount": 26000.0
+            }
+        }
+
+
 class RevenueResponse(BaseModel):
     """收入统计"""
     period: str = Field(..., description="统计周期：day, week, month")
-    total: float = Field(..., description="总收入")
-    data: List[TrendDataPoint] = Field(default_factory=list, description="收入趋势数据")
+    total: float = Field(..., description="总收入（未指定货币时为各货币金额直接相加，请结合 by_currency 查看）")
+    currency_code: Optional[str] = Field(None, description="货币代码（未指定时汇总所有货币）")
+    by_currency: Dict[str, float] = Field(default_factory=dict, description="按货币统计的收入")
+    data: List[RevenueDataPoint] = Field(default_factory=list, description="收入趋势数据")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "period": "month",
                 "total": 50000.0,
+                "currency_code": "CNY",
+                "by_currency": {"CNY": 50000.0},
                 "data": [
-                    {"date": "2025-01", "value": 20000},
-                    {"date": "2025-02", "value": 30000}
+                    {"date": "2025-01", "value": 20000.0, "order_count": 12, "order_amount": 26000.0},
+                    {"date": "2025-02", "value": 30000.0, "order_count": 15, "order_amount": 31000.0}
                 ]
             }
         }
@@ -65,17 +65,21 @@ class LogQueryRequest(BaseModel):
     end_time: Optional[datetime] = Field(None, description="结束时间（ISO 8601 格式）")
     
     # 关键词搜索
-    keyword: Optional[str] = Field(None, description="关键词搜索（在 message 字段中搜索）")
+    keyword: Optional[str] = Field(None, description="关键词搜索（在 message 字段中搜索，普通英文单词/短语按整词匹配）")
     
     # 文件名过滤
-    file: Optional[str] = Field(None, description="文件名过滤（支持部分匹配）")
+    file: Optional[str] = Field(None, description="文件名过滤（支持部分匹配，以 ^ 开头为前缀匹配）")
     
     # 函数名过滤
-    function: Optional[str] = Field(None, description="函数名过滤（支持部分匹配）")
+    function: Optional[str] = Field(None, description="函数名过滤（支持部分匹配，以 ^ 开头为前缀匹配）")
     
     # 分页参数
     page: int = Field(1, ge=1, description="页码（从1开始）")
     page_size: int = Field(50, ge=1, le=500, description="每页数量（最大500）")
+    cursor: Optional[str] = Field(None, description="分页游标（上一页响应中的 next_cursor，传入后忽略 page 偏移）")
+    
+    # 计数模式
+    approximate_total: bool = Field(False, description="是否使用近似总数（无过滤条件时使用集合估算值，有过滤条件时计数到上限为止，结果短时缓存）")
     
     class Config:
         json_schema_extra = {
@@ -98,6 +102,8 @@ class LogQueryResponse(BaseModel):
     page: int = Field(..., description="当前页码")
     page_size: int = Field(..., description="每页数量")
     total_pages: int = Field(..., description="总页数")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（没有更多数据时为空）")
+    total_is_approximate: bool = Field(False, description="总记录数是否为估算值或计数上限")
     
     class Config:
         json_schema_extra = {
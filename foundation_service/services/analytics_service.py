@@ -1,10 +1,10 @@
 """
 数据分析服务
 """
-import json
 import time
-from typing import Dict, List, Optional, TypeVar, Type
-from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar, Type
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
 from pydantic import BaseModel
@@ -13,19 +13,63 @@ from foundation_service.schemas.analytics import (
     CustomerTrendResponse,
     TrendDataPoint,
     OrderSummaryResponse,
+    RevenueDataPoint,
     RevenueResponse,
     ServiceRecordStatisticsResponse,
     UserActivityResponse,
     OrganizationSummaryResponse,
 )
 from foundation_service.config import settings
+from foundation_service.repositories.analytics_daily_repository import AnalyticsDailyRepository
+from foundation_service.utils.single_flight_cache import SingleFlightCache
+from foundation_service.utils.analytics_counters import (
+    analytics_counters,
+    CUSTOMERS,
+    USERS,
+    ORGANIZATIONS,
+    SERVICE_RECORDS,
+)
 from common.utils.logger import get_logger
-from common.redis_client import get_redis
 
 logger = get_logger(__name__)
 
 T = TypeVar('T', bound=BaseModel)
 
+# 全局分析缓存实例（单飞计算 + 软/硬过期）
+analytics_cache = SingleFlightCache(
+    key_prefix=settings.CACHE_KEY_PREFIX,
+    soft_ttl=settings.CACHE_TTL,
+    hard_ttl=settings.CACHE_HARD_TTL,
+    lock_ttl=settings.CACHE_LOCK_TTL,
+    lock_wait=settings.CACHE_LOCK_WAIT,
+)
+
+# 趋势类统计未指定日期范围时的默认天数（截止到今天）
+_TREND_DEFAULT_DAYS = {"day": 30, "week": 7 * 12, "month": 365}
+
+
+def _resolve_trend_range(
+    period: str,
+    start_date: Optional[date],
+    end_date: Optional[date]
+) -> Tuple[str, date, date]:
+    """规范化统计周期（不支持的周期按 day 处理）并确定日期范围"""
+    if period not in _TREND_DEFAULT_DAYS:
+        period = "day"
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=_TREND_DEFAULT_DAYS[period] - 1)
+    return period, start_date, end_date
+
+
+def _bucket_label(day: date, period: str) -> str:
+    """日期所在统计区间的标签：day 为 YYYY-MM-DD，week 为 YYYY-Www（ISO 周），month 为 YYYY-MM"""
+    if period == "week":
+        iso_year, iso_week, _ = day.isocalendar()
+        return f"{iso_year}-W{iso_week:02d}"
+    if period == "month":
+        return day.strftime("%Y-%m")
+    return day.strftime("%Y-%m-%d")
+
 
 class AnalyticsService:
     """数据分析服务"""
@@ -33,157 +77,108 @@ class AnalyticsService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.cache_enabled = settings.CACHE_ENABLED
-        self.cache_ttl = settings.CACHE_TTL
-        self.cache_prefix = settings.CACHE_KEY_PREFIX
-    
-    def _get_cache_key(self, key: str) -> str:
-        """生成缓存键"""
-        return f"{self.cache_prefix}{key}"
     
-    async def _get_from_cache(self, key: str, model_class: Type[T]) -> Optional[T]:
+    async def _get_or_compute(
+        self,
+        key: str,
+        model_class: Type[T],
+        query: Callable[["AnalyticsService"], Awaitable[T]]
+    ) -> T:
         """
-        从缓存获取数据
+        从缓存获取数据，未命中时查询数据库
         
         查询逻辑：
-        1. 检查 Redis 是否有缓存
-        2. 有缓存 -> 直接返回缓存数据
-        3. 无缓存 -> 返回 None，由调用方查询数据库
+        1. 缓存未过期 -> 直接返回缓存数据
+        2. 缓存已软过期 -> 返回旧数据，后台使用独立会话刷新（同一时间只有一个进程刷新）
+        3. 无缓存或已硬过期 -> 查询数据库 -> 写入缓存 -> 返回结果
+           （并发请求只查询一次：进程内共享同一个查询，跨进程通过 Redis 锁等待）
         
         Args:
             key: 缓存键
             model_class: Pydantic 模型类
+            query: 查询函数，参数为 AnalyticsService 实例
         
         Returns:
-            模型实例或 None（无缓存时）
+            模型实例
         """
         if not self.cache_enabled:
-            logger.debug(f"[Cache] 缓存未启用，跳过缓存查询: {key}")
-            return None
-        
-        try:
-            redis = get_redis()
-            cache_key = self._get_cache_key(key)
-            cached_data = await redis.get(cache_key)
-            
-            if cached_data:
-                logger.info(f"[Cache] ✅ 缓存命中: {key}")
-                data_dict = json.loads(cached_data)
-                return model_class(**data_dict)
-            else:
-                logger.info(f"[Cache] ❌ 缓存未命中: {key}，将查询数据库")
-        except RuntimeError:
-            # Redis 未初始化，静默失败
-            logger.debug(f"[Cache] Redis 未初始化，跳过缓存查询: {key}")
-            pass
-        except Exception as e:
-            logger.warning(f"[Cache] 从缓存获取数据失败: {key}, 错误: {str(e)}")
-        
-        return None
+            logger.debug(f"[Cache] 缓存未启用，直接查询数据库: {key}")
+            return await query(self)
+        return await analytics_cache.get_or_compute(
+            key,
+            model_class,
+            compute=lambda: query(self),
+            refresh=lambda: self._query_in_new_session(query),
+        )
     
-    async def _set_to_cache(self, key: str, data: BaseModel):
+    async def _get_from_counters(
+        self,
+        group: str,
+        build: Callable[["AnalyticsService", Dict[str, int]], Awaitable[T]]
+    ) -> Optional[T]:
         """
-        将数据写入缓存
-        
-        查询逻辑：
-        1. 从数据库查询到数据后
-        2. 将数据写入 Redis 缓存
-        3. 设置过期时间为 5 分钟（300秒）
+        从分析计数器读取数据（O(1)，与表大小无关）
         
         Args:
-            key: 缓存键
-            data: Pydantic 模型实例
+            group: 计数分组
+            build: 根据计数构建响应的函数，参数为 AnalyticsService 实例和 {字段: 计数}
+        
+        Returns:
+            模型实例；计数器未启用、未对账或 Redis 不可用时返回 None，调用方回退到数据库统计
         """
-        if not self.cache_enabled:
-            logger.debug(f"[Cache] 缓存未启用，跳过缓存写入: {key}")
-            return
+        if not settings.ANALYTICS_COUNTERS_ENABLED:
+            return None
+        counters = await analytics_counters.get(group)
+        if counters is None:
+            logger.info(f"[Counters] 计数不可用，回退到数据库统计: {group}")
+            return None
+        return await build(self, counters)
+    
+    @staticmethod
+    def _breakdown(counters: Dict[str, int], prefix: str) -> Dict[str, int]:
+        """取出带前缀的分类计数（去掉计数为 0 的分类）"""
+        prefix = f"{prefix}:"
+        return {
+            field[len(prefix):]: count
+            for field, count in counters.items()
+            if field.startswith(prefix) and count > 0
+        }
+    
+    @staticmethod
+    async def _query_in_new_session(query: Callable[["AnalyticsService"], Awaitable[T]]) -> T:
+        """使用独立数据库会话执行查询（后台刷新时请求会话可能已关闭）"""
+        from foundation_service.database import AsyncSessionLocal
         
-        try:
-            redis = get_redis()
-            cache_key = self._get_cache_key(key)
-            data_json = json.dumps(data.model_dump(), ensure_ascii=False)
-            await redis.setex(cache_key, self.cache_ttl, data_json)
-            logger.info(f"[Cache] ✅ 数据已写入缓存: {key}, TTL={self.cache_ttl}秒（5分钟）")
-        except RuntimeError:
-            # Redis 未初始化，静默失败
-            logger.debug(f"[Cache] Redis 未初始化，跳过缓存写入: {key}")
-            pass
-        except Exception as e:
-            logger.warning(f"[Cache] 写入缓存失败: {key}, 错误: {str(e)}")
+        async with AsyncSessionLocal() as db:
+            return await query(AnalyticsService(db))
     
     async def get_customer_summary(self) -> CustomerSummaryResponse:
         """
         获取客户统计摘要
         
         查询逻辑：
-        1. 检查 Redis 缓存（5分钟过期）
-        2. 有缓存 -> 直接返回缓存数据
+        1. 读取分析计数器（增量维护，活跃客户数在对账时刷新）
+        2. 计数不可用 -> 检查 Redis 缓存（5分钟后软过期，软过期后返回旧数据并后台刷新）
         3. 无缓存 -> 查询数据库 -> 写入缓存 -> 返回结果
         """
         method_name = "get_customer_summary"
         start_time = time.time()
         logger.info(f"[Service] {method_name} - 方法调用开始")
         
-        # 步骤1: 检查 Redis 缓存
-        cache_key = "customers:summary"
-        cached_result = await self._get_from_cache(cache_key, CustomerSummaryResponse)
-        if cached_result:
-            # 有缓存，直接返回
-            elapsed_time = (time.time() - start_time) * 1000
-            logger.info(f"[Service] {method_name} - 方法调用完成（从缓存）| 耗时: {elapsed_time:.2f}ms")
-            return cached_result
-        
-        # 步骤2: 无缓存，查询数据库
-        logger.info(f"[Service] {method_name} - 缓存未命中，开始查询数据库")
         try:
-            # 导入模型（延迟导入避免循环依赖）
-            from common.models.customer import Customer
-            from common.models.service_record import ServiceRecord
-            
-            # 客户总数
-            total_query = select(func.count(Customer.id))
-            total_result = await self.db.execute(total_query)
-            total = total_result.scalar() or 0
-            
-            # 按类型统计
-            type_query = select(
-                Customer.customer_type,
-                func.count(Customer.id).label('count')
-            ).group_by(Customer.customer_type)
-            type_results = await self.db.execute(type_query)
-            by_type = {row.customer_type: row.count for row in type_results}
-            
-            # 按来源统计
-            source_query = select(
-                Customer.customer_source_type,
-                func.count(Customer.id).label('count')
-            ).group_by(Customer.customer_source_type)
-            source_results = await self.db.execute(source_query)
-            by_source = {row.customer_source_type: row.count for row in source_results}
-            
-            # 活跃客户数（最近30天有服务记录）
-            thirty_days_ago = datetime.now() - timedelta(days=30)
-            active_query = select(func.count(func.distinct(ServiceRecord.customer_id))).where(
-                ServiceRecord.created_at >= thirty_days_ago
+            result = await self._get_from_counters(
+                CUSTOMERS, AnalyticsService._customer_summary_from_counters
             )
-            active_result = await self.db.execute(active_query)
-            active_count = active_result.scalar() or 0
-            
-            result = CustomerSummaryResponse(
-                total=total,
-                by_type=by_type,
-                by_source=by_source,
-                active_count=active_count
-            )
-            
-            # 步骤3: 查询完成，写入缓存（5分钟过期）
-            await self._set_to_cache(cache_key, result)
+            if result is None:
+                result = await self._get_or_compute(
+                    "customers:summary", CustomerSummaryResponse, AnalyticsService._query_customer_summary
+                )
             
             elapsed_time = (time.time() - start_time) * 1000
             logger.info(
-                f"[Service] {method_name} - 方法调用成功（从数据库）| "
+                f"[Service] {method_name} - 方法调用成功 | "
                 f"耗时: {elapsed_time:.2f}ms | "
-                f"结果: total={result.total}, active_count={result.active_count} | "
-                f"已写入缓存，TTL=300秒（5分钟）"
+                f"结果: total={result.total}, active_count={result.active_count}"
             )
             
             return result
@@ -197,63 +192,91 @@ class AnalyticsService:
             )
             raise
     
-    async def get_customer_trend(self, period: str = "day") -> CustomerTrendResponse:
-        """获取客户增长趋势"""
+    async def _customer_summary_from_counters(self, counters: Dict[str, int]) -> CustomerSummaryResponse:
+        """根据分析计数构建客户统计摘要"""
+        return CustomerSummaryResponse(
+            total=counters.get("total", 0),
+            by_type=self._breakdown(counters, "type"),
+            by_source=self._breakdown(counters, "source"),
+            active_count=counters.get("active_count", 0)
+        )
+    
+    async def _query_customer_summary(self) -> CustomerSummaryResponse:
+        """从数据库查询客户统计摘要"""
+        # 导入模型（延迟导入避免循环依赖）
+        from common.models.customer import Customer
+        from common.models.service_record import ServiceRecord
+        
+        # 客户总数
+        total_query = select(func.count(Customer.id))
+        total_result = await self.db.execute(total_query)
+        total = total_result.scalar() or 0
+        
+        # 按类型统计
+        type_query = select(
+            Customer.customer_type,
+            func.count(Customer.id).label('count')
+        ).group_by(Customer.customer_type)
+        type_results = await self.db.execute(type_query)
+        by_type = {row.customer_type: row.count for row in type_results}
+        
+        # 按来源统计
+        source_query = select(
+            Customer.customer_source_type,
+            func.count(Customer.id).label('count')
+        ).group_by(Customer.customer_source_type)
+        source_results = await self.db.execute(source_query)
+        by_source = {row.customer_source_type: row.count for row in source_results}
+        
+        # 活跃客户数（最近30天有服务记录）
+        thirty_days_ago = datetime.now() - timedelta(days=30)
+        active_query = select(func.count(func.distinct(ServiceRecord.customer_id))).where(
+            ServiceRecord.created_at >= thirty_days_ago
+        )
+        active_result = await self.db.execute(active_query)
+        active_count = active_result.scalar() or 0
+        
+        return CustomerSummaryResponse(
+            total=total,
+            by_type=by_type,
+            by_source=by_source,
+            active_count=active_count
+        )
+    
+    async def get_customer_trend(
+        self,
+        period: str = "day",
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        organization_id: Optional[str] = None
+    ) -> CustomerTrendResponse:
+        """
+        获取客户增长趋势（读取每日汇总表，按周期重新分组）
+        
+        Args:
+            period: 统计周期：day, week, month
+            start_date: 开始日期（可选，默认按周期取最近一段时间）
+            end_date: 结束日期（可选，默认今天）
+            organization_id: 组织ID（可选）
+        """
         method_name = "get_customer_trend"
         start_time = time.time()
-        logger.info(f"[Service] {method_name} - 方法调用开始 | 参数: period={period}")
-        
-        # 尝试从缓存获取
-        cache_key = f"customers:trend:{period}"
-        cached_result = await self._get_from_cache(cache_key, CustomerTrendResponse)
-        if cached_result:
-            elapsed_time = (time.time() - start_time) * 1000
-            logger.info(f"[Service] {method_name} - 方法调用完成（从缓存）| 耗时: {elapsed_time:.2f}ms")
-            return cached_result
+        logger.info(
+            f"[Service] {method_name} - 方法调用开始 | "
+            f"参数: period={period}, start_date={start_date}, end_date={end_date}, "
+            f"organization_id={organization_id}"
+        )
         
         try:
-            try:
-                from common.models.customer import Customer
-            except ImportError:
-                logger.warning("无法导入 service_management 模型，返回空数据")
-                return CustomerTrendResponse(period=period, data=[])
-            
-            # 根据周期确定日期格式和天数
-            if period == "day":
-                days = 30
-                date_format = "%Y-%m-%d"
-            elif period == "week":
-                days = 12
-                date_format = "%Y-%W"
-            elif period == "month":
-                days = 12
-                date_format = "%Y-%m"
+            # 仅当没有筛选参数时使用缓存
+            if not start_date and not end_date and not organization_id:
+                result = await self._get_or_compute(
+                    f"customers:trend:{period}",
+                    CustomerTrendResponse,
+                    lambda service: service._query_customer_trend(period)
+                )
             else:
-                period = "day"
-                days = 30
-                date_format = "%Y-%m-%d"
-            
-            # 查询日期范围
-            start_date = datetime.now() - timedelta(days=days)
-            
-            # 按日期分组统计
-            trend_query = select(
-                func.date_format(Customer.created_at, date_format).label('date'),
-                func.count(Customer.id).label('count')
-            ).where(
-                Customer.created_at >= start_date
-            ).group_by('date').order_by('date')
-            
-            trend_results = await self.db.execute(trend_query)
-            data = [
-                TrendDataPoint(date=row.date, value=row.count)
-                for row in trend_results
-            ]
-            
-            result = CustomerTrendResponse(period=period, data=data)
-            
-            # 写入缓存
-            await self._set_to_cache(cache_key, result)
+                result = await self._query_customer_trend(period, start_date, end_date, organization_id)
             
             elapsed_time = (time.time() - start_time) * 1000
             logger.info(
@@ -273,6 +296,29 @@ class AnalyticsService:
             )
             raise
     
+    async def _query_customer_trend(
+        self,
+        period: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        organization_id: Optional[str] = None
+    ) -> CustomerTrendResponse:
+        """从每日汇总表查询客户增长趋势"""
+        period, start_date, end_date = _resolve_trend_range(period, start_date, end_date)
+        rows = await AnalyticsDailyRepository(self.db).get_daily_totals(
+            start_date, end_date, organization_id=organization_id
+        )
+        
+        # 汇总行按日期排序，按周期重新分组后区间顺序不变
+        buckets: Dict[str, int] = {}
+        for row in rows:
+            if row.new_customers:
+                label = _bucket_label(row.stat_date, period)
+                buckets[label] = buckets.get(label, 0) + int(row.new_customers)
+        
+        data = [TrendDataPoint(date=label, value=value) for label, value in buckets.items()]
+        return CustomerTrendResponse(period=period, data=data)
+    
     async def get_order_summary(
         self,
         start_date: datetime = None,
@@ -286,69 +332,14 @@ class AnalyticsService:
             f"参数: start_date={start_date}, end_date={end_date}"
         )
         
-        # 生成缓存键（包含日期参数）
-        date_key = ""
-        if start_date:
-            date_key += f":{start_date.date()}"
-        if end_date:
-            date_key += f":{end_date.date()}"
-        cache_key = f"orders:summary{date_key}"
-        
-        # 尝试从缓存获取（仅当没有日期参数时使用缓存）
-        if not start_date and not end_date:
-            cached_result = await self._get_from_cache(cache_key, OrderSummaryResponse)
-            if cached_result:
-                elapsed_time = (time.time() - start_time) * 1000
-                logger.info(f"[Service] {method_name} - 方法调用完成（从缓存）| 耗时: {elapsed_time:.2f}ms")
-                return cached_result
-        
         try:
-            from common.models.service_record import ServiceRecord
-            from common.models.service_type import ServiceType
-            
-            # 构建查询条件
-            conditions = []
-            if start_date:
-                conditions.append(ServiceRecord.created_at >= start_date)
-            if end_date:
-                conditions.append(ServiceRecord.created_at <= end_date)
-            
-            # 订单总数
-            total_query = select(func.count(ServiceRecord.id))
-            if conditions:
-                total_query = total_query.where(and_(*conditions))
-            total_result = await self.db.execute(total_query)
-            total = total_result.scalar() or 0
-            
-            # 按状态统计（简化处理，实际应该根据业务逻辑）
-            by_status = {}
-            
-            # 按服务类型统计
-            type_query = select(
-                ServiceType.name,
-                func.count(ServiceRecord.id).label('count')
-            ).join(
-                ServiceRecord, ServiceRecord.service_type_id == ServiceType.id
-            )
-            if conditions:
-                type_query = type_query.where(and_(*conditions))
-            type_query = type_query.group_by(ServiceType.name)
-            type_results = await self.db.execute(type_query)
-            by_service_type = {row.name: row.count for row in type_results}
-            
-            # 总收入（简化处理，实际应该从订单表或财务表查询）
-            total_revenue = 0.0
-            
-            result = OrderSummaryResponse(
-                total=total,
-                by_status=by_status,
-                by_service_type=by_service_type,
-                total_revenue=total_revenue
-            )
-            
-            # 仅当没有日期参数时写入缓存
+            # 仅当没有日期参数时使用缓存
             if not start_date and not end_date:
-                await self._set_to_cache(cache_key, result)
+                result = await self._get_or_compute(
+                    "orders:summary", OrderSummaryResponse, AnalyticsService._query_order_summary
+                )
+            else:
+                result = await self._query_order_summary(start_date, end_date)
             
             elapsed_time = (time.time() - start_time) * 1000
             logger.info(
@@ -368,29 +359,93 @@ class AnalyticsService:
             )
             raise
     
-    async def get_revenue(self, period: str = "month") -> RevenueResponse:
-        """获取收入统计"""
+    async def _query_order_summary(
+        self,
+        start_date: datetime = None,
+        end_date: datetime = None
+    ) -> OrderSummaryResponse:
+        """从数据库查询订单统计摘要"""
+        from common.models.service_record import ServiceRecord
+        from common.models.service_type import ServiceType
+        
+        # 构建查询条件
+        conditions = []
+        if start_date:
+            conditions.append(ServiceRecord.created_at >= start_date)
+        if end_date:
+            conditions.append(ServiceRecord.created_at <= end_date)
+        
+        # 订单总数
+        total_query = select(func.count(ServiceRecord.id))
+        if conditions:
+            total_query = total_query.where(and_(*conditions))
+        total_result = await self.db.execute(total_query)
+        total = total_result.scalar() or 0
+        
+        # 按状态统计（简化处理，实际应该根据业务逻辑）
+        by_status = {}
+        
+        # 按服务类型统计
+        type_query = select(
+            ServiceType.name,
+            func.count(ServiceRecord.id).label('count')
+        ).join(
+            ServiceRecord, ServiceRecord.service_type_id == ServiceType.id
+        )
+        if conditions:
+            type_query = type_query.where(and_(*conditions))
+        type_query = type_query.group_by(ServiceType.name)
+        type_results = await self.db.execute(type_query)
+        by_service_type = {row.name: row.count for row in type_results}
+        
+        # 总收入（简化处理，实际应该从订单表或财务表查询）
+        total_revenue = 0.0
+        
+        return OrderSummaryResponse(
+            total=total,
+            by_status=by_status,
+            by_service_type=by_service_type,
+            total_revenue=total_revenue
+        )
+    
+    async def get_revenue(
+        self,
+        period: str = "month",
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        currency_code: Optional[str] = None,
+        organization_id: Optional[str] = None
+    ) -> RevenueResponse:
+        """
+        获取收入统计（读取每日汇总表，按周期重新分组）
+        
+        Args:
+            period: 统计周期：day, week, month
+            start_date: 开始日期（可选，默认按周期取最近一段时间）
+            end_date: 结束日期（可选，默认今天）
+            currency_code: 货币代码（可选，未指定时汇总所有货币）
+            organization_id: 组织ID（可选）
+        """
         method_name = "get_revenue"
         start_time = time.time()
-        logger.info(f"[Service] {method_name} - 方法调用开始 | 参数: period={period}")
-        
-        # 尝试从缓存获取
-        cache_key = f"revenue:{period}"
-        cached_result = await self._get_from_cache(cache_key, RevenueResponse)
-        if cached_result:
-            elapsed_time = (time.time() - start_time) * 1000
-            logger.info(f"[Service] {method_name} - 方法调用完成（从缓存）| 耗时: {elapsed_time:.2f}ms")
-            return cached_result
+        logger.info(
+            f"[Service] {method_name} - 方法调用开始 | "
+            f"参数: period={period}, start_date={start_date}, end_date={end_date}, "
+            f"currency_code={currency_code}, organization_id={organization_id}"
+        )
         
         try:
-            # 简化实现，实际应该从订单或财务表查询
-            data = []
-            total = 0.0
-            
-            result = RevenueResponse(period=period, total=total, data=data)
-            
-            # 写入缓存
-            await self._set_to_cache(cache_key, result)
+            # 仅当没有筛选参数时使用缓存
+            if not start_date and not end_date and not currency_code and not organization_id:
+                result = await self._get_or_compute(
+                    f"revenue:{period}",
+                    RevenueResponse,
+                    lambda service: service._query_revenue(period)
+                )
+            else:
+                result = await self._query_revenue(
+                    period, start_date, end_date, currency_code, organization_id
+                )
             
             elapsed_time = (time.time() - start_time) * 1000
             logger.info(
@@ -410,53 +465,68 @@ class AnalyticsService:
             )
             raise
     
+    async def _query_revenue(
+        self,
+        period: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        currency_code: Optional[str] = None,
+        organization_id: Optional[str] = None
+    ) -> RevenueResponse:
+        """从每日汇总表查询收入统计"""
+        period, start_date, end_date = _resolve_trend_range(period, start_date, end_date)
+        rows = await AnalyticsDailyRepository(self.db).get_daily_totals(
+            start_date, end_date, organization_id=organization_id, currency_code=currency_code
+        )
+        
+        buckets: Dict[str, dict] = {}
+        by_currency: Dict[str, Decimal] = {}
+        for row in rows:
+            # 货币为空的行只有新增客户数
+            if not row.currency_code:
+                continue
+            label = _bucket_label(row.stat_date, period)
+            bucket = buckets.setdefault(
+                label, {"value": Decimal("0"), "order_count": 0, "order_amount": Decimal("0")}
+            )
+            bucket["value"] += Decimal(row.revenue or 0)
+            bucket["order_count"] += int(row.order_count or 0)
+            bucket["order_amount"] += Decimal(row.order_amount or 0)
+            by_currency[row.currency_code] = by_currency.get(row.currency_code, Decimal("0")) + Decimal(row.revenue or 0)
+        
+        data = [
+            RevenueDataPoint(
+                date=label,
+                value=float(bucket["value"]),
+                order_count=bucket["order_count"],
+                order_amount=float(bucket["order_amount"])
+            )
+            for label, bucket in buckets.items()
+        ]
+        return RevenueResponse(
+            period=period,
+            total=float(sum(by_currency.values(), Decimal("0"))),
+            currency_code=currency_code,
+            by_currency={code: float(amount) for code, amount in by_currency.items()},
+            data=data
+        )
+    
     async def get_service_record_statistics(self) -> ServiceRecordStatisticsResponse:
         """获取服务记录统计"""
         method_name = "get_service_record_statistics"
         start_time = time.time()
         logger.info(f"[Service] {method_name} - 方法调用开始")
         
-        # 尝试从缓存获取
-        cache_key = "service_records:statistics"
-        cached_result = await self._get_from_cache(cache_key, ServiceRecordStatisticsResponse)
-        if cached_result:
-            elapsed_time = (time.time() - start_time) * 1000
-            logger.info(f"[Service] {method_name} - 方法调用完成（从缓存）| 耗时: {elapsed_time:.2f}ms")
-            return cached_result
-        
         try:
-            from common.models.service_record import ServiceRecord
-            
-            # 总数
-            total_query = select(func.count(ServiceRecord.id))
-            total_result = await self.db.execute(total_query)
-            total = total_result.scalar() or 0
-            
-            # 按状态统计（简化处理）
-            by_status = {}
-            
-            # 按优先级统计（简化处理）
-            by_priority = {}
-            
-            # 按接单人员统计
-            assignee_query = select(
-                ServiceRecord.assigned_to_user_id,
-                func.count(ServiceRecord.id).label('count')
-            ).where(
-                ServiceRecord.assigned_to_user_id.isnot(None)
-            ).group_by(ServiceRecord.assigned_to_user_id)
-            assignee_results = await self.db.execute(assignee_query)
-            by_assignee = {str(row.assigned_to_user_id): row.count for row in assignee_results}
-            
-            result = ServiceRecordStatisticsResponse(
-                total=total,
-                by_status=by_status,
-                by_priority=by_priority,
-                by_assignee=by_assignee
+            result = await self._get_from_counters(
+                SERVICE_RECORDS, AnalyticsService._service_record_statistics_from_counters
             )
-            
-            # 写入缓存
-            await self._set_to_cache(cache_key, result)
+            if result is None:
+                result = await self._get_or_compute(
+                    "service_records:statistics",
+                    ServiceRecordStatisticsResponse,
+                    AnalyticsService._query_service_record_statistics
+                )
             
             elapsed_time = (time.time() - start_time) * 1000
             logger.info(
@@ -476,63 +546,62 @@ class AnalyticsService:
             )
             raise
     
+    async def _service_record_statistics_from_counters(
+        self,
+        counters: Dict[str, int]
+    ) -> ServiceRecordStatisticsResponse:
+        """根据分析计数构建服务记录统计"""
+        return ServiceRecordStatisticsResponse(
+            total=counters.get("total", 0),
+            by_status={},
+            by_priority={},
+            by_assignee=self._breakdown(counters, "assignee")
+        )
+    
+    async def _query_service_record_statistics(self) -> ServiceRecordStatisticsResponse:
+        """从数据库查询服务记录统计"""
+        from common.models.service_record import ServiceRecord
+        
+        # 总数
+        total_query = select(func.count(ServiceRecord.id))
+        total_result = await self.db.execute(total_query)
+        total = total_result.scalar() or 0
+        
+        # 按状态统计（简化处理）
+        by_status = {}
+        
+        # 按优先级统计（简化处理）
+        by_priority = {}
+        
+        # 按负责人员（销售）统计
+        assignee_query = select(
+            ServiceRecord.sales_user_id,
+            func.count(ServiceRecord.id).label('count')
+        ).where(
+            ServiceRecord.sales_user_id.isnot(None)
+        ).group_by(ServiceRecord.sales_user_id)
+        assignee_results = await self.db.execute(assignee_query)
+        by_assignee = {str(row.sales_user_id): row.count for row in assignee_results}
+        
+        return ServiceRecordStatisticsResponse(
+            total=total,
+            by_status=by_status,
+            by_priority=by_priority,
+            by_assignee=by_assignee
+        )
+    
     async def get_user_activity(self) -> UserActivityResponse:
         """获取用户活跃度统计"""
         method_name = "get_user_activity"
         start_time = time.time()
         logger.info(f"[Service] {method_name} - 方法调用开始")
         
-        # 尝试从缓存获取
-        cache_key = "users:activity"
-        cached_result = await self._get_from_cache(cache_key, UserActivityResponse)
-        if cached_result:
-            elapsed_time = (time.time() - start_time) * 1000
-            logger.info(f"[Service] {method_name} - 方法调用完成（从缓存）| 耗时: {elapsed_time:.2f}ms")
-            return cached_result
-        
         try:
-            from common.models.user import User
-            from common.models.user_role import UserRole
-            from common.models.role import Role
-            
-            # 用户总数
-            total_query = select(func.count(User.id))
-            total_result = await self.db.execute(total_query)
-            total_users = total_result.scalar() or 0
-            
-            # 活跃用户数（最近30天登录）
-            thirty_days_ago = datetime.now() - timedelta(days=30)
-            active_query = select(func.count(User.id)).where(
-                and_(
-                    User.last_login_at.isnot(None),
-                    User.last_login_at >= thirty_days_ago
+            result = await self._get_from_counters(USERS, AnalyticsService._user_activity_from_counters)
+            if result is None:
+                result = await self._get_or_compute(
+                    "users:activity", UserActivityResponse, AnalyticsService._query_user_activity
                 )
-            )
-            active_result = await self.db.execute(active_query)
-            active_users = active_result.scalar() or 0
-            
-            # 按角色统计
-            role_query = select(
-                Role.name,
-                func.count(func.distinct(UserRole.user_id)).label('count')
-            ).join(
-                UserRole, UserRole.role_id == Role.id
-            ).group_by(Role.name)
-            role_results = await self.db.execute(role_query)
-            by_role = {row.name: row.count for row in role_results}
-            
-            # 最后登录时间统计（简化处理）
-            last_login_stats = {}
-            
-            result = UserActivityResponse(
-                total_users=total_users,
-                active_users=active_users,
-                by_role=by_role,
-                last_login_stats=last_login_stats
-            )
-            
-            # 写入缓存
-            await self._set_to_cache(cache_key, result)
             
             elapsed_time = (time.time() - start_time) * 1000
             logger.info(
@@ -552,45 +621,84 @@ class AnalyticsService:
             )
             raise
     
+    async def _user_activity_from_counters(self, counters: Dict[str, int]) -> UserActivityResponse:
+        """根据分析计数构建用户活跃度统计（角色计数按角色ID保存，这里换成角色名称）"""
+        from common.models.role import Role
+        
+        by_role_id = self._breakdown(counters, "role")
+        by_role: Dict[str, int] = {}
+        if by_role_id:
+            role_results = await self.db.execute(
+                select(Role.id, Role.name).where(Role.id.in_(list(by_role_id)))
+            )
+            for row in role_results:
+                by_role[row.name] = by_role.get(row.name, 0) + by_role_id[row.id]
+        
+        return UserActivityResponse(
+            total_users=counters.get("total_users", 0),
+            active_users=counters.get("active_users", 0),
+            by_role=by_role,
+            last_login_stats={}
+        )
+    
+    async def _query_user_activity(self) -> UserActivityResponse:
+        """从数据库查询用户活跃度统计"""
+        from common.models.user import User
+        from common.models.user_role import UserRole
+        from common.models.role import Role
+        
+        # 用户总数
+        total_query = select(func.count(User.id))
+        total_result = await self.db.execute(total_query)
+        total_users = total_result.scalar() or 0
+        
+        # 活跃用户数（最近30天登录）
+        thirty_days_ago = datetime.now() - timedelta(days=30)
+        active_query = select(func.count(User.id)).where(
+            and_(
+                User.last_login_at.isnot(None),
+                User.last_login_at >= thirty_days_ago
+            )
+        )
+        active_result = await self.db.execute(active_query)
+        active_users = active_result.scalar() or 0
+        
+        # 按角色统计
+        role_query = select(
+            Role.name,
+            func.count(func.distinct(UserRole.user_id)).label('count')
+        ).join(
+            UserRole, UserRole.role_id == Role.id
+        ).group_by(Role.name)
+        role_results = await self.db.execute(role_query)
+        by_role = {row.name: row.count for row in role_results}
+        
+        # 最后登录时间统计（简化处理）
+        last_login_stats = {}
+        
+        return UserActivityResponse(
+            total_users=total_users,
+            active_users=active_users,
+            by_role=by_role,
+            last_login_stats=last_login_stats
+        )
+    
     async def get_organization_summary(self) -> OrganizationSummaryResponse:
         """获取组织统计摘要"""
         method_name = "get_organization_summary"
         start_time = time.time()
         logger.info(f"[Service] {method_name} - 方法调用开始")
         
-        # 尝试从缓存获取
-        cache_key = "organizations:summary"
-        cached_result = await self._get_from_cache(cache_key, OrganizationSummaryResponse)
-        if cached_result:
-            elapsed_time = (time.time() - start_time) * 1000
-            logger.info(f"[Service] {method_name} - 方法调用完成（从缓存）| 耗时: {elapsed_time:.2f}ms")
-            return cached_result
-        
         try:
-            from common.models.organization import Organization
-            from common.models.organization_employee import OrganizationEmployee
-            
-            # 组织总数
-            total_query = select(func.count(Organization.id))
-            total_result = await self.db.execute(total_query)
-            total = total_result.scalar() or 0
-            
-            # 员工总数
-            employee_query = select(func.count(OrganizationEmployee.id))
-            employee_result = await self.db.execute(employee_query)
-            total_employees = employee_result.scalar() or 0
-            
-            # 按类型统计（简化处理）
-            by_type = {}
-            
-            result = OrganizationSummaryResponse(
-                total=total,
-                total_employees=total_employees,
-                by_type=by_type
+            result = await self._get_from_counters(
+                ORGANIZATIONS, AnalyticsService._organization_summary_from_counters
             )
-            
-            # 写入缓存
-            await self._set_to_cache(cache_key, result)
+            if result is None:
+                result = await self._get_or_compute(
+                    "organizations:summary",
+                    OrganizationSummaryResponse,
+                    AnalyticsService._query_organization_summary
+                )
             
             elapsed_time = (time.time() - start_time) * 1000
             logger.info(
@@ -609,4 +717,77 @@ class AnalyticsService:
                 exc_info=True
             )
             raise
-
+    
+    async def _organization_summary_from_counters(
+        self,
+        counters: Dict[str, int]
+    ) -> OrganizationSummaryResponse:
+        """根据分析计数构建组织统计摘要"""
+        return OrganizationSummaryResponse(
+            total=counters.get("total", 0),
+            total_employees=counters.get("total_employees", 0),
+            by_type={}
+        )
+    
+    async def _query_organization_summary(self) -> OrganizationSummaryResponse:
+        """从数据库查询组织统计摘要"""
+        from common.models.organization import Organization
+        from common.models.organization_employee import OrganizationEmployee
+        
+        # 组织总数
+        total_query = select(func.count(Organization.id))
+        total_result = await self.db.execute(total_query)
+        total = total_result.scalar() or 0
+        
+        # 员工总数
+        employee_query = select(func.count(OrganizationEmployee.id))
+        employee_result = await self.db.execute(employee_query)
+        total_employees = employee_result.scalar() or 0
+        
+        # 按类型统计（简化处理）
+        by_type = {}
+        
+        return OrganizationSummaryResponse(
+            total=total,
+            total_employees=total_employees,
+            by_type=by_type
+        )
+    
+    async def compute_counters(self) -> Dict[str, Dict[str, int]]:
+        """
+        全表统计分析计数（对账时使用，字段与增量维护的字段一致）
+        
+        Returns:
+            {分组: {字段: 计数}}
+        """
+        from common.models.user_role import UserRole
+        
+        customers = await self._query_customer_summary()
+        customer_counters = {"total": customers.total, "active_count": customers.active_count}
+        customer_counters.update({f"type:{key}": count for key, count in customers.by_type.items() if key is not None})
+        customer_counters.update({f"source:{key}": count for key, count in customers.by_source.items() if key is not None})
+        
+        users = await self._query_user_activity()
+        user_counters = {"total_users": users.total_users, "active_users": users.active_users}
+        role_results = await self.db.execute(
+            select(UserRole.role_id, func.count(UserRole.user_id).label('count')).group_by(UserRole.role_id)
+        )
+        user_counters.update({f"role:{row.role_id}": row.count for row in role_results})
+        
+        organizations = await self._query_organization_summary()
+        
+        service_records = await self._query_service_record_statistics()
+        service_record_counters = {"total": service_records.total}
+        service_record_counters.update(
+            {f"assignee:{key}": count for key, count in service_records.by_assignee.items()}
+        )
+        
+        return {
+            CUSTOMERS: customer_counters,
+            USERS: user_counters,
+            ORGANIZATIONS: {
+                "total": organizations.total,
+                "total_employees": organizations.total_employees,
+            },
+            SERVICE_RECORDS: service_record_counters,
+        }
@@ -8,7 +8,8 @@ from foundation_service.repositories.user_repository import UserRepository
 from foundation_service.repositories.organization_repository import OrganizationRepository
 from foundation_service.repositories.organization_employee_repository import OrganizationEmployeeRepository
 from foundation_service.repositories.role_repository import RoleRepository
-from foundation_service.utils.password import verify_password
+from foundation_service.utils.password import password_hasher
+from foundation_service.utils.last_login_writer import last_login_writer
 from foundation_service.utils.jwt import create_access_token, create_refresh_token
 from common.models.user_role import UserRole
 from common.exceptions import (
@@ -32,22 +33,17 @@ class AuthService:
     
     async def login(self, request: LoginRequest) -> LoginResponse:
         """用户登录（邮箱+密码）"""
-        # 1. 查询用户（仅支持邮箱登录）
-        user = await self.user_repo.get_by_email(request.email)
-        if not user:
+        # 1. 一次查询加载用户、主要组织、所有激活组织和角色（仅支持邮箱登录）
+        profile = await self.user_repo.get_login_profile(request.email)
+        if not profile:
             raise UserNotFoundError()
+        user, organization, organization_ids, role_codes = profile
         
         # 2. 验证密码
-        if not user.password_hash or not verify_password(request.password, user.password_hash):
+        if not user.password_hash or not await password_hasher.verify(request.password, user.password_hash):
             raise PasswordIncorrectError()
         
-        # 3. 查询用户的主要组织
-        primary_employee = await self.employee_repo.get_primary_by_user_id(user.id)
-        if not primary_employee:
-            raise OrganizationNotFoundError()
-        
-        # 4. 检查组织状态
-        organization = await self.org_repo.get_by_id(primary_employee.organization_id)
+        # 3. 检查主要组织及其状态
         if not organization:
             raise OrganizationNotFoundError()
         
@@ -60,27 +56,19 @@ class AuthService:
         if not organization.is_active:
             raise OrganizationInactiveError()
         
-        # 5. 查询用户的所有激活的组织（用于前端缓存）
-        all_employees = await self.employee_repo.get_all_by_user_id(user.id)
-        organization_ids = [emp.organization_id for emp in all_employees]
-        
-        # 6. 检查用户是否被锁定
+        # 4. 检查用户是否被锁定
         if user.is_locked:
             logger.warning(f"用户已锁定，无法登录: user_id={user.id}, email={request.email}")
             raise UserInactiveError()
         
-        # 7. 检查用户是否激活
+        # 5. 检查用户是否激活
         if not user.is_active:
             raise UserInactiveError()
         
-        # 8. 查询用户角色
-        roles = await self.user_repo.get_user_roles(user.id)
-        role_codes = [role.code for role in roles]
-        
-        # 9. 查询权限列表（简化处理，从配置获取）
+        # 6. 查询权限列表（简化处理，从配置获取）
         permissions = self._get_permissions_by_roles(role_codes)
         
-        # 10. 生成 JWT Token（包含主要组织ID，用于快速访问）
+        # 7. 生成 JWT Token（包含主要组织ID，用于快速访问）
         token_data = {
             "user_id": user.id,
             "username": user.username,
@@ -93,11 +81,13 @@ class AuthService:
         token = create_access_token(token_data)
         refresh_token = create_refresh_token(token_data)
         
-        # 11. 更新最后登录时间
-        user.last_login_at = datetime.utcnow()
-        await self.user_repo.update(user)
+        # 8. 更新最后登录时间（由后台任务批量写入；写入器不可用时直接更新）
+        login_at = datetime.utcnow()
+        if not last_login_writer.record(user.id, login_at):
+            user.last_login_at = login_at
+            await self.user_repo.update(user)
         
-        # 12. 构建响应（包含所有组织ID，供前端缓存）
+        # 9. 构建响应（包含所有组织ID，供前端缓存）
         user_info = UserInfo(
             id=user.id,
             username=user.username,
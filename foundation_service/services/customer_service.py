@@ -1,7 +1,7 @@
 """
 客户服务
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from foundation_service.schemas.customer import (
@@ -251,10 +251,11 @@ class CustomerService:
             is_locked=is_locked,
         )
         
-        # 转换为响应格式
-        customer_responses = []
-        for customer in items:
-            customer_responses.append(await self._to_response(customer))
+        # 转换为响应格式（整页关联数据批量加载，查询次数与页大小无关）
+        relations = await self._load_relations(items)
+        customer_responses = [
+            await self._to_response(customer, relations) for customer in items
+        ]
         
         logger.debug(f"客户列表查询成功: total={total}, page={page}, size={size}, returned={len(customer_responses)}")
         return CustomerListResponse(
@@ -264,82 +265,95 @@ class CustomerService:
             size=size,
         )
     
-    async def _to_response(self, customer: Customer) -> CustomerResponse:
-        """转换为响应格式"""
-        # 获取关联数据
-        parent_customer_name = None
-        if customer.parent_customer_id:
-            parent = await self.customer_repo.get_by_id(customer.parent_customer_id)
-            if parent:
-                parent_customer_name = parent.name
+    async def _load_relations(self, customers: List[Customer]) -> Dict[str, Dict]:
+        """
+        批量加载客户关联数据
         
-        # 获取客户等级双语名称
-        level_name_zh = None
-        level_name_id = None
-        if customer.level:
-            stmt = select(CustomerLevel).where(CustomerLevel.code == customer.level)
-            result = await self.db.execute(stmt)
-            level = result.scalar_one_or_none()
-            if level:
-                level_name_zh = level.name_zh
-                level_name_id = level.name_id
+        收集整页客户的外键，每张关联表只执行一次 IN (...) 查询，
+        返回按外键索引的名称映射，供 _to_response 直接查表使用。
+        """
+        parent_ids = {c.parent_customer_id for c in customers if c.parent_customer_id}
+        level_codes = {c.level for c in customers if c.level}
+        industry_ids = {c.industry_id for c in customers if c.industry_id}
+        owner_ids = {c.owner_user_id for c in customers if c.owner_user_id}
+        source_ids = {c.source_id for c in customers if c.source_id}
+        channel_ids = {c.channel_id for c in customers if c.channel_id}
+        agent_ids = {c.agent_id for c in customers if c.agent_id}
         
-        # 获取行业双语名称
-        industry_name_zh = None
-        industry_name_id = None
-        if customer.industry_id:
-            stmt = select(Industry).where(Industry.id == customer.industry_id)
-            result = await self.db.execute(stmt)
-            industry = result.scalar_one_or_none()
-            if industry:
-                industry_name_zh = industry.name_zh
-                industry_name_id = industry.name_id
+        relations: Dict[str, Dict] = {
+            "parents": {},
+            "levels": {},
+            "industries": {},
+            "owners": {},
+            "sources": {},
+            "channels": {},
+            "agents": {},
+        }
         
-        # 获取 owner_user_name
-        owner_user_name = None
-        if customer.owner_user_id:
-            stmt = select(User).where(User.id == customer.owner_user_id)
-            result = await self.db.execute(stmt)
-            user = result.scalar_one_or_none()
-            if user:
-                # 优先使用 display_name，如果没有则使用 username
-                owner_user_name = user.display_name or user.username
+        if parent_ids:
+            result = await self.db.execute(
+                select(Customer.id, Customer.name).where(Customer.id.in_(parent_ids))
+            )
+            relations["parents"] = {row.id: row.name for row in result}
+        
+        if level_codes:
+            result = await self.db.execute(
+                select(CustomerLevel.code, CustomerLevel.name_zh, CustomerLevel.name_id)
+                .where(CustomerLevel.code.in_(level_codes))
+            )
+            relations["levels"] = {row.code: (row.name_zh, row.name_id) for row in result}
+        
+        if industry_ids:
+            result = await self.db.execute(
+                select(Industry.id, Industry.name_zh, Industry.name_id)
+                .where(Industry.id.in_(industry_ids))
+            )
+            relations["industries"] = {row.id: (row.name_zh, row.name_id) for row in result}
+        
+        if owner_ids:
+            result = await self.db.execute(
+                select(User.id, User.display_name, User.username).where(User.id.in_(owner_ids))
+            )
+            # 优先使用 display_name，如果没有则使用 username
+            relations["owners"] = {row.id: row.display_name or row.username for row in result}
         
-        # 获取 source_name（客户来源名称）
-        source_name = None
-        if customer.source_id:
+        if source_ids:
             # 只选择实际存在的列，避免查询不存在的 name_zh 和 name_id 字段
-            source_query = select(
-                CustomerSource.id,
-                CustomerSource.code,
-                CustomerSource.name,
-                CustomerSource.description,
-                CustomerSource.display_order,
-                CustomerSource.is_active
-            ).where(CustomerSource.id == customer.source_id)
-            source_result = await self.db.execute(source_query)
-            source_row = source_result.first()
-            if source_row:
-                # 使用 name 字段（数据库表中实际存在的字段）
-                source_name = source_row.name
+            result = await self.db.execute(
+                select(CustomerSource.id, CustomerSource.name).where(CustomerSource.id.in_(source_ids))
+            )
+            relations["sources"] = {row.id: row.name for row in result}
         
-        # 获取 channel_name（客户渠道名称）
-        channel_name = None
-        if customer.channel_id:
-            channel_query = select(CustomerChannel).where(CustomerChannel.id == customer.channel_id)
-            channel_result = await self.db.execute(channel_query)
-            channel = channel_result.scalar_one_or_none()
-            if channel:
-                channel_name = channel.name
+        if channel_ids:
+            result = await self.db.execute(
+                select(CustomerChannel.id, CustomerChannel.name).where(CustomerChannel.id.in_(channel_ids))
+            )
+            relations["channels"] = {row.id: row.name for row in result}
+        
+        if agent_ids:
+            result = await self.db.execute(
+                select(Organization.id, Organization.name).where(Organization.id.in_(agent_ids))
+            )
+            relations["agents"] = {row.id: row.name for row in result}
+        
+        return relations
+    
+    async def _to_response(
+        self,
+        customer: Customer,
+        relations: Optional[Dict[str, Dict]] = None,
+    ) -> CustomerResponse:
+        """转换为响应格式（relations 为空时单独加载该客户的关联数据）"""
+        if relations is None:
+            relations = await self._load_relations([customer])
         
-        # 获取 agent_name（渠道组织名称）
-        agent_name = None
-        if customer.agent_id:
-            agent_query = select(Organization).where(Organization.id == customer.agent_id)
-            agent_result = await self.db.execute(agent_query)
-            agent = agent_result.scalar_one_or_none()
-            if agent:
-                agent_name = agent.name
+        parent_customer_name = relations["parents"].get(customer.parent_customer_id)
+        level_name_zh, level_name_id = relations["levels"].get(customer.level, (None, None))
+        industry_name_zh, industry_name_id = relations["industries"].get(customer.industry_id, (None, None))
+        owner_user_name = relations["owners"].get(customer.owner_user_id)
+        source_name = relations["sources"].get(customer.source_id)
+        channel_name = relations["channels"].get(customer.channel_id)
+        agent_name = relations["agents"].get(customer.agent_id)
         
         return CustomerResponse(
             id=customer.id,
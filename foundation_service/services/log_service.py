@@ -1,14 +1,24 @@
 """
 日志查询服务
 """
-from typing import Optional, List, Dict, Any
+import asyncio
+import base64
+import hashlib
+import heapq
+import json
+import re
+from itertools import islice
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorCollection
 from bson import ObjectId
+from bson.errors import InvalidId
 from bson.regex import Regex
+from pymongo.errors import OperationFailure
 
 from common.utils.logger import get_logger
 from common.mongodb_client import get_mongodb, init_mongodb
+from common.redis_client import get_redis
 from foundation_service.schemas.log import (
     LogEntryResponse,
     LogQueryRequest,
@@ -19,6 +29,16 @@ from foundation_service.config import settings
 
 logger = get_logger(__name__)
 
+# 可以直接使用 $text 短语搜索的关键词：仅由 ASCII 单词（字母、数字、下划线）和空格/连字符组成。
+# 含正则元字符或中文等非 ASCII 字符时仍使用正则匹配（文本索引按单词切分，无法做子串匹配）
+TEXT_SEARCH_KEYWORD_PATTERN = re.compile(r"[A-Za-z0-9_]+(?:[\s\-]+[A-Za-z0-9_]+)*")
+
+# 可以转换为锚定前缀匹配的文件名/函数名过滤：以 ^ 开头且其余部分只包含路径/标识符字符
+PREFIX_FILTER_PATTERN = re.compile(r"\^([\w./\-]+)")
+
+# 集合缺少文本索引时 $text 查询返回的错误码（IndexNotFound）
+TEXT_INDEX_NOT_FOUND_CODE = 27
+
 
 class LogService:
     """日志查询服务"""
@@ -49,30 +69,6 @@ class LogService:
                 logger.error(f"MongoDB 连接初始化失败: {str(e)}")
                 raise
     
-    def _get_log_collections(self, services: Optional[List[str]] = None) -> List[AsyncIOMotorCollection]:
-        """
-        获取日志集合列表
-        
-        Args:
-            services: 服务名称列表，如果为 None 则查询所有服务的日志
-        
-        Returns:
-            日志集合列表
-        """
-        if services:
-            # 查询指定服务的日志集合
-            collections = []
-            for service in services:
-                collection_name = f"logs_{service}"
-                collection = self.db[collection_name]
-                collections.append(collection)
-            return collections
-        else:
-            # 查询所有日志集合（以 logs_ 开头的集合）
-            # 注意：MongoDB 不直接支持通配符查询集合名，需要先列出所有集合
-            # 这里我们返回一个特殊的标记，表示需要查询所有集合
-            return None
-    
     async def _list_log_collections(self) -> List[str]:
         """
         列出所有日志集合名称
@@ -97,11 +93,18 @@ class LogService:
         """
         查询日志
         
+        各集合按 (timestamp, _id) 倒序并发查询，再通过堆进行 k 路归并。
+        传入 cursor 时使用键集分页（只取游标之后的 page_size 条），
+        否则按 page 偏移分页（每个集合最多取 page * page_size 条）。
+        
         Args:
             query: 查询请求
         
         Returns:
             日志查询响应
+        
+        Raises:
+            ValueError: 分页游标无效
         """
         if self.db is None:
             raise RuntimeError("MongoDB 连接未初始化")
@@ -112,97 +115,247 @@ class LogService:
             
             # 确定要查询的集合
             if query.services:
-                collections = self._get_log_collections(query.services)
-                all_logs = []
-                total = 0
-                
-                # 分别查询每个集合
-                for collection in collections:
-                    # 计算总数
-                    count = await collection.count_documents(filter_conditions)
-                    total += count
-                    
-                    # 查询日志（倒序，最新的在前）
-                    cursor = collection.find(
-                        filter_conditions
-                    ).sort("timestamp", -1).skip(
-                        (query.page - 1) * query.page_size
-                    ).limit(query.page_size)
-                    
-                    async for doc in cursor:
-                        all_logs.append(self._doc_to_log_entry(doc))
-                
-                # 按时间戳倒序排序（跨集合合并）
-                all_logs.sort(key=lambda x: x.timestamp, reverse=True)
-                
-                # 分页处理（因为跨集合查询，需要手动分页）
-                start_idx = (query.page - 1) * query.page_size
-                end_idx = start_idx + query.page_size
-                paginated_logs = all_logs[start_idx:end_idx]
-                
-                total_pages = (total + query.page_size - 1) // query.page_size
-                
+                collection_names = [f"logs_{service}" for service in query.services]
             else:
-                # 查询所有服务的日志
-                log_collections = await self._list_log_collections()
-                
-                if not log_collections:
-                    return LogQueryResponse(
-                        logs=[],
-                        total=0,
-                        page=query.page,
-                        page_size=query.page_size,
-                        total_pages=0
-                    )
-                
-                all_logs = []
-                total = 0
-                
-                # 分别查询每个集合
-                for collection_name in log_collections:
-                    collection = self.db[collection_name]
-                    
-                    # 计算总数
-                    count = await collection.count_documents(filter_conditions)
-                    total += count
-                    
-                    # 查询日志（倒序，最新的在前）
-                    cursor = collection.find(
-                        filter_conditions
-                    ).sort("timestamp", -1).limit(1000)  # 每个集合最多取1000条，避免内存溢出
-                    
-                    async for doc in cursor:
-                        all_logs.append(self._doc_to_log_entry(doc))
-                
-                # 按时间戳倒序排序（跨集合合并）
-                all_logs.sort(key=lambda x: x.timestamp, reverse=True)
-                
-                # 分页处理
-                start_idx = (query.page - 1) * query.page_size
-                end_idx = start_idx + query.page_size
-                paginated_logs = all_logs[start_idx:end_idx]
-                
-                total_pages = (len(all_logs) + query.page_size - 1) // query.page_size
-                total = len(all_logs)  # 使用实际查询到的数量
+                collection_names = await self._list_log_collections()
             
-            return LogQueryResponse(
-                logs=paginated_logs,
-                total=total,
-                page=query.page,
-                page_size=query.page_size,
-                total_pages=total_pages
-            )
+            if not collection_names:
+                return LogQueryResponse(
+                    logs=[],
+                    total=0,
+                    page=query.page,
+                    page_size=query.page_size,
+                    total_pages=0
+                )
+            
+            try:
+                return await self._query_collections(collection_names, query, filter_conditions)
+            except OperationFailure as e:
+                # 旧集合尚未创建 message 文本索引时，关键词搜索回退为正则匹配
+                if e.code != TEXT_INDEX_NOT_FOUND_CODE or "$text" not in filter_conditions:
+                    raise
+                logger.warning(f"日志集合缺少 message 文本索引，关键词搜索回退为正则匹配: {str(e)}")
+                filter_conditions = self._build_filter(query, use_text_search=False)
+                return await self._query_collections(collection_names, query, filter_conditions)
             
         except Exception as e:
             logger.error(f"查询日志失败: {str(e)}", exc_info=True)
             raise
     
-    def _build_filter(self, query: LogQueryRequest) -> Dict[str, Any]:
+    async def _query_collections(
+        self,
+        collection_names: List[str],
+        query: LogQueryRequest,
+        filter_conditions: Dict[str, Any],
+    ) -> LogQueryResponse:
+        """
+        在指定集合上执行计数和分页查询并归并结果
+        
+        每个集合的分页查询条件都加上 service 等值条件（集合 logs_xxx 只保存服务 xxx 的日志），
+        使 (service, level, timestamp) 复合索引可以同时用于过滤和排序；
+        计数只使用用户的查询条件（service 条件对本集合恒为真），无过滤条件时可以使用元数据估算。
+        
+        Args:
+            collection_names: 日志集合名称列表
+            query: 查询请求
+            filter_conditions: 查询条件（不含 service 和分页条件）
+        
+        Returns:
+            日志查询响应
+        """
+        # 键集分页：只查询游标位置之后的记录，深分页与第一页代价相同
+        keyset_condition: Dict[str, Any] = {}
+        skip = (query.page - 1) * query.page_size
+        if query.cursor:
+            cursor_timestamp, cursor_id = self._decode_cursor(query.cursor)
+            keyset_condition = {
+                "$or": [
+                    {"timestamp": {"$lt": cursor_timestamp}},
+                    {"timestamp": cursor_timestamp, "_id": {"$lt": cursor_id}},
+                ]
+            }
+            skip = 0
+        fetch_limit = skip + query.page_size
+        
+        collections = [self.db[name] for name in collection_names]
+        collection_filters = [
+            {"service": self._service_from_collection(name), **filter_conditions}
+            for name in collection_names
+        ]
+        
+        # 并发查询各集合的计数和候选记录
+        count_results, per_collection_docs = await asyncio.gather(
+            asyncio.gather(*(
+                self._count_logs(collection, filter_conditions, query.approximate_total)
+                for collection in collections
+            )),
+            asyncio.gather(*(
+                self._fetch_sorted(collection, {**collection_filter, **keyset_condition}, fetch_limit)
+                for collection, collection_filter in zip(collections, collection_filters)
+            )),
+        )
+        total = sum(count for count, _ in count_results)
+        total_is_approximate = any(approximate for _, approximate in count_results)
+        
+        # k 路归并（各集合结果已按 (timestamp, _id) 倒序）
+        merged = heapq.merge(*per_collection_docs, key=self._sort_key, reverse=True)
+        page_docs = list(islice(merged, skip, skip + query.page_size))
+        
+        next_cursor = None
+        if len(page_docs) == query.page_size:
+            next_cursor = self._encode_cursor(page_docs[-1])
+        
+        total_pages = (total + query.page_size - 1) // query.page_size
+        
+        return LogQueryResponse(
+            logs=[self._doc_to_log_entry(doc) for doc in page_docs],
+            total=total,
+            page=query.page,
+            page_size=query.page_size,
+            total_pages=total_pages,
+            next_cursor=next_cursor,
+            total_is_approximate=total_is_approximate,
+        )
+    
+    @staticmethod
+    def _service_from_collection(collection_name: str) -> str:
+        """从集合名 logs_xxx 中提取服务名称"""
+        return collection_name[len("logs_"):] if collection_name.startswith("logs_") else collection_name
+    
+    async def _count_logs(
+        self,
+        collection: AsyncIOMotorCollection,
+        filter_conditions: Dict[str, Any],
+        approximate: bool,
+    ) -> Tuple[int, bool]:
+        """
+        统计单个集合中匹配的日志数
+        
+        精确模式直接 count_documents；近似模式下无过滤条件时使用
+        estimated_document_count（读取集合元数据），有过滤条件时计数到
+        LOG_COUNT_LIMIT 为止，结果按规范化的过滤条件在 Redis 中短时缓存。
+        
+        Args:
+            collection: 日志集合
+            filter_conditions: 查询条件
+            approximate: 是否使用近似计数
+        
+        Returns:
+            (计数, 是否为估算值或上限值)
+        """
+        if not approximate:
+            return await collection.count_documents(filter_conditions), False
+        
+        cache_key = self._count_cache_key(collection.name, filter_conditions)
+        count = await self._get_cached_count(cache_key)
+        if count is None:
+            if filter_conditions:
+                count = await collection.count_documents(
+                    filter_conditions, limit=settings.LOG_COUNT_LIMIT
+                )
+            else:
+                count = await collection.estimated_document_count()
+            await self._set_cached_count(cache_key, count)
+        
+        if filter_conditions:
+            return count, count >= settings.LOG_COUNT_LIMIT
+        return count, True
+    
+    @staticmethod
+    def _count_cache_key(collection_name: str, filter_conditions: Dict[str, Any]) -> str:
+        """根据集合名和规范化后的过滤条件生成计数缓存键"""
+        normalized = json.dumps(filter_conditions, sort_keys=True, default=str, ensure_ascii=False)
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        return f"{settings.LOG_COUNT_CACHE_KEY_PREFIX}{collection_name}:{digest}"
+    
+    async def _get_cached_count(self, cache_key: str) -> Optional[int]:
+        """从 Redis 读取计数缓存（Redis 不可用时返回 None）"""
+        try:
+            cached = await get_redis().get(cache_key)
+            return int(cached) if cached is not None else None
+        except RuntimeError:
+            # Redis 未初始化，静默失败
+            return None
+        except Exception as e:
+            logger.warning(f"读取日志计数缓存失败: {cache_key}, 错误: {str(e)}")
+            return None
+    
+    async def _set_cached_count(self, cache_key: str, count: int) -> None:
+        """写入计数缓存（Redis 不可用时忽略）"""
+        try:
+            await get_redis().setex(cache_key, settings.LOG_COUNT_CACHE_TTL, count)
+        except RuntimeError:
+            # Redis 未初始化，静默失败
+            pass
+        except Exception as e:
+            logger.warning(f"写入日志计数缓存失败: {cache_key}, 错误: {str(e)}")
+    
+    async def _fetch_sorted(
+        self,
+        collection: AsyncIOMotorCollection,
+        filter_conditions: Dict[str, Any],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        按 (timestamp, _id) 倒序查询单个集合
+        
+        Args:
+            collection: 日志集合
+            filter_conditions: 查询条件
+            limit: 最多返回的记录数
+        
+        Returns:
+            已排序的文档列表
+        """
+        cursor = collection.find(filter_conditions).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).limit(limit)
+        return await cursor.to_list(length=limit)
+    
+    @staticmethod
+    def _sort_key(doc: Dict[str, Any]) -> Tuple[datetime, ObjectId]:
+        """归并排序键（缺失时间戳的文档排在最后）"""
+        timestamp = doc.get("timestamp")
+        if not isinstance(timestamp, datetime):
+            timestamp = datetime.min
+        return timestamp, doc.get("_id") or ObjectId("0" * 24)
+    
+    @staticmethod
+    def _encode_cursor(doc: Dict[str, Any]) -> str:
+        """将文档的 (timestamp, _id) 编码为不透明的分页游标"""
+        timestamp, doc_id = LogService._sort_key(doc)
+        payload = json.dumps({"t": timestamp.isoformat(), "id": str(doc_id)}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+        """
+        解码分页游标
+        
+        Raises:
+            ValueError: 游标格式无效
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+        except (ValueError, KeyError, TypeError, InvalidId) as e:
+            raise ValueError(f"无效的分页游标: {cursor}") from e
+    
+    @staticmethod
+    def _build_filter(query: LogQueryRequest, use_text_search: bool = True) -> Dict[str, Any]:
         """
         构建 MongoDB 查询条件
         
+        尽量生成可以走索引的条件：
+        - 关键词为普通英文单词/短语时使用 message 文本索引（$text 短语搜索），
+          否则使用不区分大小写的正则匹配
+        - 文件名/函数名以 ^ 开头时使用区分大小写的锚定前缀正则（索引范围扫描），
+          否则使用不区分大小写的部分匹配
+        
         Args:
             query: 查询请求
+            use_text_search: 是否允许使用 $text（集合缺少文本索引时传 False）
         
         Returns:
             MongoDB 查询条件字典
@@ -225,18 +378,36 @@ class LogService:
         
         # 关键词搜索（在 message 字段中搜索）
         if query.keyword:
-            filter_conditions["message"] = Regex(query.keyword, "i")  # 不区分大小写
+            keyword = query.keyword.strip()
+            if use_text_search and TEXT_SEARCH_KEYWORD_PATTERN.fullmatch(keyword):
+                # 加引号作为短语搜索：要求完整短语出现（不区分大小写），而不是任一单词
+                filter_conditions["$text"] = {"$search": f'"{keyword}"'}
+            else:
+                filter_conditions["message"] = Regex(query.keyword, "i")  # 不区分大小写
         
-        # 文件名过滤（支持部分匹配）
+        # 文件名过滤（^ 开头为前缀匹配，否则部分匹配）
         if query.file:
-            filter_conditions["file"] = Regex(query.file, "i")
+            filter_conditions["file"] = LogService._field_regex(query.file)
         
-        # 函数名过滤（支持部分匹配）
+        # 函数名过滤（^ 开头为前缀匹配，否则部分匹配）
         if query.function:
-            filter_conditions["function"] = Regex(query.function, "i")
+            filter_conditions["function"] = LogService._field_regex(query.function)
         
         return filter_conditions
     
+    @staticmethod
+    def _field_regex(value: str) -> Regex:
+        """
+        生成文件名/函数名过滤正则
+        
+        "^前缀" 形式转换为区分大小写的锚定前缀（前缀中的 . 等字符按字面匹配），
+        MongoDB 可以把它转换为索引范围扫描；其他输入保持原有的不区分大小写部分匹配。
+        """
+        match = PREFIX_FILTER_PATTERN.fullmatch(value)
+        if match:
+            return Regex("^" + re.escape(match.group(1)))
+        return Regex(value, "i")
+    
     def _doc_to_log_entry(self, doc: Dict[str, Any]) -> LogEntryResponse:
         """
         将 MongoDB 文档转换为 LogEntryResponse
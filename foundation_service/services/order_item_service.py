@@ -6,7 +6,7 @@ from typing import Optional, List
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from common.models import OrderItem, Customer, Organization
+from common.models import OrderItem, Customer
 from common.models.order import Order
 from foundation_service.repositories.order_item_repository import OrderItemRepository
 from foundation_service.services.product_price_service import ProductPriceService
@@ -94,146 +94,10 @@ class OrderItemService:
             
             customer_id = order.customer_id
             
-            # 2. 查询销售价格（根据客户等级）
-            sales_price = None
-            if request.product_id and customer_id:
-                try:
-                    sales_price = await self.price_service.get_sales_price(
-                        request.product_id,
-                        customer_id
-                    )
-                    logger.debug(
-                        f"[Service] {method_name} - 查询销售价格成功 | "
-                        f"price_cny={sales_price.get('price_cny')}, "
-                        f"price_idr={sales_price.get('price_idr')}"
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"[Service] {method_name} - 查询销售价格失败，使用请求中的价格 | "
-                        f"错误: {str(e)}"
-                    )
-            
-            # 3. 选择或验证供应商
-            supplier_cost = None
-            delivery_type = request.delivery_type
-            selected_supplier_id = request.selected_supplier_id
-            
-            if request.product_id:
-                try:
-                    if selected_supplier_id:
-                        # 验证指定的供应商是否可用
-                        supplier_cost = await self.price_service.get_cost_price(
-                            request.product_id,
-                            selected_supplier_id,
-                            delivery_type
-                        )
-                        # 验证交付类型
-                        org_result = await self.db.execute(
-                            select(Organization).where(Organization.id == selected_supplier_id)
-                        )
-                        supplier = org_result.scalar_one_or_none()
-                        if supplier:
-                            if supplier.organization_type == 'internal' and delivery_type != 'INTERNAL':
-                                delivery_type = 'INTERNAL'
-                            elif supplier.organization_type == 'vendor' and delivery_type != 'VENDOR':
-                                delivery_type = 'VENDOR'
-                    else:
-                        # 自动选择供应商
-                        supplier_cost = await self.price_service.select_supplier(
-                            request.product_id
-                        )
-                        selected_supplier_id = supplier_cost["supplier_id"]
-                        delivery_type = supplier_cost["delivery_type"]
-                    
-                    logger.debug(
-                        f"[Service] {method_name} - 选择供应商成功 | "
-                        f"supplier_id={selected_supplier_id}, "
-                        f"delivery_type={delivery_type}, "
-                        f"cost_cny={supplier_cost.get('cost_cny') if supplier_cost else None}"
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"[Service] {method_name} - 选择供应商失败，继续创建订单项 | "
-                        f"错误: {str(e)}"
-                    )
-            
-            # 4. 确定销售价格（优先使用查询到的价格）
-            unit_price = request.unit_price
-            currency_code = request.currency_code or "CNY"
-            
-            if sales_price:
-                if sales_price.get("price_cny"):
-                    unit_price = sales_price["price_cny"]
-                    currency_code = "CNY"
-                elif sales_price.get("price_idr"):
-                    unit_price = sales_price["price_idr"]
-                    currency_code = "IDR"
-            
-            # 5. 计算预估毛利
-            estimated_profit_cny = Decimal('0')
-            estimated_profit_idr = Decimal('0')
-            snapshot_cost_cny = Decimal('0')
-            snapshot_cost_idr = Decimal('0')
-            supplier_cost_history_id = None
-            
-            if supplier_cost:
-                snapshot_cost_cny = supplier_cost.get("cost_cny", Decimal('0'))
-                snapshot_cost_idr = supplier_cost.get("cost_idr", Decimal('0'))
-                supplier_cost_history_id = supplier_cost.get("id")
-                
-                if sales_price:
-                    price_cny = sales_price.get("price_cny", Decimal('0'))
-                    price_idr = sales_price.get("price_idr", Decimal('0'))
-                    estimated_profit_cny = (price_cny - snapshot_cost_cny) * request.quantity
-                    estimated_profit_idr = (price_idr - snapshot_cost_idr) * request.quantity
-            
-            # 6. 计算订单项金额
-            item_amount = self._calculate_item_amount(
-                request.quantity,
-                unit_price,
-                request.discount_amount
-            )
-            
-            logger.debug(
-                f"[Service] {method_name} - 计算订单项金额 | "
-                f"quantity={request.quantity}, unit_price={unit_price}, "
-                f"discount_amount={request.discount_amount}, item_amount={item_amount}"
-            )
-            
-            # 7. 创建订单项模型
-            order_item = OrderItem(
-                order_id=request.order_id,
-                item_number=request.item_number,
-                product_id=request.product_id,
-                product_name_zh=request.product_name_zh,
-                product_name_id=request.product_name_id,
-                product_code=request.product_code,
-                service_type_id=request.service_type_id,
-                service_type_name_zh=request.service_type_name_zh,
-                service_type_name_id=request.service_type_name_id,
-                quantity=request.quantity,
-                unit=request.unit,
-                unit_price=unit_price,
-                discount_amount=request.discount_amount,
-                item_amount=item_amount,
-                currency_code=currency_code,
-                description_zh=request.description_zh,
-                description_id=request.description_id,
-                requirements=request.requirements,
-                expected_start_date=request.expected_start_date,
-                expected_completion_date=request.expected_completion_date,
-                status=request.status,
-                # 新增字段：供应商和成本信息
-                selected_supplier_id=selected_supplier_id,
-                delivery_type=delivery_type,
-                supplier_cost_history_id=supplier_cost_history_id,
-                snapshot_cost_cny=snapshot_cost_cny,
-                snapshot_cost_idr=snapshot_cost_idr,
-                estimated_profit_cny=estimated_profit_cny,
-                estimated_profit_idr=estimated_profit_idr,
-            )
+            # 2. 查询销售价格、选择供应商和成本价格，构建订单项（价格快照）
+            order_item = (await self._build_order_items([request], customer_id))[0]
             
-            # 8. 保存到数据库
+            # 3. 保存到数据库
             order_item = await self.repository.create(order_item)
             await self.db.commit()
             
@@ -241,8 +105,8 @@ class OrderItemService:
             logger.info(
                 f"[Service] {method_name} - 方法调用成功 | "
                 f"耗时: {elapsed_time:.2f}ms | "
-                f"结果: order_item_id={order_item.id}, item_amount={item_amount}, "
-                f"supplier_id={selected_supplier_id}, profit_cny={estimated_profit_cny}"
+                f"结果: order_item_id={order_item.id}, item_amount={order_item.item_amount}, "
+                f"supplier_id={order_item.selected_supplier_id}, profit_cny={order_item.estimated_profit_cny}"
             )
             
             # 转换为响应（默认中文）
@@ -259,6 +123,195 @@ class OrderItemService:
             await self.db.rollback()
             raise
     
+    async def create_order_items(
+        self,
+        requests: List[OrderItemCreateRequest],
+        customer_id: Optional[str],
+        created_by: Optional[str] = None
+    ) -> List[OrderItem]:
+        """
+        批量创建订单项（包含价格快照，不提交事务）
+        
+        所有订单项的销售价格、供应商和成本价格批量查询，查询次数与订单项数量无关。
+        
+        Args:
+            requests: 创建请求列表（同一订单）
+            customer_id: 订单客户ID（用于获取客户等级）
+            created_by: 创建人ID
+        
+        Returns:
+            创建的订单项列表
+        """
+        if not requests:
+            return []
+        
+        order_items = await self._build_order_items(requests, customer_id)
+        self.db.add_all(order_items)
+        await self.db.flush()
+        
+        logger.info(
+            f"[Service] create_order_items - 批量创建订单项成功 | "
+            f"order_id={requests[0].order_id}, count={len(order_items)}"
+        )
+        return order_items
+    
+    async def _build_order_items(
+        self,
+        requests: List[OrderItemCreateRequest],
+        customer_id: Optional[str]
+    ) -> List[OrderItem]:
+        """
+        批量查询价格并构建订单项模型
+        
+        步骤：
+        1. 批量查询销售价格（根据客户等级）
+        2. 批量查询指定供应商的成本价格，未指定供应商的批量自动选择
+        3. 逐项计算预估毛利和订单项金额
+        """
+        product_ids = [req.product_id for req in requests if req.product_id]
+        
+        # 1. 查询销售价格（根据客户等级）
+        sales_prices = {}
+        if product_ids and customer_id:
+            try:
+                sales_prices = await self.price_service.get_sales_prices(product_ids, customer_id)
+                logger.debug(f"[Service] 查询销售价格成功 | count={len(sales_prices)}")
+            except Exception as e:
+                logger.warning(
+                    f"[Service] 查询销售价格失败，使用请求中的价格 | "
+                    f"错误: {str(e)}"
+                )
+        
+        # 2. 选择或验证供应商（交付类型以服务提供方的组织类型为准）
+        pairs = [
+            (req.product_id, req.selected_supplier_id)
+            for req in requests if req.product_id and req.selected_supplier_id
+        ]
+        auto_product_ids = [
+            req.product_id for req in requests if req.product_id and not req.selected_supplier_id
+        ]
+        supplier_costs = {}
+        selected_costs = {}
+        try:
+            if pairs:
+                supplier_costs = await self.price_service.get_cost_prices(pairs)
+            if auto_product_ids:
+                selected_costs = await self.price_service.select_suppliers(auto_product_ids)
+        except Exception as e:
+            logger.warning(
+                f"[Service] 选择供应商失败，继续创建订单项 | "
+                f"错误: {str(e)}"
+            )
+        
+        order_items = []
+        for request in requests:
+            supplier_cost = None
+            delivery_type = request.delivery_type
+            selected_supplier_id = request.selected_supplier_id
+            if request.product_id:
+                if selected_supplier_id:
+                    supplier_cost = supplier_costs.get((request.product_id, selected_supplier_id))
+                else:
+                    supplier_cost = selected_costs.get(request.product_id)
+                    if supplier_cost:
+                        selected_supplier_id = supplier_cost["supplier_id"]
+                if supplier_cost:
+                    delivery_type = supplier_cost["delivery_type"]
+            
+            order_items.append(self._build_order_item(
+                request,
+                sales_prices.get(request.product_id),
+                supplier_cost,
+                selected_supplier_id,
+                delivery_type
+            ))
+        return order_items
+    
+    def _build_order_item(
+        self,
+        request: OrderItemCreateRequest,
+        sales_price: Optional[dict],
+        supplier_cost: Optional[dict],
+        selected_supplier_id: Optional[str],
+        delivery_type: Optional[str]
+    ) -> OrderItem:
+        """根据查询到的销售价格和成本价格构建订单项模型（价格快照）"""
+        # 1. 确定销售价格（优先使用查询到的价格）
+        unit_price = request.unit_price
+        currency_code = request.currency_code or "CNY"
+        
+        if sales_price:
+            if sales_price.get("price_cny"):
+                unit_price = sales_price["price_cny"]
+                currency_code = "CNY"
+            elif sales_price.get("price_idr"):
+                unit_price = sales_price["price_idr"]
+                currency_code = "IDR"
+        
+        # 2. 计算预估毛利
+        estimated_profit_cny = Decimal('0')
+        estimated_profit_idr = Decimal('0')
+        snapshot_cost_cny = Decimal('0')
+        snapshot_cost_idr = Decimal('0')
+        supplier_cost_history_id = None
+        
+        if supplier_cost:
+            snapshot_cost_cny = supplier_cost.get("cost_cny", Decimal('0'))
+            snapshot_cost_idr = supplier_cost.get("cost_idr", Decimal('0'))
+            supplier_cost_history_id = supplier_cost.get("id")
+            
+            if sales_price:
+                price_cny = sales_price.get("price_cny", Decimal('0'))
+                price_idr = sales_price.get("price_idr", Decimal('0'))
+                estimated_profit_cny = (price_cny - snapshot_cost_cny) * request.quantity
+                estimated_profit_idr = (price_idr - snapshot_cost_idr) * request.quantity
+        
+        # 3. 计算订单项金额
+        item_amount = self._calculate_item_amount(
+            request.quantity,
+            unit_price,
+            request.discount_amount
+        )
+        
+        logger.debug(
+            f"[Service] 计算订单项金额 | "
+            f"quantity={request.quantity}, unit_price={unit_price}, "
+            f"discount_amount={request.discount_amount}, item_amount={item_amount}"
+        )
+        
+        # 4. 创建订单项模型
+        return OrderItem(
+            order_id=request.order_id,
+            item_number=request.item_number,
+            product_id=request.product_id,
+            product_name_zh=request.product_name_zh,
+            product_name_id=request.product_name_id,
+            product_code=request.product_code,
+            service_type_id=request.service_type_id,
+            service_type_name_zh=request.service_type_name_zh,
+            service_type_name_id=request.service_type_name_id,
+            quantity=request.quantity,
+            unit=request.unit,
+            unit_price=unit_price,
+            discount_amount=request.discount_amount,
+            item_amount=item_amount,
+            currency_code=currency_code,
+            description_zh=request.description_zh,
+            description_id=request.description_id,
+            requirements=request.requirements,
+            expected_start_date=request.expected_start_date,
+            expected_completion_date=request.expected_completion_date,
+            status=request.status,
+            # 新增字段：供应商和成本信息
+            selected_supplier_id=selected_supplier_id,
+            delivery_type=delivery_type,
+            supplier_cost_history_id=supplier_cost_history_id,
+            snapshot_cost_cny=snapshot_cost_cny,
+            snapshot_cost_idr=snapshot_cost_idr,
+            estimated_profit_cny=estimated_profit_cny,
+            estimated_profit_idr=estimated_profit_idr,
+        )
+    
     async def get_order_item_by_id(
         self,
         item_id: str,
@@ -99,17 +99,19 @@ class OrderService:
             self.db.add(order)
             await self.db.flush()
             
-            # 创建订单项
+            # 创建订单项（价格和供应商批量查询）
             if request.order_items:
-                order_item_service = OrderItemService(self.db)
-                for idx, item_data in enumerate(request.order_items, start=1):
-                    from foundation_service.schemas.order_item import OrderItemCreateRequest
-                    item_request = OrderItemCreateRequest(
+                from foundation_service.schemas.order_item import OrderItemCreateRequest
+                item_requests = [
+                    OrderItemCreateRequest(
                         order_id=order.id,
                         item_number=idx,
                         **item_data
                     )
-                    await order_item_service.create_order_item(item_request, created_by)
+                    for idx, item_data in enumerate(request.order_items, start=1)
+                ]
+                order_item_service = OrderItemService(self.db)
+                await order_item_service.create_order_items(item_requests, order.customer_id, created_by)
             
             # 计算订单总金额
             total_amount = await self._calculate_order_total(order.id)
@@ -362,11 +364,8 @@ class OrderService:
                 title=title,
             )
             
-            # 构建响应列表
-            order_responses = []
-            for order in orders:
-                response = await self._build_order_response(order)
-                order_responses.append(response)
+            # 构建响应列表（订单项、客户名、销售用户名整页批量加载）
+            order_responses = await self._build_order_responses(orders)
             
             result = OrderListResponse(
                 orders=order_responses,
@@ -396,34 +395,40 @@ class OrderService:
     
     async def _build_order_response(self, order: Order) -> OrderResponse:
         """构建订单响应（包含订单项）"""
-        # 查询订单项
-        order_items, _ = await self.order_item_repository.get_by_order_id(
-            order.id, page=1, size=1000
+        responses = await self._build_order_responses([order])
+        return responses[0]
+    
+    async def _build_order_responses(self, orders: List[Order]) -> List[OrderResponse]:
+        """批量构建订单响应（关联数据查询次数与订单数量无关）"""
+        items_by_order, customer_names, sales_usernames = (
+            await self.repository.get_list_relations(orders)
         )
-        
-        # 构建订单项响应
-        from foundation_service.services.order_item_service import OrderItemService
         order_item_service = OrderItemService(self.db)
-        order_item_responses = []
-        for item in order_items:
-            item_response = await order_item_service._to_response(item, "zh")
-            order_item_responses.append(item_response)
-        
-        # 查询关联信息（使用原生 SQL 查询，避免跨服务依赖）
-        customer_name = None
-        sales_username = None
-        if order.customer_id:
-            from sqlalchemy import text
-            customer_query = text("SELECT name FROM customers WHERE id = :customer_id")
-            customer_result = await self.db.execute(customer_query, {"customer_id": order.customer_id})
-            customer_name = customer_result.scalar()
-        
-        if order.sales_user_id:
-            from sqlalchemy import text
-            user_query = text("SELECT username FROM users WHERE id = :user_id")
-            user_result = await self.db.execute(user_query, {"user_id": order.sales_user_id})
-            sales_username = user_result.scalar()
         
+        responses = []
+        for order in orders:
+            order_item_responses = [
+                await order_item_service._to_response(item, "zh")
+                for item in items_by_order.get(order.id, [])
+            ]
+            responses.append(
+                self._order_to_response(
+                    order,
+                    order_item_responses,
+                    customer_name=customer_names.get(order.customer_id),
+                    sales_username=sales_usernames.get(order.sales_user_id),
+                )
+            )
+        return responses
+    
+    def _order_to_response(
+        self,
+        order: Order,
+        order_item_responses: List,
+        customer_name: Optional[str] = None,
+        sales_username: Optional[str] = None,
+    ) -> OrderResponse:
+        """将订单模型及已加载的关联数据转换为响应"""
         # 状态名称
         status_name = None
         if order.status_code:
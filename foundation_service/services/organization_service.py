@@ -13,6 +13,7 @@ from foundation_service.repositories.role_repository import RoleRepository
 from foundation_service.repositories.organization_employee_repository import OrganizationEmployeeRepository
 from foundation_service.services.user_service import UserService
 from foundation_service.repositories.organization_domain_repository import OrganizationDomainRepository
+from foundation_service.utils.auth_context import auth_context_cache
 from common.models.organization import Organization
 from common.models.user import User
 from common.exceptions import OrganizationNotFoundError, BusinessException
@@ -45,27 +46,22 @@ class OrganizationService:
         # 1. 权限检查：只有 BANTU 的 admin 用户可以创建组织
         if created_by_user_id:
             # 检查用户是否是 BANTU 的 admin
-            bantu_org = await self.org_repo.get_bantu_organization()
-            if not bantu_org:
+            bantu_org_id = await auth_context_cache.get_bantu_organization_id(self.db)
+            if not bantu_org_id:
                 logger.warning("BANTU 组织不存在，无法验证权限")
                 raise BusinessException(detail="系统配置错误：BANTU 组织不存在")
             
-            # 检查用户是否属于 BANTU 组织且拥有 ADMIN 角色
-            user = await self.user_repo.get_by_id(created_by_user_id)
-            if not user:
+            # 检查用户是否属于 BANTU 组织且拥有 ADMIN 角色（复用请求内已构建的认证上下文）
+            auth_context = await auth_context_cache.get(self.db, created_by_user_id)
+            if not auth_context:
                 raise BusinessException(detail="用户不存在")
             
-            # 检查用户是否属于 BANTU 组织
-            bantu_employee = await self.employee_repo.get_primary_by_user_id(created_by_user_id)
-            if not bantu_employee or bantu_employee.organization_id != bantu_org.id:
+            if not auth_context.is_bantu:
                 logger.warning(f"用户不属于 BANTU 组织: user_id={created_by_user_id}")
                 raise BusinessException(detail="只有 BANTU 的 admin 用户可以创建组织")
             
-            # 检查用户是否拥有 ADMIN 角色
-            user_roles = await self.user_repo.get_user_roles(created_by_user_id)
-            role_codes = [role.code for role in user_roles]
-            if "ADMIN" not in role_codes:
-                logger.warning(f"用户不是 ADMIN: user_id={created_by_user_id}, roles={role_codes}")
+            if not auth_context.is_admin:
+                logger.warning(f"用户不是 ADMIN: user_id={created_by_user_id}, roles={sorted(auth_context.role_codes)}")
                 raise BusinessException(detail="只有 BANTU 的 admin 用户可以创建组织")
         
         # 2. 生成组织 code（如果未提供）
@@ -231,6 +227,8 @@ class OrganizationService:
             organization.is_locked = request.is_locked
         
         organization = await self.org_repo.update(organization)
+        # 组织编码变更会影响 BANTU 组织识别，清空认证上下文
+        auth_context_cache.invalidate_all(self.db)
         logger.info(f"组织更新成功: id={organization.id}, name={organization.name}")
         return await self._to_response(organization)
     
@@ -243,8 +241,7 @@ class OrganizationService:
             raise OrganizationNotFoundError()
         
         # 不能锁定 BANTU 内部组织
-        bantu_org = await self.org_repo.get_bantu_organization()
-        if bantu_org and organization.id == bantu_org.id:
+        if organization.id == await auth_context_cache.get_bantu_organization_id(self.db):
             logger.warning(f"不能锁定 BANTU 内部组织: organization_id={organization_id}")
             raise BusinessException(detail="不能锁定 BANTU 内部组织")
         
@@ -290,21 +287,13 @@ class OrganizationService:
         
         # 如果提供了当前用户ID，检查权限
         if current_user_id:
-            # 获取当前用户所属的组织
-            current_employee = await self.employee_repo.get_primary_by_user_id(current_user_id)
-            if current_employee:
-                # 获取当前用户所属的组织信息
-                current_org = await self.org_repo.get_by_id(current_employee.organization_id)
-                
-                # 获取当前用户的角色
-                user_roles = await self.user_repo.get_user_roles(current_user_id)
-                role_codes = [role.code for role in user_roles]
-                is_admin = "ADMIN" in role_codes
-                
+            # 获取当前用户的认证上下文（主要组织、组织类型、角色）
+            auth_context = await auth_context_cache.get(self.db, current_user_id)
+            if auth_context and auth_context.primary_organization_id:
                 # 检查是否是 internal 内部组织的 admin
-                if current_org and current_org.organization_type == "internal" and is_admin:
+                if auth_context.is_internal_admin:
                     # 是 internal 组织的 admin，可以查看所有组织
-                    logger.debug(f"Internal admin 用户查询所有组织: user_id={current_user_id}, organization_id={current_org.id}")
+                    logger.debug(f"Internal admin 用户查询所有组织: user_id={current_user_id}, organization_id={auth_context.primary_organization_id}")
                     organizations, total = await self.org_repo.get_list(
                         page=page,
                         size=size,
@@ -316,7 +305,7 @@ class OrganizationService:
                     )
                 else:
                     # 其他用户，只能查看自己的组织
-                    logger.debug(f"普通用户只查询自己的组织: user_id={current_user_id}, organization_id={current_employee.organization_id}")
+                    logger.debug(f"普通用户只查询自己的组织: user_id={current_user_id}, organization_id={auth_context.primary_organization_id}")
                     # 只查询当前用户所属的组织
                     organizations, total = await self.org_repo.get_list(
                         page=page,
@@ -326,7 +315,7 @@ class OrganizationService:
                         organization_type=organization_type,
                         is_active=is_active,
                         is_locked=is_locked,
-                        organization_id=current_employee.organization_id  # 添加组织ID过滤
+                        organization_id=auth_context.primary_organization_id  # 添加组织ID过滤
                     )
             else:
                 # 用户未关联到任何组织，返回空列表
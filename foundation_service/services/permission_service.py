@@ -1,7 +1,8 @@
 """
 权限服务层
 """
-from typing import Optional, List
+import hashlib
+from typing import Optional, List, FrozenSet
 from sqlalchemy.ext.asyncio import AsyncSession
 from foundation_service.repositories.permission_repository import (
     PermissionRepository,
@@ -9,6 +10,7 @@ from foundation_service.repositories.permission_repository import (
     MenuRepository,
     MenuPermissionRepository
 )
+from foundation_service.repositories.user_repository import UserRepository
 from common.models.permission import Permission, Menu
 from foundation_service.schemas.permission import (
     PermissionCreateRequest,
@@ -24,6 +26,12 @@ from foundation_service.schemas.permission import (
     UserPermissionResponse
 )
 from common.exceptions import BusinessException
+from foundation_service.utils.permission_cache import (
+    permission_cache,
+    menu_tree_cache,
+    accessible_menu_cache,
+    invalidate_menu_caches,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,6 +46,7 @@ class PermissionService:
         self.role_permission_repo = RolePermissionRepository(db)
         self.menu_repo = MenuRepository(db)
         self.menu_permission_repo = MenuPermissionRepository(db)
+        self.user_repo = UserRepository(db)
     
     # ==================== 权限管理 ====================
     
@@ -87,6 +96,9 @@ class PermissionService:
             permission.is_active = request.is_active
         
         permission = await self.permission_repo.update(permission)
+        # 权限状态变化影响所有拥有该权限的用户和可访问菜单，名称变化影响菜单树中的权限信息
+        await permission_cache.invalidate_all(self.db)
+        await invalidate_menu_caches(self.db)
         logger.info(f"权限更新成功: id={permission.id}, code={permission.code}")
         return await self._permission_to_response(permission)
     
@@ -143,6 +155,8 @@ class PermissionService:
                 raise BusinessException(detail=f"权限不存在: permission_id={permission_id}")
         
         await self.role_permission_repo.assign_permissions_to_role(role_id, request.permission_ids)
+        await permission_cache.invalidate_all(self.db)
+        await invalidate_menu_caches(self.db)
         logger.info(f"角色权限分配成功: role_id={role_id}, permission_count={len(request.permission_ids)}")
     
     async def get_role_permissions(self, role_id: str) -> List[PermissionResponse]:
@@ -150,10 +164,20 @@ class PermissionService:
         permissions = await self.role_permission_repo.get_role_permissions(role_id)
         return [await self._permission_to_response(p) for p in permissions]
     
+    async def get_user_permission_codes(self, user_id: str) -> FrozenSet[str]:
+        """获取用户的有效权限编码集合（优先读取权限缓存）"""
+        codes, version = await permission_cache.get(user_id)
+        if codes is None:
+            codes = await permission_cache.set(
+                user_id,
+                version,
+                await self.role_permission_repo.get_user_permission_codes(user_id),
+            )
+        return codes
+    
     async def check_user_permission(self, user_id: str, permission_code: str) -> bool:
         """检查用户是否拥有指定权限"""
-        permissions = await self.role_permission_repo.get_user_permissions(user_id)
-        return any(p.code == permission_code for p in permissions)
+        return permission_code in await self.get_user_permission_codes(user_id)
     
     async def get_user_permissions(self, user_id: str) -> List[PermissionInfo]:
         """获取用户的所有权限"""
@@ -202,6 +226,7 @@ class PermissionService:
             is_visible=request.is_visible
         )
         menu = await self.menu_repo.create(menu)
+        await invalidate_menu_caches(self.db)
         logger.info(f"菜单创建成功: id={menu.id}, code={menu.code}")
         return await self._menu_to_response(menu)
     
@@ -240,6 +265,7 @@ class PermissionService:
             menu.is_visible = request.is_visible
         
         menu = await self.menu_repo.update(menu)
+        await invalidate_menu_caches(self.db)
         logger.info(f"菜单更新成功: id={menu.id}, code={menu.code}")
         return await self._menu_to_response(menu)
     
@@ -251,65 +277,49 @@ class PermissionService:
         return await self._menu_to_response(menu)
     
     async def get_menu_tree(self) -> List[MenuResponse]:
-        """获取菜单树"""
-        # 获取所有菜单
+        """
+        获取菜单树
+        
+        两次查询（所有激活菜单 + 所有菜单权限）组装整棵树，结果按菜单版本缓存，
+        菜单、菜单权限或权限变更时失效。
+        """
+        menus, version = await menu_tree_cache.get("tree")
+        if menus is not None:
+            return menus
+        
         all_menus = await self.menu_repo.get_active_menus()
-        # 构建菜单树
-        menu_map = {menu.id: menu for menu in all_menus}
+        permissions_by_menu = await self.menu_permission_repo.get_permissions_by_menu()
+        
+        # 构建菜单树（菜单已按 display_order 排序，子菜单保持同样顺序）
+        responses = {
+            menu.id: await self._menu_to_response(menu, permissions_by_menu.get(menu.id, []))
+            for menu in all_menus
+        }
         root_menus = []
         for menu in all_menus:
-            if menu.parent_id and menu.parent_id in menu_map:
-                parent = menu_map[menu.parent_id]
-                if not hasattr(parent, '_children'):
-                    parent._children = []
-                parent._children.append(menu)
+            if menu.parent_id and menu.parent_id in responses:
+                responses[menu.parent_id].children.append(responses[menu.id])
             else:
-                root_menus.append(menu)
+                root_menus.append(responses[menu.id])
         
-        return [await self._menu_to_response_tree(menu) for menu in root_menus]
+        return await menu_tree_cache.set("tree", version, root_menus)
     
-    async def _menu_to_response(self, menu: Menu) -> MenuResponse:
-        """转换为响应对象（单个菜单）"""
-        from foundation_service.utils.charset_fix import fix_encoding
-        
-        permissions = await self.menu_permission_repo.get_menu_permissions(menu.id)
-        permission_infos = [
-            PermissionInfo(
-                id=p.id,
-                code=p.code,
-                name_zh=fix_encoding(p.name_zh) if p.name_zh else None,
-                name_id=fix_encoding(p.name_id) if p.name_id else None,
-                resource_type=p.resource_type,
-                action=p.action
-            )
-            for p in permissions
-        ]
+    async def _menu_to_response(
+        self,
+        menu: Menu,
+        permissions: Optional[List[Permission]] = None,
+    ) -> MenuResponse:
+        """
+        转换为响应对象（单个菜单，不含子菜单）
         
-        return MenuResponse(
-            id=menu.id,
-            code=menu.code,
-            name_zh=fix_encoding(menu.name_zh) if menu.name_zh else None,
-            name_id=fix_encoding(menu.name_id) if menu.name_id else None,
-            description_zh=fix_encoding(menu.description_zh) if menu.description_zh else None,
-            description_id=fix_encoding(menu.description_id) if menu.description_id else None,
-            parent_id=menu.parent_id,
-            path=menu.path,
-            component=menu.component,
-            icon=menu.icon,
-            display_order=menu.display_order,
-            is_active=menu.is_active,
-            is_visible=menu.is_visible,
-            children=[],
-            permissions=permission_infos,
-            created_at=menu.created_at,
-            updated_at=menu.updated_at
-        )
-    
-    async def _menu_to_response_tree(self, menu: Menu) -> MenuResponse:
-        """转换为响应对象（树形结构）"""
+        Args:
+            menu: 菜单
+            permissions: 已批量加载的菜单权限；为 None 时单独查询
+        """
         from foundation_service.utils.charset_fix import fix_encoding
         
-        permissions = await self.menu_permission_repo.get_menu_permissions(menu.id)
+        if permissions is None:
+            permissions = await self.menu_permission_repo.get_menu_permissions(menu.id)
         permission_infos = [
             PermissionInfo(
                 id=p.id,
@@ -322,11 +332,6 @@ class PermissionService:
             for p in permissions
         ]
         
-        # 递归处理子菜单
-        children = []
-        if hasattr(menu, '_children'):
-            children = [await self._menu_to_response_tree(child) for child in menu._children]
-        
         return MenuResponse(
             id=menu.id,
             code=menu.code,
@@ -341,7 +346,7 @@ class PermissionService:
             display_order=menu.display_order,
             is_active=menu.is_active,
             is_visible=menu.is_visible,
-            children=children,
+            children=[],
             permissions=permission_infos,
             created_at=menu.created_at,
             updated_at=menu.updated_at
@@ -358,35 +363,58 @@ class PermissionService:
                 raise BusinessException(detail=f"权限不存在: permission_id={permission_id}")
         
         await self.menu_permission_repo.assign_permissions_to_menu(menu_id, request.permission_ids)
+        await invalidate_menu_caches(self.db)
         logger.info(f"菜单权限分配成功: menu_id={menu_id}, permission_count={len(request.permission_ids)}")
     
     # ==================== 用户菜单和权限 ====================
     
     async def get_user_menus(self, user_id: str) -> List[UserMenuResponse]:
-        """获取用户可访问的菜单"""
-        menus = await self.menu_permission_repo.get_user_menus(user_id)
-        return [await self._menu_to_user_response(menu) for menu in menus]
-    
-    async def _menu_to_user_response(self, menu: Menu) -> UserMenuResponse:
-        """转换为用户菜单响应"""
-        from foundation_service.utils.charset_fix import fix_encoding
+        """
+        获取用户可访问的菜单
         
-        children = []
-        if hasattr(menu, '_children'):
-            children = [await self._menu_to_user_response(child) for child in menu._children]
+        可访问菜单只取决于用户的角色集合：按排序后的角色编码哈希缓存菜单树，
+        拥有相同角色的用户共用一份；菜单或角色权限变更时失效。
+        """
+        roles = await self.user_repo.get_user_roles(user_id)
+        role_set_key = hashlib.sha1(
+            ",".join(sorted(role.code for role in roles)).encode("utf-8")
+        ).hexdigest()
         
-        return UserMenuResponse(
-            id=menu.id,
-            code=menu.code,
-            name_zh=fix_encoding(menu.name_zh) if menu.name_zh else None,
-            name_id=fix_encoding(menu.name_id) if menu.name_id else None,
-            path=menu.path,
-            component=menu.component,
-            icon=menu.icon,
-            display_order=menu.display_order,
-            children=children
+        menus, version = await accessible_menu_cache.get(role_set_key)
+        if menus is not None:
+            return menus
+        
+        accessible_menus = await self.menu_permission_repo.get_role_menus([role.id for role in roles])
+        return await accessible_menu_cache.set(
+            role_set_key, version, self._build_user_menu_tree(accessible_menus)
         )
     
+    def _build_user_menu_tree(self, menus: List[Menu]) -> List[UserMenuResponse]:
+        """将已排序的可访问菜单列表组装为用户菜单树"""
+        from foundation_service.utils.charset_fix import fix_encoding
+        
+        responses = {
+            menu.id: UserMenuResponse(
+                id=menu.id,
+                code=menu.code,
+                name_zh=fix_encoding(menu.name_zh) if menu.name_zh else None,
+                name_id=fix_encoding(menu.name_id) if menu.name_id else None,
+                path=menu.path,
+                component=menu.component,
+                icon=menu.icon,
+                display_order=menu.display_order,
+                children=[]
+            )
+            for menu in menus
+        }
+        root_menus = []
+        for menu in menus:
+            if menu.parent_id and menu.parent_id in responses:
+                responses[menu.parent_id].children.append(responses[menu.id])
+            else:
+                root_menus.append(responses[menu.id])
+        return root_menus
+    
     async def get_user_permission_info(self, user_id: str) -> UserPermissionResponse:
         """获取用户的权限和菜单信息"""
         permissions = await self.get_user_permissions(user_id)
@@ -1,11 +1,13 @@
 """
 产品依赖关系服务
 """
-from typing import List, Dict, Set, Optional, Tuple
+from typing import Any, List, Dict, Set, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from collections import defaultdict, deque
+from sqlalchemy import select
 
 from foundation_service.repositories.product_dependency_repository import ProductDependencyRepository
+from foundation_service.utils.product_dependency_graph import get_product_dependency_graph
+from common.models.product import Product
 from common.models.product_dependency import ProductDependency
 from common.utils.logger import get_logger
 from common.exceptions import BusinessException
@@ -53,39 +55,54 @@ class ProductDependencyService:
         if not product_ids:
             return True, [], []
         
+        graph = await get_product_dependency_graph(self.db)
         product_set = set(product_ids)
-        missing_dependencies = []
-        warnings = []
+        missing_pairs: List[Tuple[str, str]] = []
+        recommended_pairs: List[Tuple[str, str]] = []
         
-        # 查询所有产品的依赖关系
-        for product_id in product_ids:
-            dependencies = await self.get_product_dependencies(product_id)
-            for dep in dependencies:
-                if dep.dependency_type == "required":
-                    # 必需依赖：检查依赖的产品是否在选择列表中
-                    if dep.depends_on_product_id not in product_set:
-                        # 获取产品名称（如果有的话）
-                        product_name = getattr(dep.product, "name", product_id)
-                        depends_on_name = getattr(dep.depends_on_product, "name", dep.depends_on_product_id)
-                        missing_dependencies.append(f"{product_name} 需要 {depends_on_name}")
-                elif dep.dependency_type == "recommended":
-                    # 推荐依赖：作为警告
-                    if dep.depends_on_product_id not in product_set:
-                        product_name = getattr(dep.product, "name", product_id)
-                        depends_on_name = getattr(dep.depends_on_product, "name", dep.depends_on_product_id)
-                        warnings.append(f"推荐：{product_name} 建议先有 {depends_on_name}")
+        for product_id in dict.fromkeys(product_ids):
+            for depends_on_id in graph.required_dependencies(product_id):
+                # 必需依赖：检查依赖的产品是否在选择列表中
+                if depends_on_id not in product_set:
+                    missing_pairs.append((product_id, depends_on_id))
+            for depends_on_id in graph.recommended_dependencies(product_id):
+                # 推荐依赖：作为警告
+                if depends_on_id not in product_set:
+                    recommended_pairs.append((product_id, depends_on_id))
+        
+        # 一次查询获取涉及产品的名称（没有名称时使用产品ID）
+        names = await self._get_product_names(
+            {pid for pair in missing_pairs + recommended_pairs for pid in pair}
+        )
+        missing_dependencies = [
+            f"{names.get(product_id, product_id)} 需要 {names.get(depends_on_id, depends_on_id)}"
+            for product_id, depends_on_id in missing_pairs
+        ]
+        warnings = [
+            f"推荐：{names.get(product_id, product_id)} 建议先有 {names.get(depends_on_id, depends_on_id)}"
+            for product_id, depends_on_id in recommended_pairs
+        ]
         
         is_valid = len(missing_dependencies) == 0
         return is_valid, missing_dependencies, warnings
     
+    async def _get_product_names(self, product_ids: Set[str]) -> Dict[str, str]:
+        """批量获取产品名称 {产品ID: 名称}"""
+        if not product_ids:
+            return {}
+        result = await self.db.execute(
+            select(Product.id, Product.name).where(Product.id.in_(product_ids))
+        )
+        return {row.id: row.name for row in result if row.name}
+    
     async def get_execution_order(
         self, 
         product_ids: List[str]
-    ) -> List[Dict[str, any]]:
+    ) -> List[Dict[str, Any]]:
         """获取产品执行顺序（拓扑排序）
         
         Args:
-            product_ids: 产品ID列表
+            product_ids: 产品ID列表（重复的产品只保留第一次出现）
             
         Returns:
             执行顺序列表，每个元素包含：
@@ -98,84 +115,40 @@ class ProductDependencyService:
         if not product_ids:
             return []
         
-        product_set = set(product_ids)
-        
-        # 构建依赖图
-        graph: Dict[str, Set[str]] = defaultdict(set)  # product_id -> {depends_on_product_ids}
-        in_degree: Dict[str, int] = defaultdict(int)  # product_id -> 入度
-        
-        # 初始化所有产品的入度为0
-        for product_id in product_ids:
-            in_degree[product_id] = 0
-        
-        # 查询所有产品的依赖关系（只考虑required依赖）
-        for product_id in product_ids:
-            dependencies = await self.get_product_dependencies(product_id, dependency_type="required")
-            for dep in dependencies:
-                depends_on_id = dep.depends_on_product_id
-                # 只考虑在选择列表中的依赖
-                if depends_on_id in product_set:
-                    graph[depends_on_id].add(product_id)
-                    in_degree[product_id] += 1
-        
-        # 拓扑排序
-        queue = deque()
-        for product_id in product_ids:
-            if in_degree[product_id] == 0:
-                queue.append(product_id)
-        
-        execution_order = []
-        order = 1
-        
-        while queue:
-            current = queue.popleft()
-            
-            # 记录执行顺序
-            dependencies_list = []
-            deps = await self.get_product_dependencies(current, dependency_type="required")
-            for dep in deps:
-                if dep.depends_on_product_id in product_set:
-                    dependencies_list.append(dep.depends_on_product_id)
-            
-            execution_order.append({
-                "product_id": current,
-                "execution_order": order,
-                "dependencies": dependencies_list
-            })
-            order += 1
-            
-            # 更新依赖该产品的产品的入度
-            for dependent in graph[current]:
-                in_degree[dependent] -= 1
-                if in_degree[dependent] == 0:
-                    queue.append(dependent)
+        graph = await get_product_dependency_graph(self.db)
+        execution_order = graph.execution_order(product_ids)
         
-        # 检查是否有循环依赖（如果还有产品的入度不为0，说明存在循环）
-        remaining = [pid for pid in product_ids if in_degree[pid] > 0]
+        # 检查是否有循环依赖（环上的产品按原始顺序排在末尾，其依赖不会全部排在前面）
+        positions = {item["product_id"]: item["execution_order"] for item in execution_order}
+        remaining = [
+            item["product_id"] for item in execution_order
+            if any(positions[dep] >= item["execution_order"] for dep in item["dependencies"])
+        ]
         if remaining:
             logger.warning(f"检测到循环依赖，产品ID: {remaining}")
-            # 对于剩余的产品，按原始顺序添加到末尾
-            for product_id in remaining:
-                dependencies_list = []
-                deps = await self.get_product_dependencies(product_id, dependency_type="required")
-                for dep in deps:
-                    if dep.depends_on_product_id in product_set:
-                        dependencies_list.append(dep.depends_on_product_id)
-                
-                execution_order.append({
-                    "product_id": product_id,
-                    "execution_order": order,
-                    "dependencies": dependencies_list
-                })
-                order += 1
         
         return execution_order
     
+    async def get_dependency_chain(self, product_id: str) -> List[str]:
+        """获取产品的全部必需依赖（直接和间接），依赖在前
+        
+        Args:
+            product_id: 产品ID
+            
+        Returns:
+            依赖产品ID列表（不含产品本身）
+        """
+        graph = await get_product_dependency_graph(self.db)
+        return graph.dependency_chain(product_id)
+    
     async def check_circular_dependency(
         self, 
         product_id: str, 
         depends_on_product_id: str
     ) -> bool:
-        """检查是否存在循环依赖"""
+        """检查添加依赖后是否存在循环依赖
+        
+        写入前的校验直接查询数据库（一条递归查询），不使用可能滞后于其他进程写入的内存依赖图。
+        """
         return await self.repository.check_circular_dependency(product_id, depends_on_product_id)
 
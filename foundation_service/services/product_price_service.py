@@ -1,11 +1,11 @@
 """
 产品价格服务 - 销售价格和成本价格管理
 """
-from typing import Optional, Dict, List
+from typing import Optional, Dict, Iterable, List, Tuple
 from datetime import datetime
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, or_, func, text, bindparam
 from sqlalchemy.orm import selectinload
 
 from common.models.product import Product
@@ -13,9 +13,16 @@ from common.models.customer import Customer
 from common.models.organization import Organization
 from common.exceptions import BusinessException, NotFoundError
 from common.utils.logger import get_logger
+from foundation_service.utils.price_book import get_product_price_book
 
 logger = get_logger(__name__)
 
+# 服务提供方组织类型 -> 交付类型
+_DELIVERY_TYPES = {
+    "internal": "INTERNAL",
+    "vendor": "VENDOR",
+}
+
 
 class ProductPriceService:
     """产品价格服务 - 处理销售价格和成本价格查询"""
@@ -49,79 +56,74 @@ class ProductPriceService:
                 "effective_to": Optional[datetime]
             }
         """
+        prices = await self.get_sales_prices([product_id], customer_id, currency)
+        if product_id not in prices:
+            raise NotFoundError(f"产品 {product_id} 未设置销售价格")
+        return prices[product_id]
+    
+    async def get_sales_prices(
+        self,
+        product_ids: Iterable[str],
+        customer_id: str,
+        currency: Optional[str] = None
+    ) -> Dict[str, Dict]:
+        """
+        批量查询销售价格（查询客户等级，价格从进程内价格簿中按有效期选择）
+        
+        Args:
+            product_ids: 产品ID列表
+            customer_id: 客户ID（用于获取客户等级）
+            currency: 币种（CNY/IDR），可选，默认返回两种币种
+            
+        Returns:
+            {产品ID: 与 get_sales_price 相同的价格信息}；未设置销售价格的产品不在结果中
+        """
         # 1. 查询客户等级
         customer_result = await self.db.execute(
-            select(Customer).where(Customer.id == customer_id)
+            select(Customer.level).where(Customer.id == customer_id)
         )
-        customer = customer_result.scalar_one_or_none()
+        customer = customer_result.first()
         
         if not customer:
             raise NotFoundError(f"客户 {customer_id} 不存在")
         
-        if not customer.level_code:
+        if not customer.level:
             raise BusinessException(detail="客户未设置等级，无法查询销售价格")
         
-        level_code = customer.level_code  # 例如: '2', '3', '4', '5', '6'
-        
-        # 2. 查询产品的有效销售价格
-        # 注意：这里需要动态查询 product_price_list 表
-        # 由于表可能还未创建模型，我们使用原生SQL或先创建模型
-        # 暂时使用原生SQL查询
-        from sqlalchemy import text
+        level_code = customer.level  # 例如: '2', '3', '4', '5', '6'
         
+        # 2. 从价格簿中选择产品当前有效的销售价格
+        price_book = await get_product_price_book(self.db)
         now = datetime.now()
-        sql = text("""
-            SELECT 
-                id,
-                product_id,
-                price_level2_cny, price_level2_idr,
-                price_level3_cny, price_level3_idr,
-                price_level4_cny, price_level4_idr,
-                price_level5_cny, price_level5_idr,
-                price_level6_cny, price_level6_idr,
-                is_active,
-                effective_from,
-                effective_to
-            FROM product_price_list
-            WHERE product_id = :product_id
-              AND is_active = 1
-              AND effective_from <= :now
-              AND (effective_to IS NULL OR effective_to > :now)
-            LIMIT 1
-        """)
-        
-        result = await self.db.execute(
-            sql,
-            {"product_id": product_id, "now": now}
-        )
-        price_record = result.fetchone()
-        
-        if not price_record:
-            raise NotFoundError(f"产品 {product_id} 未设置销售价格")
         
         # 3. 根据客户等级和币种返回价格
         level_field_cny = f"price_level{level_code}_cny"
         level_field_idr = f"price_level{level_code}_idr"
         
-        price_cny = getattr(price_record, level_field_cny) or Decimal('0')
-        price_idr = getattr(price_record, level_field_idr) or Decimal('0')
-        
-        response = {
-            "product_id": product_id,
-            "customer_level": level_code,
-            "price_cny": price_cny,
-            "price_idr": price_idr,
-            "effective_from": price_record.effective_from,
-            "effective_to": price_record.effective_to
-        }
-        
-        # 如果指定了币种，只返回对应币种
-        if currency == "CNY":
-            response["price_idr"] = None
-        elif currency == "IDR":
-            response["price_cny"] = None
+        prices: Dict[str, Dict] = {}
+        for product_id in dict.fromkeys(pid for pid in product_ids if pid):
+            price_record = price_book.lookup(product_id, now)
+            if not price_record:
+                continue
+            
+            response = {
+                "product_id": product_id,
+                "customer_level": level_code,
+                "price_cny": price_record.get(level_field_cny) or Decimal('0'),
+                "price_idr": price_record.get(level_field_idr) or Decimal('0'),
+                "effective_from": price_record["effective_from"],
+                "effective_to": price_record["effective_to"]
+            }
+            
+            # 如果指定了币种，只返回对应币种
+            if currency == "CNY":
+                response["price_idr"] = None
+            elif currency == "IDR":
+                response["price_cny"] = None
+            
+            prices[product_id] = response
         
-        return response
+        return prices
     
     async def get_cost_price(
         self,
@@ -135,7 +137,7 @@ class ProductPriceService:
         Args:
             product_id: 产品ID
             supplier_id: 服务提供方ID（内部团队或外部供应商）
-            delivery_type: 交付类型（INTERNAL/VENDOR），可选，如果不提供则自动判断
+            delivery_type: 交付类型（INTERNAL/VENDOR），可选，如果不提供则根据组织类型判断
             
         Returns:
             {
@@ -150,68 +152,115 @@ class ProductPriceService:
                 "effective_end_at": Optional[datetime]
             }
         """
-        # 1. 自动判断交付类型
-        if not delivery_type:
-            org_result = await self.db.execute(
-                select(Organization).where(Organization.id == supplier_id)
-            )
-            supplier = org_result.scalar_one_or_none()
-            
-            if not supplier:
-                raise NotFoundError(f"服务提供方 {supplier_id} 不存在")
-            
-            if supplier.organization_type == 'internal':
-                delivery_type = 'INTERNAL'
-            elif supplier.organization_type == 'vendor':
-                delivery_type = 'VENDOR'
-            else:
-                raise BusinessException(
-                    detail=f"组织类型 {supplier.organization_type} 不能作为服务提供方"
-                )
-        
-        # 2. 查询当前有效的成本价格
-        from sqlalchemy import text
-        
-        now = datetime.now()
-        sql = text("""
-            SELECT 
-                id,
-                product_id,
-                supplier_id,
-                delivery_type,
-                version,
-                cost_cny,
-                cost_idr,
-                effective_start_at,
-                effective_end_at,
-                is_current
-            FROM supplier_cost_history
-            WHERE product_id = :product_id
-              AND supplier_id = :supplier_id
-              AND delivery_type = :delivery_type
-              AND is_current = 1
-              AND effective_start_at <= :now
-              AND (effective_end_at IS NULL OR effective_end_at > :now)
-            ORDER BY version DESC
-            LIMIT 1
-        """)
-        
-        result = await self.db.execute(
-            sql,
-            {
-                "product_id": product_id,
-                "supplier_id": supplier_id,
-                "delivery_type": delivery_type,
-                "now": now
-            }
+        costs = await self.get_cost_prices(
+            [(product_id, supplier_id)],
+            {(product_id, supplier_id): delivery_type} if delivery_type else None
         )
-        cost_record = result.fetchone()
-        
-        if not cost_record:
+        cost = costs.get((product_id, supplier_id))
+        if not cost:
+            if not delivery_type:
+                # 根据组织类型判断交付类型时，区分服务提供方不存在和组织类型不能作为服务提供方
+                org_result = await self.db.execute(
+                    select(Organization.organization_type).where(Organization.id == supplier_id)
+                )
+                supplier = org_result.first()
+                
+                if not supplier:
+                    raise NotFoundError(f"服务提供方 {supplier_id} 不存在")
+                
+                if supplier.organization_type not in _DELIVERY_TYPES:
+                    raise BusinessException(
+                        detail=f"组织类型 {supplier.organization_type} 不能作为服务提供方"
+                    )
             raise NotFoundError(
                 f"产品 {product_id} 的服务提供方 {supplier_id} 未设置成本价格"
             )
+        return cost
+    
+    async def get_cost_prices(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        delivery_types: Optional[Dict[Tuple[str, str], str]] = None
+    ) -> Dict[Tuple[str, str], Dict]:
+        """
+        批量查询成本价格（一次查询，同时根据组织类型判断交付类型）
         
+        Args:
+            pairs: (产品ID, 服务提供方ID) 列表
+            delivery_types: 指定交付类型 {(产品ID, 服务提供方ID): INTERNAL/VENDOR}，
+                            未指定的根据服务提供方的组织类型判断
+            
+        Returns:
+            {(产品ID, 服务提供方ID): 与 get_cost_price 相同的成本信息}；
+            服务提供方不存在、组织类型不能作为服务提供方或未设置成本价格的不在结果中
+        """
+        pairs = set(pairs)
+        if not pairs:
+            return {}
+        delivery_types = delivery_types or {}
+        
+        rows = await self._get_current_cost_rows(
+            {product_id for product_id, _ in pairs},
+            {supplier_id for _, supplier_id in pairs}
+        )
+        
+        costs: Dict[Tuple[str, str], Dict] = {}
+        for cost_record in rows:
+            key = (cost_record.product_id, cost_record.supplier_id)
+            if key not in pairs or key in costs:
+                continue
+            delivery_type = delivery_types.get(key) or _DELIVERY_TYPES.get(cost_record.organization_type)
+            # 结果按版本倒序，同一组合取交付类型匹配的最新版本
+            if cost_record.delivery_type == delivery_type:
+                costs[key] = self._to_cost_price(cost_record)
+        return costs
+    
+    async def _get_current_cost_rows(
+        self,
+        product_ids: Iterable[str],
+        supplier_ids: Optional[Iterable[str]] = None
+    ) -> List:
+        """
+        查询当前有效的成本价格记录（含服务提供方名称和组织类型），按版本倒序
+        
+        Args:
+            product_ids: 产品ID列表
+            supplier_ids: 服务提供方ID列表，可选，不提供时返回产品的所有服务提供方
+        """
+        supplier_filter = "AND sch.supplier_id IN :supplier_ids" if supplier_ids is not None else ""
+        sql = text(f"""
+            SELECT 
+                sch.id,
+                sch.product_id,
+                sch.supplier_id,
+                sch.delivery_type,
+                sch.version,
+                sch.cost_cny,
+                sch.cost_idr,
+                sch.effective_start_at,
+                sch.effective_end_at,
+                o.name AS supplier_name,
+                o.organization_type
+            FROM supplier_cost_history sch
+            INNER JOIN organizations o ON sch.supplier_id = o.id
+            WHERE sch.product_id IN :product_ids
+              {supplier_filter}
+              AND sch.is_current = 1
+              AND sch.effective_start_at <= :now
+              AND (sch.effective_end_at IS NULL OR sch.effective_end_at > :now)
+            ORDER BY sch.version DESC
+        """).bindparams(bindparam("product_ids", expanding=True))
+        params = {"product_ids": list(product_ids) or [""], "now": datetime.now()}
+        if supplier_ids is not None:
+            sql = sql.bindparams(bindparam("supplier_ids", expanding=True))
+            params["supplier_ids"] = list(supplier_ids) or [""]
+        
+        result = await self.db.execute(sql, params)
+        return result.fetchall()
+    
+    @staticmethod
+    def _to_cost_price(cost_record) -> Dict:
+        """成本价格记录转换为成本信息"""
         return {
             "id": cost_record.id,
             "product_id": cost_record.product_id,
@@ -245,8 +294,6 @@ class ProductPriceService:
                 ...
             ]
         """
-        from sqlalchemy import text
-        
         now = datetime.now()
         sql = text("""
             SELECT 
@@ -314,39 +361,103 @@ class ProductPriceService:
         if not product:
             raise NotFoundError(f"产品 {product_id} 不存在")
         
+        rows = await self._get_current_cost_rows([product_id])
+        return self._choose_supplier(product, rows, preferred_supplier_id)
+    
+    async def select_suppliers(
+        self,
+        product_ids: Iterable[str],
+        preferred_supplier_ids: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Dict]:
+        """
+        批量选择供应商（一次查询产品，一次查询所有产品的当前成本价格）
+        
+        Args:
+            product_ids: 产品ID列表
+            preferred_supplier_ids: 首选供应商 {产品ID: 供应商ID}，可选
+            
+        Returns:
+            {产品ID: 供应商成本价格信息}；无法选择供应商的产品不在结果中（记录警告）
+        """
+        product_ids = list(dict.fromkeys(pid for pid in product_ids if pid))
+        if not product_ids:
+            return {}
+        preferred_supplier_ids = preferred_supplier_ids or {}
+        
+        product_result = await self.db.execute(
+            select(Product).where(Product.id.in_(product_ids))
+        )
+        products = {product.id: product for product in product_result.scalars()}
+        
+        rows_by_product: Dict[str, List] = {}
+        for row in await self._get_current_cost_rows(product_ids):
+            rows_by_product.setdefault(row.product_id, []).append(row)
+        
+        selected: Dict[str, Dict] = {}
+        for product_id in product_ids:
+            try:
+                product = products.get(product_id)
+                if not product:
+                    raise NotFoundError(f"产品 {product_id} 不存在")
+                selected[product_id] = self._choose_supplier(
+                    product,
+                    rows_by_product.get(product_id, []),
+                    preferred_supplier_ids.get(product_id)
+                )
+            except BusinessException as e:
+                logger.warning(f"产品 {product_id} 选择供应商失败: {e.detail}")
+        return selected
+    
+    def _choose_supplier(
+        self,
+        product: Product,
+        rows: List,
+        preferred_supplier_id: Optional[str] = None
+    ) -> Dict:
+        """
+        按选择规则从产品的当前成本价格记录中选择供应商
+        
+        Args:
+            product: 产品
+            rows: 产品的当前成本价格记录（_get_current_cost_rows 的结果，按版本倒序）
+            preferred_supplier_id: 首选供应商ID，可选
+            
+        Returns:
+            供应商成本价格信息
+        """
+        def cost_price(supplier_id: str) -> Dict:
+            # 取交付类型与组织类型一致的最新版本
+            for row in rows:
+                if (
+                    row.supplier_id == supplier_id
+                    and row.delivery_type == _DELIVERY_TYPES.get(row.organization_type)
+                ):
+                    return self._to_cost_price(row)
+            raise NotFoundError(
+                f"产品 {product.id} 的服务提供方 {supplier_id} 未设置成本价格"
+            )
+        
         # 2. 如果不允许多供应商，使用默认供应商
         if not product.allow_multi_vendor:
             if product.default_supplier_id:
-                return await self.get_cost_price(
-                    product_id,
-                    product.default_supplier_id
-                )
+                return cost_price(product.default_supplier_id)
             else:
                 raise BusinessException(
                     detail="产品不允许多供应商但未设置默认供应商"
                 )
         
         # 3. 获取所有可选供应商
-        suppliers = await self.get_available_suppliers(product_id)
-        
-        if not suppliers:
+        if not rows:
             raise NotFoundError("没有可用的服务提供方")
         
         # 4. 如果指定了供应商，使用指定的
         if preferred_supplier_id:
-            for s in suppliers:
-                if s["supplier_id"] == preferred_supplier_id:
-                    return await self.get_cost_price(
-                        product_id,
-                        preferred_supplier_id
-                    )
+            if any(row.supplier_id == preferred_supplier_id for row in rows):
+                return cost_price(preferred_supplier_id)
             raise BusinessException(
                 detail=f"指定的供应商 {preferred_supplier_id} 不可用"
             )
         
         # 5. 选择成本最低的供应商（CNY）
-        suppliers.sort(key=lambda x: x["cost_cny"] or float('inf'))
-        return await self.get_cost_price(
-            product_id,
-            suppliers[0]["supplier_id"]
-        )
+        cheapest = min(rows, key=lambda row: row.cost_cny or float('inf'))
+        return cost_price(cheapest.supplier_id)
@@ -14,6 +14,7 @@ from foundation_service.repositories.product_category_repository import ProductC
 from foundation_service.repositories.vendor_product_repository import VendorProductRepository
 from foundation_service.repositories.service_type_repository import ServiceTypeRepository
 from foundation_service.services.enterprise_service_code_service import EnterpriseServiceCodeService
+from foundation_service.utils.product_dependency_graph import invalidate_product_dependency_graph
 from common.models.product import Product
 from common.exceptions import BusinessException
 
@@ -269,6 +270,8 @@ class ProductService:
         # TODO: 检查是否有订单或其他关联数据使用此产品
         
         await self.product_repo.delete(product)
+        # 数据库级联删除了该产品的依赖关系
+        await invalidate_product_dependency_graph(self.db)
     
     async def get_product_list(
         self,
@@ -1,19 +1,84 @@
 """
 利润计算服务
 """
-from typing import Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import text, bindparam
 
-from common.models.order_item import OrderItem
-from common.models.order import Order
 from common.exceptions import NotFoundError
 from common.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 批量计算时每条查询包含的订单数
+PROFIT_BATCH_SIZE = 1000
+
+# 订单项利润数据：订单项快照 + 预先按订单项汇总的执行报销 + 预先按订单汇总的销售报销
+# （{filter} 为订单项筛选条件，使用别名 {alias}）
+_ITEM_PROFIT_SQL = """
+    SELECT 
+        oi.id AS order_item_id,
+        oi.order_id,
+        oi.currency_code,
+        oi.unit_price,
+        oi.quantity,
+        oi.snapshot_cost_cny,
+        oi.snapshot_cost_idr,
+        COALESCE(item_expense.expense_cny, 0) AS expense_cny,
+        COALESCE(item_expense.expense_idr, 0) AS expense_idr,
+        COALESCE(order_expense.expense_cny, 0) AS order_expense_cny,
+        COALESCE(order_expense.expense_idr, 0) AS order_expense_idr
+    FROM order_items oi
+    LEFT JOIN (
+        SELECT 
+            ber.order_item_id,
+            SUM(CASE WHEN ber.currency = 'CNY' THEN ber.amount ELSE 0 END) AS expense_cny,
+            SUM(CASE WHEN ber.currency = 'IDR' THEN ber.amount ELSE 0 END) AS expense_idr
+        FROM biz_expense_records ber
+        INNER JOIN order_items ei ON ei.id = ber.order_item_id
+        WHERE {expense_item_filter}
+          AND ber.cost_attribution = 'EXECUTION'
+          AND ber.status = 'PAID'
+        GROUP BY ber.order_item_id
+    ) item_expense ON item_expense.order_item_id = oi.id
+    LEFT JOIN (
+        SELECT 
+            ber.order_id,
+            SUM(CASE WHEN ber.currency = 'CNY' THEN ber.amount ELSE 0 END) AS expense_cny,
+            SUM(CASE WHEN ber.currency = 'IDR' THEN ber.amount ELSE 0 END) AS expense_idr
+        FROM biz_expense_records ber
+        WHERE {order_expense_filter}
+          AND ber.cost_attribution = 'SALES'
+          AND ber.status = 'PAID'
+        GROUP BY ber.order_id
+    ) order_expense ON order_expense.order_id = oi.order_id
+    WHERE {item_filter}
+    ORDER BY oi.order_id, oi.item_number
+"""
+
+# 按订单ID批量查询
+_ORDERS_PROFIT_SQL = text(_ITEM_PROFIT_SQL.format(
+    item_filter="oi.order_id IN :order_ids",
+    expense_item_filter="ei.order_id IN :order_ids",
+    order_expense_filter="ber.order_id IN :order_ids",
+)).bindparams(bindparam("order_ids", expanding=True))
+
+# 按订单项ID查询（订单级报销不需要，条件恒为假）
+_ITEM_PROFIT_BY_ID_SQL = text(_ITEM_PROFIT_SQL.format(
+    item_filter="oi.id = :order_item_id",
+    expense_item_filter="ei.id = :order_item_id",
+    order_expense_filter="1 = 0",
+))
+
+
+def _to_decimal(value: Any) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+
+def _profit_rate(profit: Decimal, sales: Decimal) -> Decimal:
+    return profit / sales if sales > 0 else Decimal('0')
+
 
 class ProfitCalculationService:
     """利润计算服务"""
@@ -45,70 +110,45 @@ class ProfitCalculationService:
                 "profit_rate_idr": Decimal
             }
         """
-        # 1. 查询订单项
-        item_result = await self.db.execute(
-            select(OrderItem).where(OrderItem.id == order_item_id)
+        result = await self.db.execute(
+            _ITEM_PROFIT_BY_ID_SQL,
+            {"order_item_id": order_item_id}
         )
-        order_item = item_result.scalar_one_or_none()
+        row = result.fetchone()
         
-        if not order_item:
+        if not row:
             raise NotFoundError(f"订单项 {order_item_id} 不存在")
         
-        # 2. 销售价格（从订单项的快照）
+        return self._item_profit(row)
+    
+    @staticmethod
+    def _item_profit(row: Any) -> Dict:
+        """根据订单项快照和执行报销汇总计算订单项利润"""
+        # 1. 销售价格（从订单项的快照）
         sales_price_cny = Decimal('0')
         sales_price_idr = Decimal('0')
         
-        if order_item.currency_code == "CNY":
-            sales_price_cny = order_item.unit_price or Decimal('0')
-        elif order_item.currency_code == "IDR":
-            sales_price_idr = order_item.unit_price or Decimal('0')
-        
-        # 3. 成本价格（从快照）
-        cost_cny = order_item.snapshot_cost_cny or Decimal('0')
-        cost_idr = order_item.snapshot_cost_idr or Decimal('0')
-        
-        # 4. 浮动成本（报销）
-        from sqlalchemy import text
-        
-        expense_sql = text("""
-            SELECT 
-                COALESCE(SUM(CASE WHEN currency = 'CNY' THEN amount ELSE 0 END), 0) AS expense_cny,
-                COALESCE(SUM(CASE WHEN currency = 'IDR' THEN amount ELSE 0 END), 0) AS expense_idr
-            FROM biz_expense_records
-            WHERE order_item_id = :order_item_id
-              AND cost_attribution = 'EXECUTION'
-              AND status = 'PAID'
-        """)
-        
-        expense_result = await self.db.execute(
-            expense_sql,
-            {"order_item_id": order_item_id}
-        )
-        expense_row = expense_result.fetchone()
+        if row.currency_code == "CNY":
+            sales_price_cny = _to_decimal(row.unit_price)
+        elif row.currency_code == "IDR":
+            sales_price_idr = _to_decimal(row.unit_price)
         
-        expense_cny = Decimal(str(expense_row.expense_cny)) if expense_row else Decimal('0')
-        expense_idr = Decimal(str(expense_row.expense_idr)) if expense_row else Decimal('0')
+        # 2. 成本价格（从快照）
+        cost_cny = _to_decimal(row.snapshot_cost_cny)
+        cost_idr = _to_decimal(row.snapshot_cost_idr)
         
-        # 5. 计算利润
-        quantity = order_item.quantity or 1
+        # 3. 浮动成本（报销）
+        expense_cny = _to_decimal(row.expense_cny)
+        expense_idr = _to_decimal(row.expense_idr)
+        
+        # 4. 计算利润
+        quantity = row.quantity or 1
         profit_cny = (sales_price_cny - cost_cny) * quantity - expense_cny
         profit_idr = (sales_price_idr - cost_idr) * quantity - expense_idr
         
-        # 6. 计算利润率
-        total_sales_cny = sales_price_cny * quantity
-        total_sales_idr = sales_price_idr * quantity
-        
-        profit_rate_cny = (
-            profit_cny / total_sales_cny
-            if total_sales_cny > 0 else Decimal('0')
-        )
-        profit_rate_idr = (
-            profit_idr / total_sales_idr
-            if total_sales_idr > 0 else Decimal('0')
-        )
-        
+        # 5. 计算利润率
         return {
-            "order_item_id": order_item_id,
+            "order_item_id": row.order_item_id,
             "sales_price_cny": sales_price_cny,
             "sales_price_idr": sales_price_idr,
             "cost_cny": cost_cny,
@@ -117,8 +157,8 @@ class ProfitCalculationService:
             "expense_idr": expense_idr,
             "profit_cny": profit_cny,
             "profit_idr": profit_idr,
-            "profit_rate_cny": profit_rate_cny,
-            "profit_rate_idr": profit_rate_idr,
+            "profit_rate_cny": _profit_rate(profit_cny, sales_price_cny * quantity),
+            "profit_rate_idr": _profit_rate(profit_idr, sales_price_idr * quantity),
             "quantity": quantity
         }
     
@@ -150,24 +190,51 @@ class ProfitCalculationService:
                 ]
             }
         """
-        # 1. 查询订单项列表
-        items_result = await self.db.execute(
-            select(OrderItem).where(OrderItem.order_id == order_id)
-        )
-        order_items = items_result.scalars().all()
-        
-        if not order_items:
+        profits = await self.calculate_profits([order_id])
+        if order_id not in profits:
             raise NotFoundError(f"订单 {order_id} 没有订单项")
+        return profits[order_id]
+    
+    async def calculate_profits(self, order_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        批量计算订单利润（财务报表等大批量场景）
+        
+        每 PROFIT_BATCH_SIZE 个订单一条查询：订单项连接预先汇总的订单项报销和订单报销，
+        查询次数与订单项数量无关。
+        
+        Args:
+            order_ids: 订单ID列表
+            
+        Returns:
+            {订单ID: 与 calculate_order_profit 相同的利润信息}；没有订单项的订单不在结果中
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        rows_by_order: Dict[str, List[Any]] = {}
+        for offset in range(0, len(order_ids), PROFIT_BATCH_SIZE):
+            result = await self.db.execute(
+                _ORDERS_PROFIT_SQL,
+                {"order_ids": order_ids[offset:offset + PROFIT_BATCH_SIZE]}
+            )
+            for row in result:
+                rows_by_order.setdefault(row.order_id, []).append(row)
         
-        # 2. 计算所有订单项的利润
+        return {
+            order_id: self._order_profit(order_id, rows_by_order[order_id])
+            for order_id in order_ids
+            if order_id in rows_by_order
+        }
+    
+    def _order_profit(self, order_id: str, rows: List[Any]) -> Dict:
+        """根据订单的订单项数据计算订单利润"""
+        # 1. 计算所有订单项的利润
         total_profit_cny = Decimal('0')
         total_profit_idr = Decimal('0')
         total_sales_cny = Decimal('0')
         total_sales_idr = Decimal('0')
         items_profit = []
         
-        for item in order_items:
-            item_profit = await self.calculate_order_item_profit(item.id)
+        for row in rows:
+            item_profit = self._item_profit(row)
             
             total_profit_cny += item_profit["profit_cny"]
             total_profit_idr += item_profit["profit_idr"]
@@ -175,55 +242,27 @@ class ProfitCalculationService:
             total_sales_idr += item_profit["sales_price_idr"] * item_profit["quantity"]
             
             items_profit.append({
-                "order_item_id": item.id,
+                "order_item_id": item_profit["order_item_id"],
                 "profit_cny": item_profit["profit_cny"],
                 "profit_idr": item_profit["profit_idr"]
             })
         
-        # 3. 订单级浮动成本（报销）
-        from sqlalchemy import text
-        
-        order_expense_sql = text("""
-            SELECT 
-                COALESCE(SUM(CASE WHEN currency = 'CNY' THEN amount ELSE 0 END), 0) AS expense_cny,
-                COALESCE(SUM(CASE WHEN currency = 'IDR' THEN amount ELSE 0 END), 0) AS expense_idr
-            FROM biz_expense_records
-            WHERE order_id = :order_id
-              AND cost_attribution = 'SALES'
-              AND status = 'PAID'
-        """)
-        
-        expense_result = await self.db.execute(
-            order_expense_sql,
-            {"order_id": order_id}
-        )
-        expense_row = expense_result.fetchone()
-        
-        order_expense_cny = Decimal(str(expense_row.expense_cny)) if expense_row else Decimal('0')
-        order_expense_idr = Decimal(str(expense_row.expense_idr)) if expense_row else Decimal('0')
+        # 2. 订单级浮动成本（报销，每个订单项行上都是同一个订单汇总值）
+        order_expense_cny = _to_decimal(rows[0].order_expense_cny)
+        order_expense_idr = _to_decimal(rows[0].order_expense_idr)
         
-        # 4. 计算最终利润
+        # 3. 计算最终利润
         final_profit_cny = total_profit_cny - order_expense_cny
         final_profit_idr = total_profit_idr - order_expense_idr
         
-        # 5. 计算利润率
-        profit_rate_cny = (
-            final_profit_cny / total_sales_cny
-            if total_sales_cny > 0 else Decimal('0')
-        )
-        profit_rate_idr = (
-            final_profit_idr / total_sales_idr
-            if total_sales_idr > 0 else Decimal('0')
-        )
-        
         return {
             "order_id": order_id,
             "total_sales_cny": total_sales_cny,
             "total_sales_idr": total_sales_idr,
             "total_profit_cny": final_profit_cny,
             "total_profit_idr": final_profit_idr,
-            "profit_rate_cny": profit_rate_cny,
-            "profit_rate_idr": profit_rate_idr,
+            "profit_rate_cny": _profit_rate(final_profit_cny, total_sales_cny),
+            "profit_rate_idr": _profit_rate(final_profit_idr, total_sales_idr),
             "order_expense_cny": order_expense_cny,
             "order_expense_idr": order_expense_idr,
             "items": items_profit
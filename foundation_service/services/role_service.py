@@ -9,6 +9,7 @@ from foundation_service.repositories.permission_repository import RolePermission
 from common.models.role import Role
 from common.exceptions import RoleNotFoundError, BusinessException
 from common.utils.logger import get_logger
+from foundation_service.utils.permission_cache import permission_cache, invalidate_menu_caches
 
 logger = get_logger(__name__)
 
@@ -198,4 +199,7 @@ class RoleService:
             raise BusinessException(detail=f"预设角色 {role.code} 不可删除")
         
         await self.role_repo.delete(role)
+        # 角色删除会级联删除角色权限和用户角色关联
+        await permission_cache.invalidate_all(self.db)
+        await invalidate_menu_caches(self.db)
 
@@ -3,7 +3,7 @@
 """
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete
+from sqlalchemy import select
 from foundation_service.schemas.user import (
     UserCreateRequest, UserUpdateRequest, UserResponse, UserListResponse, RoleInfo
 )
@@ -14,7 +14,9 @@ from foundation_service.repositories.role_repository import RoleRepository
 from common.models.user import User
 from common.models.organization_employee import OrganizationEmployee
 from common.models.user_role import UserRole
-from foundation_service.utils.password import hash_password, verify_password
+from foundation_service.utils.password import password_hasher
+from foundation_service.utils.permission_cache import permission_cache
+from foundation_service.utils.auth_context import auth_context_cache
 from common.exceptions import (
     UserNotFoundError, OrganizationNotFoundError, OrganizationInactiveError, 
     BusinessException
@@ -121,7 +123,7 @@ class UserService:
             id=user_id,  # 使用生成的用户ID，而不是UUID
             username=final_username,  # 用户名（前端提供）
             email=email,  # 邮箱（必填，全局唯一，作为唯一标识）
-            password_hash=hash_password(password),
+            password_hash=await password_hasher.hash(password),
             display_name=username or email.split("@")[0],  # 默认显示名称为用户名或邮箱前缀
             is_active=True,
             is_locked=False  # 默认未锁定
@@ -143,6 +145,7 @@ class UserService:
             is_active=True
         )
         await self.employee_repo.create(employee)
+        auth_context_cache.invalidate_user(user.id, self.db)
         
         # 11. 分配角色
         logger.debug(f"分配角色: user_id={user.id}, role_ids={role_ids}")
@@ -250,14 +253,21 @@ class UserService:
         # 更新角色
         if request.role_ids is not None:
             logger.debug(f"更新用户角色: user_id={user_id}, role_ids={request.role_ids}")
-            # 删除旧角色
-            await self.db.execute(
-                delete(UserRole).where(UserRole.user_id == user_id)
+            # 只删除移除的角色、添加新增的角色（通过 ORM 删除，分析计数器可以跟踪角色变更）
+            result = await self.db.execute(
+                select(UserRole).where(UserRole.user_id == user_id)
             )
-            # 添加新角色
-            for role_id in request.role_ids:
-                user_role = UserRole(user_id=user_id, role_id=role_id)
-                self.db.add(user_role)
+            current_roles = {user_role.role_id: user_role for user_role in result.scalars()}
+            new_role_ids = dict.fromkeys(request.role_ids)
+            for role_id, user_role in current_roles.items():
+                if role_id not in new_role_ids:
+                    await self.db.delete(user_role)
+            for role_id in new_role_ids:
+                if role_id not in current_roles:
+                    user_role = UserRole(user_id=user_id, role_id=role_id)
+                    self.db.add(user_role)
+            await permission_cache.invalidate_user(user_id, self.db)
+        auth_context_cache.invalidate_user(user_id, self.db)
         
         user = await self.user_repo.update(user)
         logger.info(f"用户更新成功: id={user.id}, username={user.username}")
@@ -277,6 +287,7 @@ class UserService:
         # 设置 is_locked = True（锁定，禁用登录）
         user.is_locked = True
         await self.user_repo.update(user)
+        auth_context_cache.invalidate_user(user_id, self.db)
         logger.info(f"用户锁定成功: id={user.id}, username={user.username}, is_locked=True")
         return await self._to_response(user)
     
@@ -291,6 +302,7 @@ class UserService:
         # 设置 is_locked = False（正常，允许登录）
         user.is_locked = False
         await self.user_repo.update(user)
+        auth_context_cache.invalidate_user(user_id, self.db)
         logger.info(f"用户解锁成功: id={user.id}, username={user.username}, is_locked=False")
         return await self._to_response(user)
     
@@ -331,13 +343,12 @@ class UserService:
             raise BusinessException(detail="密码必须包含字母和数字")
         
         # 3. 检查新密码是否与旧密码相同
-        from foundation_service.utils.password import verify_password
-        if user.password_hash and verify_password(new_password, user.password_hash):
+        if user.password_hash and await password_hasher.verify(new_password, user.password_hash):
             logger.warning(f"新密码与旧密码相同: user_id={user_id}")
             raise BusinessException(detail="新密码不能与旧密码相同")
         
         # 4. 更新密码
-        user.password_hash = hash_password(new_password)
+        user.password_hash = await password_hasher.hash(new_password)
         await self.user_repo.update(user)
         
         logger.info(f"用户密码重置成功: id={user.id}, username={user.username}")
@@ -364,7 +375,7 @@ class UserService:
             raise UserNotFoundError()
         
         # 2. 验证旧密码
-        if not user.password_hash or not verify_password(old_password, user.password_hash):
+        if not user.password_hash or not await password_hasher.verify(old_password, user.password_hash):
             logger.warning(f"旧密码不正确: user_id={user_id}")
             raise BusinessException(detail="旧密码不正确")
         
@@ -386,12 +397,12 @@ class UserService:
             raise BusinessException(detail="密码必须包含字母和数字")
         
         # 4. 检查新密码是否与旧密码相同
-        if verify_password(new_password, user.password_hash):
+        if await password_hasher.verify(new_password, user.password_hash):
             logger.warning(f"新密码与旧密码相同: user_id={user_id}")
             raise BusinessException(detail="新密码不能与旧密码相同")
         
         # 5. 更新密码
-        user.password_hash = hash_password(new_password)
+        user.password_hash = await password_hasher.hash(new_password)
         await self.user_repo.update(user)
         
         logger.info(f"用户密码修改成功: id={user.id}, username={user.username}")
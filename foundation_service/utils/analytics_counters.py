@@ -0,0 +1,344 @@
+"""
+分析计数器
+客户、用户、组织、服务记录的汇总计数保存在 Redis 哈希中，看板摘要接口直接读取，耗时与表大小无关。
+
+- 增量：会话 flush 后按新增、删除、变更的对象累计增量，事务提交后用 HINCRBY 写入，回滚时丢弃
+- 对账：后台任务启动时及每个周期用全表统计覆盖计数（多进程通过 Redis 锁只执行一次），
+  修正批量 SQL、数据库级联删除等绕过 ORM 的写入造成的偏差；
+  时间窗口类指标（最近30天活跃客户 / 活跃用户）只在对账时更新
+- 哈希中没有对账标记（从未对账或被删除）时视为不可用，读取方回退到全表统计
+"""
+import asyncio
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from common.models.customer import Customer
+from common.models.organization import Organization
+from common.models.organization_employee import OrganizationEmployee
+from common.models.service_record import ServiceRecord
+from common.models.user import User
+from common.models.user_role import UserRole
+from common.redis_client import get_redis
+from common.utils.logger import get_logger
+from foundation_service.config import settings
+
+logger = get_logger(__name__)
+
+# 计数分组
+CUSTOMERS = "customers"
+USERS = "users"
+ORGANIZATIONS = "organizations"
+SERVICE_RECORDS = "service_records"
+
+# 哈希中的对账标记字段（值为最后一次对账的时间戳）
+RECONCILED_AT_FIELD = "_reconciled_at"
+
+# 会话 info 中保存待提交增量的键
+_SESSION_INFO_KEY = "analytics_counter_deltas"
+
+# 计数增量：{(分组, 字段): 增量}
+Deltas = Dict[Tuple[str, str], int]
+
+
+def _category(prefix: str, value: Any) -> List[str]:
+    """分类计数字段（值为空时不计入分类）"""
+    return [f"{prefix}:{value}"] if value is not None else []
+
+
+# 需要计数的模型：模型 -> (分组, 影响计数的属性, 根据属性值得到计数字段)
+_TRACKED_MODELS: Dict[type, Tuple[str, Tuple[str, ...], Callable[[Dict[str, Any]], List[str]]]] = {
+    Customer: (
+        CUSTOMERS,
+        ("customer_type", "customer_source_type"),
+        lambda values: ["total"]
+        + _category("type", values["customer_type"])
+        + _category("source", values["customer_source_type"]),
+    ),
+    User: (USERS, (), lambda values: ["total_users"]),
+    UserRole: (USERS, ("role_id",), lambda values: _category("role", values["role_id"])),
+    Organization: (ORGANIZATIONS, (), lambda values: ["total"]),
+    OrganizationEmployee: (ORGANIZATIONS, (), lambda values: ["total_employees"]),
+    ServiceRecord: (
+        SERVICE_RECORDS,
+        ("sales_user_id",),
+        lambda values: ["total"] + _category("assignee", values["sales_user_id"]),
+    ),
+}
+
+
+def _add(deltas: Deltas, group: str, fields: Iterable[str], amount: int) -> None:
+    for field in fields:
+        deltas[(group, field)] += amount
+
+
+def _current_values(obj: Any, attributes: Tuple[str, ...]) -> Dict[str, Any]:
+    """读取对象当前的属性值（只读已加载的值，不触发数据库查询）"""
+    loaded = inspect(obj).dict
+    return {name: loaded.get(name) for name in attributes}
+
+
+def _previous_values(obj: Any, attributes: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """读取对象 flush 前的属性值；变更前的值未加载时返回 None"""
+    state = inspect(obj)
+    values = {}
+    for name in attributes:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.added:
+            return None
+        else:
+            values[name] = state.dict.get(name)
+    return values
+
+
+def _collect_flush_deltas(session: Session, flush_context: Any) -> None:
+    """after_flush：根据本次 flush 的新增、删除、变更对象累计增量（提交时写入）"""
+    deltas: Optional[Deltas] = None
+    
+    def session_deltas() -> Deltas:
+        nonlocal deltas
+        if deltas is None:
+            deltas = session.info.setdefault(_SESSION_INFO_KEY, defaultdict(int))
+        return deltas
+    
+    for obj in session.new:
+        spec = _TRACKED_MODELS.get(type(obj))
+        if spec is not None:
+            group, attributes, fields = spec
+            _add(session_deltas(), group, fields(_current_values(obj, attributes)), 1)
+    
+    for obj in session.deleted:
+        spec = _TRACKED_MODELS.get(type(obj))
+        if spec is not None:
+            group, attributes, fields = spec
+            previous = _previous_values(obj, attributes) or _current_values(obj, attributes)
+            _add(session_deltas(), group, fields(previous), -1)
+    
+    for obj in session.dirty:
+        spec = _TRACKED_MODELS.get(type(obj))
+        if spec is None or not spec[1]:
+            continue
+        group, attributes, fields = spec
+        previous = _previous_values(obj, attributes)
+        if previous is None:
+            continue
+        current = _current_values(obj, attributes)
+        if previous != current:
+            _add(session_deltas(), group, fields(previous), -1)
+            _add(session_deltas(), group, fields(current), 1)
+
+
+def _apply_after_commit(session: Session) -> None:
+    """after_commit：把会话累计的增量写入 Redis"""
+    deltas = session.info.pop(_SESSION_INFO_KEY, None)
+    if deltas:
+        analytics_counters.schedule_apply(deltas)
+
+
+def _discard_after_rollback(session: Session) -> None:
+    """after_rollback：丢弃未提交的增量"""
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+class AnalyticsCounters:
+    """分析计数器（Redis 哈希 + 提交后增量 + 定期对账）"""
+    
+    def __init__(self, key_prefix: str = "analytics:counters:", reconcile_interval: float = 600.0):
+        """
+        初始化计数器
+        
+        Args:
+            key_prefix: Redis 键前缀（每个分组一个哈希 {key_prefix}{分组}）
+            reconcile_interval: 对账周期（秒），同时是时间窗口类指标的刷新周期
+        """
+        self.key_prefix = key_prefix
+        self.reconcile_interval = reconcile_interval
+        self._task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        # 持有增量写入任务的引用，避免任务在完成前被回收
+        self._pending_tasks: Set[asyncio.Task] = set()
+        
+        # 统计计数
+        self.applied_count = 0
+        self.failed_count = 0
+        self.reconciled_count = 0
+    
+    def _key(self, group: str) -> str:
+        return f"{self.key_prefix}{group}"
+    
+    @property
+    def _reconcile_lock_key(self) -> str:
+        return f"{self.key_prefix}reconcile:lock"
+    
+    @property
+    def is_running(self) -> bool:
+        """后台对账任务是否在运行"""
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """注册会话事件并启动后台对账任务（需在事件循环中调用）"""
+        if self.is_running:
+            return
+        for name, listener in (
+            ("after_flush", _collect_flush_deltas),
+            ("after_commit", _apply_after_commit),
+            ("after_rollback", _discard_after_rollback),
+        ):
+            if not event.contains(Session, name, listener):
+                event.listen(Session, name, listener)
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="analytics-counter-reconciler")
+        logger.info(f"分析计数器已启动: reconcile_interval={self.reconcile_interval}s")
+    
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        停止后台对账任务，并等待未完成的增量写入
+        
+        Args:
+            timeout: 等待的最长时间（秒）
+        """
+        if not self.is_running:
+            return
+        self._stop_event.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+            if self._pending_tasks:
+                await asyncio.wait(set(self._pending_tasks), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning("分析计数器关闭超时")
+        finally:
+            logger.info(f"分析计数器已停止: {self.get_stats()}")
+            self._task = None
+    
+    async def get(self, group: str) -> Optional[Dict[str, int]]:
+        """
+        读取一个分组的全部计数
+        
+        Args:
+            group: 分组
+        
+        Returns:
+            {字段: 计数}（不含对账标记）；未对账或 Redis 不可用时返回 None
+        """
+        try:
+            values = await get_redis().hgetall(self._key(group))
+        except RuntimeError:
+            # Redis 未初始化，静默失败
+            return None
+        except Exception as e:
+            logger.warning(f"读取分析计数失败: group={group}, 错误: {str(e)}")
+            return None
+        if not values or RECONCILED_AT_FIELD not in values:
+            return None
+        return {field: int(value) for field, value in values.items() if field != RECONCILED_AT_FIELD}
+    
+    def schedule_apply(self, deltas: Deltas) -> None:
+        """在后台写入增量（在事务提交回调中调用，不阻塞提交）"""
+        try:
+            task = asyncio.get_running_loop().create_task(self.apply(deltas))
+        except RuntimeError:
+            return
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+    
+    async def apply(self, deltas: Deltas) -> None:
+        """
+        写入增量
+        
+        Args:
+            deltas: {(分组, 字段): 增量}
+        """
+        changes = {key: amount for key, amount in deltas.items() if amount}
+        if not changes:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for (group, field), amount in changes.items():
+                pipe.hincrby(self._key(group), field, amount)
+            await pipe.execute()
+            self.applied_count += len(changes)
+        except RuntimeError:
+            pass
+        except Exception as e:
+            # 写入失败的增量由下一次对账修正
+            self.failed_count += len(changes)
+            logger.warning(f"写入分析计数增量失败: count={len(changes)}, 错误: {str(e)}")
+    
+    async def replace(self, counters: Dict[str, Dict[str, int]]) -> None:
+        """
+        用全表统计结果覆盖计数（对账）
+        
+        Args:
+            counters: {分组: {字段: 计数}}
+        """
+        reconciled_at = str(int(time.time()))
+        pipe = get_redis().pipeline(transaction=True)
+        for group, fields in counters.items():
+            pipe.delete(self._key(group))
+            pipe.hset(self._key(group), mapping={**fields, RECONCILED_AT_FIELD: reconciled_at})
+        await pipe.execute()
+    
+    async def reconcile(self) -> bool:
+        """
+        执行一次对账（同一周期内多个进程只有一个执行）
+        
+        Returns:
+            bool: 是否执行了对账
+        """
+        from foundation_service.database import AsyncSessionLocal
+        from foundation_service.services.analytics_service import AnalyticsService
+        
+        try:
+            acquired = await get_redis().set(
+                self._reconcile_lock_key, "1", nx=True, ex=max(int(self.reconcile_interval), 1)
+            )
+        except RuntimeError:
+            return False
+        if not acquired:
+            return False
+        
+        start_time = time.time()
+        try:
+            async with AsyncSessionLocal() as db:
+                counters = await AnalyticsService(db).compute_counters()
+            await self.replace(counters)
+        except Exception:
+            # 释放锁，让其他进程在下一个周期重试
+            await get_redis().delete(self._reconcile_lock_key)
+            raise
+        self.reconciled_count += 1
+        logger.info(f"分析计数对账完成: 耗时 {(time.time() - start_time) * 1000:.2f}ms")
+        return True
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取计数器统计信息"""
+        return {
+            "pending_tasks": len(self._pending_tasks),
+            "applied": self.applied_count,
+            "failed": self.failed_count,
+            "reconciled": self.reconciled_count,
+        }
+    
+    async def _run(self) -> None:
+        """后台循环：启动时对账一次，之后每个周期对账一次，收到关闭信号时退出"""
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"分析计数对账失败: {str(e)}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.reconcile_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+
+# 全局分析计数器实例
+analytics_counters = AnalyticsCounters(
+    key_prefix=settings.ANALYTICS_COUNTERS_KEY_PREFIX,
+    reconcile_interval=settings.ANALYTICS_COUNTERS_RECONCILE_INTERVAL,
+)
@@ -0,0 +1,369 @@
+"""
+每日分析汇总增量任务
+定期重算 analytics_daily 中发生变化的日期，趋势和收入接口只读取汇总表。
+
+- 首次运行（汇总表为空）时从最早的客户/订单日期开始全量重建
+- 之后每次只重算：上次重算以来新增或更新的客户、订单所在的日期 + 最近 lookback_days 天
+  （覆盖跨越重算时间点的长事务）
+- 删除客户/订单、修改客户所属组织不会留下 updated_at 可扫描的行：会话 flush 后记录被删除对象的创建日期
+  和变更了组织的客户ID，事务提交后写入 Redis 集合，下一次运行时取出并重算（客户ID展开为其订单的创建日期）；
+  Redis 不可用时保留在本进程，由本进程下一次运行处理
+- 绕过 ORM 的批量 SQL 删除不会被记录，需要时清空汇总表触发全量重建
+- 连续日期合并为不超过 chunk_days 天的范围，每个范围一个事务（先删除后插入）
+- 多进程通过 Redis 锁在同一周期内只执行一次；Redis 不可用时直接执行
+"""
+import asyncio
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from common.models.customer import Customer
+from common.models.order import Order
+from common.redis_client import get_redis
+from common.utils.logger import get_logger
+from foundation_service.config import settings
+
+logger = get_logger(__name__)
+
+# 会话 info 中保存待提交变更的键（值为 (日期集合, 客户ID集合)）
+_SESSION_INFO_KEY = "analytics_daily_dirty"
+
+
+def _to_ranges(dates: Iterable[date], chunk_days: int) -> List[Tuple[date, date]]:
+    """把日期集合合并为连续范围（每个范围不超过 chunk_days 天）"""
+    ranges: List[Tuple[date, date]] = []
+    for day in sorted(set(dates)):
+        if ranges:
+            start, end = ranges[-1]
+            if day == end + timedelta(days=1) and (day - start).days < chunk_days:
+                ranges[-1] = (start, day)
+                continue
+        ranges.append((day, day))
+    return ranges
+
+
+def _previous_value(obj: Any, name: str) -> Any:
+    """读取对象 flush 前的属性值（只读已加载的值，不触发数据库查询）"""
+    state = inspect(obj)
+    history = state.attrs[name].history
+    return history.deleted[0] if history.deleted else state.dict.get(name)
+
+
+def _collect_flush_changes(session: Session, flush_context: Any) -> None:
+    """after_flush：记录被删除的客户、订单的创建日期，以及变更了所属组织的客户ID（提交时写入）"""
+    changes: Optional[Tuple[Set[date], Set[str]]] = None
+    
+    def session_changes() -> Tuple[Set[date], Set[str]]:
+        nonlocal changes
+        if changes is None:
+            changes = session.info.setdefault(_SESSION_INFO_KEY, (set(), set()))
+        return changes
+    
+    for obj in session.deleted:
+        if isinstance(obj, (Customer, Order)):
+            created_at = _previous_value(obj, "created_at")
+            if created_at is not None:
+                session_changes()[0].add(created_at.date())
+    
+    for obj in session.dirty:
+        if isinstance(obj, (Customer, Order)):
+            # 创建日期被修改时，原日期的汇总也需要重算
+            created_at_history = inspect(obj).attrs.created_at.history
+            if created_at_history.deleted and created_at_history.deleted[0] is not None:
+                session_changes()[0].add(created_at_history.deleted[0].date())
+        if isinstance(obj, Customer) and inspect(obj).attrs.organization_id.history.has_changes():
+            session_changes()[1].add(obj.id)
+
+
+def _mark_after_commit(session: Session) -> None:
+    """after_commit：把会话记录的日期和客户ID写入待重算集合"""
+    changes = session.info.pop(_SESSION_INFO_KEY, None)
+    if changes and (changes[0] or changes[1]):
+        analytics_daily_rollup.schedule_mark(*changes)
+
+
+def _discard_after_rollback(session: Session) -> None:
+    """after_rollback：丢弃未提交的变更"""
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+class AnalyticsDailyRollup:
+    """每日分析汇总增量任务（定时重算变化的日期）"""
+    
+    def __init__(
+        self,
+        interval: float = 300.0,
+        lookback_days: int = 2,
+        chunk_days: int = 31,
+        key_prefix: str = "analytics:daily:",
+    ):
+        """
+        初始化任务
+        
+        Args:
+            interval: 运行周期（秒）
+            lookback_days: 每次固定重算的最近天数（包含今天）
+            chunk_days: 单个事务重算的最大天数
+            key_prefix: Redis 键前缀（锁和待重算集合）
+        """
+        self.interval = interval
+        self.lookback_days = lookback_days
+        self.chunk_days = chunk_days
+        self.key_prefix = key_prefix
+        self._task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        # 持有写入待重算集合任务的引用，避免任务在完成前被回收
+        self._pending_tasks: Set[asyncio.Task] = set()
+        # 尚未写入 Redis 的待重算日期和客户ID
+        self._dirty_dates: Set[date] = set()
+        self._dirty_customer_ids: Set[str] = set()
+        
+        # 统计计数
+        self.run_count = 0
+        self.rebuilt_days = 0
+        self.failed_count = 0
+    
+    @property
+    def _lock_key(self) -> str:
+        return f"{self.key_prefix}lock"
+    
+    @property
+    def _dirty_dates_key(self) -> str:
+        return f"{self.key_prefix}dirty:dates"
+    
+    @property
+    def _dirty_customers_key(self) -> str:
+        return f"{self.key_prefix}dirty:customers"
+    
+    @property
+    def is_running(self) -> bool:
+        """后台任务是否在运行"""
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """注册会话事件并启动后台任务（需在事件循环中调用）"""
+        if self.is_running:
+            return
+        for name, listener in (
+            ("after_flush", _collect_flush_changes),
+            ("after_commit", _mark_after_commit),
+            ("after_rollback", _discard_after_rollback),
+        ):
+            if not event.contains(Session, name, listener):
+                event.listen(Session, name, listener)
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="analytics-daily-rollup")
+        logger.info(
+            f"每日分析汇总任务已启动: interval={self.interval}s, "
+            f"lookback={self.lookback_days}d, chunk={self.chunk_days}d"
+        )
+    
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        停止后台任务（正在执行的重算和待重算集合的写入最多等待 timeout 秒）
+        
+        Args:
+            timeout: 等待的最长时间（秒）
+        """
+        if not self.is_running:
+            return
+        self._stop_event.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+            if self._pending_tasks:
+                await asyncio.wait(set(self._pending_tasks), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning("每日分析汇总任务关闭超时")
+        finally:
+            logger.info(f"每日分析汇总任务已停止: {self.get_stats()}")
+            self._task = None
+    
+    def schedule_mark(self, dates: Iterable[date], customer_ids: Iterable[str]) -> None:
+        """在后台写入待重算集合（在事务提交回调中调用，不阻塞提交）"""
+        self._dirty_dates.update(dates)
+        self._dirty_customer_ids.update(customer_ids)
+        try:
+            task = asyncio.get_running_loop().create_task(self._flush_dirty())
+        except RuntimeError:
+            return
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+    
+    async def _flush_dirty(self) -> None:
+        """把本进程记录的待重算日期和客户ID写入 Redis（失败时保留在本进程，下一次重试）"""
+        dates, customer_ids = self._dirty_dates, self._dirty_customer_ids
+        if not dates and not customer_ids:
+            return
+        self._dirty_dates, self._dirty_customer_ids = set(), set()
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            if dates:
+                pipe.sadd(self._dirty_dates_key, *(day.isoformat() for day in dates))
+            if customer_ids:
+                pipe.sadd(self._dirty_customers_key, *customer_ids)
+            await pipe.execute()
+        except Exception as e:
+            self._dirty_dates.update(dates)
+            self._dirty_customer_ids.update(customer_ids)
+            if not isinstance(e, RuntimeError):
+                logger.warning(
+                    f"写入每日汇总待重算集合失败: dates={len(dates)}, customers={len(customer_ids)}, "
+                    f"错误: {str(e)}"
+                )
+    
+    async def _take_dirty(self) -> Tuple[Set[date], Set[str]]:
+        """取出待重算的日期和客户ID（Redis 集合 + 本进程尚未写入 Redis 的部分）"""
+        dates, customer_ids = self._dirty_dates, self._dirty_customer_ids
+        self._dirty_dates, self._dirty_customer_ids = set(), set()
+        try:
+            pipe = get_redis().pipeline(transaction=True)
+            pipe.smembers(self._dirty_dates_key)
+            pipe.smembers(self._dirty_customers_key)
+            pipe.delete(self._dirty_dates_key, self._dirty_customers_key)
+            redis_dates, redis_customer_ids, _ = await pipe.execute()
+        except RuntimeError:
+            # Redis 未初始化，只处理本进程记录的部分
+            return dates, customer_ids
+        except Exception:
+            self._restore_dirty(dates, customer_ids)
+            raise
+        dates.update(date.fromisoformat(value) for value in redis_dates)
+        customer_ids.update(redis_customer_ids)
+        return dates, customer_ids
+    
+    def _restore_dirty(self, dates: Iterable[date], customer_ids: Iterable[str]) -> None:
+        """重算失败时放回待重算集合（下一次运行时重试）"""
+        self._dirty_dates.update(dates)
+        self._dirty_customer_ids.update(customer_ids)
+    
+    async def run_once(self) -> int:
+        """
+        执行一次增量重算（同一周期内多个进程只有一个执行）
+        
+        Returns:
+            int: 重算的天数；其他进程已在本周期执行时返回 0
+        """
+        # 先把本进程未写入的待重算集合写入 Redis，由本周期执行的进程处理
+        await self._flush_dirty()
+        try:
+            acquired = await get_redis().set(
+                self._lock_key, "1", nx=True, ex=max(int(self.interval), 1)
+            )
+            if not acquired:
+                return 0
+        except RuntimeError:
+            # Redis 未初始化，直接执行
+            pass
+        
+        try:
+            return await self._rebuild_changed_dates()
+        except Exception:
+            # 释放锁，让其他进程在下一个周期重试
+            try:
+                await get_redis().delete(self._lock_key)
+            except Exception:
+                pass
+            raise
+    
+    async def _rebuild_changed_dates(self) -> int:
+        """找出需要重算的日期并按范围重算"""
+        from foundation_service.database import AsyncSessionLocal
+        from foundation_service.repositories.analytics_daily_repository import AnalyticsDailyRepository
+        
+        start_time = time.time()
+        dirty_dates, dirty_customer_ids = await self._take_dirty()
+        try:
+            days, ranges, rows = await self._rebuild(dirty_dates, dirty_customer_ids)
+        except Exception:
+            self._restore_dirty(dirty_dates, dirty_customer_ids)
+            raise
+        
+        self.run_count += 1
+        self.rebuilt_days += days
+        logger.info(
+            f"每日分析汇总完成: 重算 {days} 天 / {ranges} 个范围, 写入 {rows} 行, "
+            f"耗时 {(time.time() - start_time) * 1000:.2f}ms"
+        )
+        return days
+    
+    async def _rebuild(self, dirty_dates: Set[date], dirty_customer_ids: Set[str]) -> Tuple[int, int, int]:
+        """
+        重算变化的日期
+        
+        Args:
+            dirty_dates: 删除等操作记录的待重算日期
+            dirty_customer_ids: 变更了所属组织的客户ID（重算其订单的创建日期）
+        
+        Returns:
+            (重算天数, 范围数, 写入行数)
+        """
+        from foundation_service.database import AsyncSessionLocal
+        from foundation_service.repositories.analytics_daily_repository import AnalyticsDailyRepository
+        
+        async with AsyncSessionLocal() as db:
+            repo = AnalyticsDailyRepository(db)
+            rebuilt_at = await repo.get_database_now()
+            today = rebuilt_at.date()
+            watermark = await repo.get_watermark()
+            
+            if watermark is None:
+                first_date = await repo.get_data_start_date()
+                if first_date is None:
+                    return 0, 0, 0
+                dates = {first_date + timedelta(days=offset) for offset in range((today - first_date).days + 1)}
+                logger.info(f"每日分析汇总表为空，从 {first_date} 开始全量重建")
+            else:
+                dates = await repo.get_changed_dates(watermark)
+                dates.update(today - timedelta(days=offset) for offset in range(self.lookback_days))
+                dates.update(dirty_dates)
+                if dirty_customer_ids:
+                    dates.update(await repo.get_customer_order_dates(dirty_customer_ids))
+            
+            ranges = _to_ranges((day for day in dates if day <= today), self.chunk_days)
+            rows = 0
+            for start_date, end_date in ranges:
+                try:
+                    rows += await repo.rebuild_range(start_date, end_date, rebuilt_at)
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    if watermark is None:
+                        # 全量重建中途失败：清空已写入的范围，下一次重新全量重建
+                        await repo.clear()
+                        await db.commit()
+                    raise
+        
+        return sum((end - start).days + 1 for start, end in ranges), len(ranges), rows
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取任务统计信息"""
+        return {
+            "runs": self.run_count,
+            "rebuilt_days": self.rebuilt_days,
+            "failed": self.failed_count,
+        }
+    
+    async def _run(self) -> None:
+        """后台循环：启动时执行一次，之后每个周期执行一次，收到关闭信号时退出"""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.failed_count += 1
+                logger.error(f"每日分析汇总失败: {str(e)}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+
+# 全局每日分析汇总任务实例
+analytics_daily_rollup = AnalyticsDailyRollup(
+    interval=settings.ANALYTICS_ROLLUP_INTERVAL,
+    lookback_days=settings.ANALYTICS_ROLLUP_LOOKBACK_DAYS,
+    chunk_days=settings.ANALYTICS_ROLLUP_CHUNK_DAYS,
+    key_prefix=f"{settings.CACHE_KEY_PREFIX}daily:",
+)
@@ -0,0 +1,168 @@
+"""
+审计日志异步批量写入器
+请求路径只负责入队，后台任务按批次写入 audit_logs 表
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from foundation_service.config import settings
+from common.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 关闭信号（写入队列后后台任务写完剩余记录即退出）
+_STOP = object()
+
+
+class AuditLogWriter:
+    """审计日志异步批量写入器（有界队列 + 后台写入任务）"""
+    
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+    ):
+        """
+        初始化写入器
+        
+        Args:
+            max_queue_size: 队列最大长度，队列满时新记录被丢弃并计数
+            batch_size: 单次批量写入的最大记录数
+            flush_interval: 凑批的最长等待时间（秒）
+        """
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        
+        # 统计计数
+        self.enqueued_count = 0
+        self.written_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+    
+    @property
+    def is_running(self) -> bool:
+        """后台写入任务是否在运行"""
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """启动后台写入任务（需在事件循环中调用）"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run(), name="audit-log-writer")
+        logger.info(
+            f"审计日志写入器已启动: queue={self.max_queue_size}, "
+            f"batch={self.batch_size}, interval={self.flush_interval}s"
+        )
+    
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        停止后台写入任务，并在超时前写完队列中剩余的记录
+        
+        Args:
+            timeout: 等待剩余记录写入的最长时间（秒）
+        """
+        if not self.is_running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.put(_STOP), timeout=timeout)
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning(f"审计日志写入器关闭超时，剩余 {self._queue.qsize()} 条记录未写入")
+        finally:
+            logger.info(f"审计日志写入器已停止: {self.get_stats()}")
+            self._task = None
+    
+    def enqueue(self, record: Dict[str, Any]) -> bool:
+        """
+        将审计记录放入队列（非阻塞）
+        
+        Args:
+            record: audit_logs 表字段字典
+        
+        Returns:
+            bool: 是否成功入队；队列已满或写入器未启动时返回 False
+        """
+        if not self.is_running:
+            self.dropped_count += 1
+            return False
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped_count += 1
+            if self.dropped_count % 1000 == 1:
+                logger.warning(f"审计日志队列已满，已丢弃 {self.dropped_count} 条记录")
+            return False
+        self.enqueued_count += 1
+        return True
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取写入器统计信息"""
+        return {
+            "queue_size": self._queue.qsize() if self._queue else 0,
+            "enqueued": self.enqueued_count,
+            "written": self.written_count,
+            "dropped": self.dropped_count,
+            "failed": self.failed_count,
+        }
+    
+    async def _run(self) -> None:
+        """后台循环：凑批后写入，收到关闭信号时写完当前批次退出"""
+        while True:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._write_batch(batch)
+            if stopping:
+                return
+    
+    async def _next_batch(self) -> tuple[List[Dict[str, Any]], bool]:
+        """等待第一条记录，然后在 flush_interval 内尽量凑满一个批次"""
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+        
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+    
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """使用独立会话批量写入一个批次"""
+        from foundation_service.database import AsyncSessionLocal
+        from foundation_service.repositories.audit_repository import AuditRepository
+        
+        try:
+            async with AsyncSessionLocal() as db:
+                try:
+                    written = await AuditRepository(db).bulk_create_audit_logs(batch)
+                    await db.commit()
+                    self.written_count += written
+                except Exception:
+                    await db.rollback()
+                    raise
+        except Exception as e:
+            self.failed_count += len(batch)
+            logger.error(f"批量写入审计日志失败: count={len(batch)}, error={str(e)}", exc_info=True)
+
+
+# 全局审计日志写入器实例
+audit_writer = AuditLogWriter(
+    max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+)
@@ -0,0 +1,169 @@
+"""
+认证上下文
+汇总当前用户、主要组织、组织类型和角色编码，供依赖注入和服务层共用，避免同一请求内重复查询。
+
+- 请求级：保存在请求数据库会话的 info 中（会话与请求一一对应），同一请求内最多构建一次
+- 进程级：按用户ID缓存在短 TTL 的 LRU 中，角色、组织变更时在本进程内立即失效，
+  其他进程依靠 TTL 收敛
+"""
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from common.models.organization import Organization
+from common.models.organization_employee import OrganizationEmployee
+from common.utils.lru_cache import TTLLRUCache
+from common.utils.logger import get_logger
+from foundation_service.config import settings
+from foundation_service.repositories.organization_repository import OrganizationRepository
+from foundation_service.repositories.user_repository import UserRepository
+
+logger = get_logger(__name__)
+
+# 会话 info 中保存请求级上下文的键
+_SESSION_INFO_KEY = "auth_contexts"
+
+# BANTU 组织ID在进程缓存中的键（不会与用户ID冲突）
+_BANTU_ORG_KEY = "__bantu_organization__"
+
+
+@dataclass(frozen=True)
+class AuthContext:
+    """认证上下文（只读快照，不持有 ORM 对象，可跨会话缓存）"""
+    user_id: str
+    username: Optional[str]
+    display_name: Optional[str]
+    is_active: bool
+    is_locked: bool
+    primary_organization_id: Optional[str]
+    organization_type: Optional[str]
+    is_bantu: bool
+    role_codes: FrozenSet[str]
+    
+    @property
+    def is_admin(self) -> bool:
+        """是否拥有 ADMIN 角色"""
+        return "ADMIN" in self.role_codes
+    
+    @property
+    def is_bantu_admin(self) -> bool:
+        """是否是 BANTU 组织的 admin"""
+        return self.is_bantu and self.is_admin
+    
+    @property
+    def is_internal_admin(self) -> bool:
+        """是否是 internal 内部组织的 admin"""
+        return self.organization_type == "internal" and self.is_admin
+
+
+class AuthContextCache:
+    """认证上下文缓存（请求级 + 进程内短 TTL LRU）"""
+    
+    def __init__(self, local_size: int = 10000, local_ttl: float = 10.0):
+        """
+        初始化缓存
+        
+        Args:
+            local_size: 进程内 LRU 最大用户数
+            local_ttl: 进程内条目过期时间（秒），限制跨进程变更的陈旧时间
+        """
+        self._local: TTLLRUCache[str, object] = TTLLRUCache(maxsize=local_size, ttl=local_ttl)
+    
+    async def get(self, db: AsyncSession, user_id: str) -> Optional[AuthContext]:
+        """
+        获取用户的认证上下文
+        
+        Args:
+            db: 当前请求的数据库会话
+            user_id: 用户ID
+        
+        Returns:
+            认证上下文；用户不存在时返回 None
+        """
+        request_contexts: Dict[str, Optional[AuthContext]] = db.info.setdefault(_SESSION_INFO_KEY, {})
+        if user_id in request_contexts:
+            return request_contexts[user_id]
+        
+        context = self._local.get(user_id)
+        if context is None:
+            context = await self._load(db, user_id)
+            if context is not None:
+                self._local.set(user_id, context)
+        request_contexts[user_id] = context
+        return context
+    
+    def invalidate_user(self, user_id: str, db: Optional[AsyncSession] = None) -> None:
+        """
+        使单个用户的认证上下文失效（用户角色、状态、组织关系变更时调用）
+        
+        Args:
+            user_id: 用户ID
+            db: 当前请求的数据库会话；传入时同时清除请求级上下文
+        """
+        self._local.pop(user_id)
+        if db is not None:
+            db.info.get(_SESSION_INFO_KEY, {}).pop(user_id, None)
+    
+    def invalidate_all(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        使所有认证上下文失效（组织类型、编码等变更时调用）
+        
+        Args:
+            db: 当前请求的数据库会话；传入时同时清除请求级上下文
+        """
+        self._local.clear()
+        if db is not None:
+            db.info.pop(_SESSION_INFO_KEY, None)
+    
+    async def _load(self, db: AsyncSession, user_id: str) -> Optional[AuthContext]:
+        """从数据库加载认证上下文（用户、主要组织及类型、角色编码）"""
+        user_repo = UserRepository(db)
+        user = await user_repo.get_by_id(user_id)
+        if not user:
+            return None
+        
+        result = await db.execute(
+            select(OrganizationEmployee.organization_id, Organization.organization_type)
+            .join(Organization, Organization.id == OrganizationEmployee.organization_id)
+            .where(
+                OrganizationEmployee.user_id == user_id,
+                OrganizationEmployee.is_primary == True,
+                OrganizationEmployee.is_active == True
+            )
+        )
+        primary = result.first()
+        organization_id, organization_type = primary if primary else (None, None)
+        
+        roles = await user_repo.get_user_roles(user_id)
+        bantu_org_id = await self.get_bantu_organization_id(db) if organization_id else None
+        
+        logger.debug(f"加载认证上下文: user_id={user_id}, organization_id={organization_id}")
+        return AuthContext(
+            user_id=user.id,
+            username=user.username,
+            display_name=user.display_name,
+            is_active=bool(user.is_active),
+            is_locked=bool(user.is_locked),
+            primary_organization_id=organization_id,
+            organization_type=organization_type,
+            is_bantu=bantu_org_id is not None and organization_id == bantu_org_id,
+            role_codes=frozenset(role.code for role in roles),
+        )
+    
+    async def get_bantu_organization_id(self, db: AsyncSession) -> Optional[str]:
+        """获取 BANTU 组织ID（与用户上下文一起缓存），不存在时返回 None"""
+        bantu_org_id = self._local.get(_BANTU_ORG_KEY)
+        if bantu_org_id is None:
+            bantu_org = await OrganizationRepository(db).get_bantu_organization()
+            if not bantu_org:
+                return None
+            bantu_org_id = bantu_org.id
+            self._local.set(_BANTU_ORG_KEY, bantu_org_id)
+        return bantu_org_id
+
+
+# 全局认证上下文缓存实例
+auth_context_cache = AuthContextCache(
+    local_size=settings.AUTH_CONTEXT_CACHE_SIZE,
+    local_ttl=settings.AUTH_CONTEXT_CACHE_TTL,
+)
@@ -0,0 +1,158 @@
+"""
+最后登录时间异步批量写入器
+登录请求只记录到内存，后台任务定期批量更新 users.last_login_at，
+同一用户在一个周期内多次登录只写入最后一次
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional
+from foundation_service.config import settings
+from common.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LastLoginWriter:
+    """最后登录时间异步批量写入器（按用户合并 + 定时批量写入）"""
+    
+    def __init__(
+        self,
+        max_pending: int = 50000,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+    ):
+        """
+        初始化写入器
+        
+        Args:
+            max_pending: 最多等待写入的用户数，超出时新记录被丢弃并计数
+            batch_size: 单次批量更新的最大用户数
+            flush_interval: 写入周期（秒）
+        """
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        
+        # 统计计数
+        self.recorded_count = 0
+        self.written_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+    
+    @property
+    def is_running(self) -> bool:
+        """后台写入任务是否在运行"""
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """启动后台写入任务（需在事件循环中调用）"""
+        if self.is_running:
+            return
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="last-login-writer")
+        logger.info(
+            f"最后登录时间写入器已启动: pending={self.max_pending}, "
+            f"batch={self.batch_size}, interval={self.flush_interval}s"
+        )
+    
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        停止后台写入任务，并在超时前写完剩余的记录
+        
+        Args:
+            timeout: 等待剩余记录写入的最长时间（秒）
+        """
+        if not self.is_running:
+            return
+        self._stop_event.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning(f"最后登录时间写入器关闭超时，剩余 {len(self._pending)} 条记录未写入")
+        finally:
+            logger.info(f"最后登录时间写入器已停止: {self.get_stats()}")
+            self._task = None
+    
+    def record(self, user_id: str, login_at: datetime) -> bool:
+        """
+        记录用户的最后登录时间（非阻塞）
+        
+        Args:
+            user_id: 用户ID
+            login_at: 登录时间（UTC）
+        
+        Returns:
+            bool: 是否成功记录；写入器未启动或等待写入的用户数已满时返回 False，
+                  调用方应直接更新数据库
+        """
+        if not self.is_running:
+            return False
+        if user_id not in self._pending and len(self._pending) >= self.max_pending:
+            self.dropped_count += 1
+            if self.dropped_count % 1000 == 1:
+                logger.warning(f"最后登录时间队列已满，已丢弃 {self.dropped_count} 条记录")
+            return False
+        self._pending[user_id] = login_at
+        self.recorded_count += 1
+        return True
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取写入器统计信息"""
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded_count,
+            "written": self.written_count,
+            "dropped": self.dropped_count,
+            "failed": self.failed_count,
+        }
+    
+    async def _run(self) -> None:
+        """后台循环：每个周期写入一次，收到关闭信号时写完剩余记录退出"""
+        while True:
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.flush_interval)
+                stopping = True
+            except asyncio.TimeoutError:
+                stopping = False
+            await self._flush()
+            if stopping:
+                return
+    
+    async def _flush(self) -> None:
+        """取出当前所有记录，按 batch_size 分批写入"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            await self._write_batch(dict(items[start:start + self.batch_size]))
+    
+    async def _write_batch(self, batch: Dict[str, datetime]) -> None:
+        """使用独立会话批量写入一个批次"""
+        from foundation_service.database import AsyncSessionLocal
+        from foundation_service.repositories.user_repository import UserRepository
+        
+        try:
+            async with AsyncSessionLocal() as db:
+                try:
+                    written = await UserRepository(db).bulk_update_last_login(batch)
+                    await db.commit()
+                    self.written_count += written
+                except Exception:
+                    await db.rollback()
+                    raise
+        except Exception as e:
+            self.failed_count += len(batch)
+            logger.error(f"批量更新最后登录时间失败: count={len(batch)}, error={str(e)}", exc_info=True)
+
+
+# 全局最后登录时间写入器实例
+last_login_writer = LastLoginWriter(
+    max_pending=settings.LAST_LOGIN_MAX_PENDING,
+    batch_size=settings.LAST_LOGIN_BATCH_SIZE,
+    flush_interval=settings.LAST_LOGIN_FLUSH_INTERVAL,
+)
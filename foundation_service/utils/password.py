@@ -1,8 +1,20 @@
 """
 密码工具类
 直接使用 bcrypt 库，避免 passlib 的初始化问题
+
+bcrypt 每次计算需要 100~300ms，异步代码中通过 password_hasher 在专用的有界线程池中执行，
+避免阻塞事件循环；同步函数保留给脚本和线程池内部使用。
 """
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
 import bcrypt
+from common.exceptions import PasswordServiceBusyError
+from common.utils.logger import get_logger
+from foundation_service.config import settings
+
+logger = get_logger(__name__)
 
 
 def hash_password(password: str) -> str:
@@ -24,3 +36,104 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         return False
 
+
+class PasswordHasher:
+    """
+    密码哈希执行器（专用有界线程池）
+    
+    bcrypt 计算期间释放 GIL，线程池内可以并行执行；
+    等待中的任务数超过 max_pending 时直接拒绝，避免登录高峰时排队无限增长。
+    """
+    
+    def __init__(self, max_workers: int = 4, max_pending: int = 256):
+        """
+        初始化执行器
+        
+        Args:
+            max_workers: 线程池大小
+            max_pending: 最多允许提交但未完成的任务数（含执行中），超出时抛出 PasswordServiceBusyError
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        
+        # 当前状态（_pending 只在事件循环线程修改，_running 在工作线程修改）
+        self._pending = 0
+        self._running = 0
+        
+        # 统计计数
+        self.submitted_count = 0
+        self.rejected_count = 0
+        self.peak_queue_depth = 0
+    
+    @property
+    def queue_depth(self) -> int:
+        """排队等待线程的任务数"""
+        return max(self._pending - self._running, 0)
+    
+    async def hash(self, password: str) -> str:
+        """在线程池中加密密码"""
+        return await self._submit(hash_password, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """在线程池中验证密码"""
+        return await self._submit(verify_password, plain_password, hashed_password)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取执行器统计信息"""
+        return {
+            "queue_depth": self.queue_depth,
+            "running": self._running,
+            "pending": self._pending,
+            "peak_queue_depth": self.peak_queue_depth,
+            "submitted": self.submitted_count,
+            "rejected": self.rejected_count,
+        }
+    
+    def shutdown(self) -> None:
+        """关闭线程池（等待执行中的任务完成）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            logger.info(f"密码哈希线程池已关闭: {self.get_stats()}")
+    
+    async def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        """提交任务到线程池并等待结果"""
+        if self._pending >= self.max_pending:
+            self.rejected_count += 1
+            if self.rejected_count % 100 == 1:
+                logger.warning(f"密码哈希队列已满，已拒绝 {self.rejected_count} 个请求: {self.get_stats()}")
+            raise PasswordServiceBusyError()
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hasher"
+            )
+        
+        self._pending += 1
+        self.submitted_count += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._run, func, args
+            )
+        finally:
+            self._pending -= 1
+    
+    def _run(self, func: Callable[..., Any], args: tuple) -> Any:
+        """工作线程中执行，维护执行中的任务数"""
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+
+# 全局密码哈希执行器实例
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,351 @@
+"""
+权限与菜单缓存
+缓存内容保存在进程内 LRU 和 Redis 中，通过 Redis 版本号实现跨进程失效，
+缓存键包含版本号，版本号递增后旧条目自然失效。
+
+- 用户有效权限（frozenset 权限编码）：
+  全局版本号（角色权限、权限状态、角色删除）+ 用户版本号（用户角色变更）
+- 菜单树 / 按角色集合的可访问菜单树：菜单版本号（菜单、菜单权限、角色权限、权限变更）
+"""
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, FrozenSet, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from common.redis_client import get_redis
+from common.utils.lru_cache import TTLLRUCache
+from common.utils.logger import get_logger
+from foundation_service.config import settings
+from foundation_service.schemas.permission import MenuResponse, UserMenuResponse
+
+logger = get_logger(__name__)
+
+# 缓存版本（全局版本号, 用户版本号）；Redis 不可用时为 None
+CacheVersion = Optional[Tuple[int, int]]
+
+T = TypeVar("T")
+
+
+def run_after_commit(db: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """
+    在会话事务提交后执行异步回调
+    
+    失效操作在写入时立即执行一次，提交后再执行一次：
+    请求结束后才提交事务，提交前其他请求可能用旧数据回填缓存。
+    
+    Args:
+        db: 数据库会话
+        callback: 提交后执行的异步回调
+    """
+    def _on_commit(session) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(callback())
+        except RuntimeError:
+            return
+        _pending_tasks.add(task)
+        task.add_done_callback(_pending_tasks.discard)
+    
+    event.listen(db.sync_session, "after_commit", _on_commit, once=True)
+
+
+# 持有提交后回调任务的引用，避免任务在完成前被回收
+_pending_tasks: Set[asyncio.Task] = set()
+
+
+class PermissionCache:
+    """用户有效权限缓存（进程内 LRU + Redis + 版本号失效）"""
+    
+    def __init__(
+        self,
+        key_prefix: str = "perm:",
+        redis_ttl: int = 3600,
+        local_size: int = 10000,
+        local_ttl: float = 60.0,
+    ):
+        """
+        初始化缓存
+        
+        Args:
+            key_prefix: Redis 键前缀
+            redis_ttl: Redis 中权限集合的过期时间（秒）
+            local_size: 进程内 LRU 最大用户数
+            local_ttl: 进程内条目过期时间（秒），Redis 不可用时限制跨进程的陈旧时间
+        """
+        self.key_prefix = key_prefix
+        self.redis_ttl = redis_ttl
+        self._local: TTLLRUCache[str, Tuple[CacheVersion, FrozenSet[str]]] = TTLLRUCache(
+            maxsize=local_size, ttl=local_ttl
+        )
+    
+    @property
+    def _global_version_key(self) -> str:
+        return f"{self.key_prefix}version"
+    
+    def _user_version_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}version:user:{user_id}"
+    
+    def _codes_key(self, user_id: str, version: Tuple[int, int]) -> str:
+        return f"{self.key_prefix}codes:{user_id}:{version[0]}:{version[1]}"
+    
+    async def get(self, user_id: str) -> Tuple[Optional[FrozenSet[str]], CacheVersion]:
+        """
+        获取用户的权限编码集合
+        
+        Args:
+            user_id: 用户ID
+        
+        Returns:
+            (权限编码集合, 当前版本)；未命中时权限编码集合为 None，
+            调用方从数据库加载后用同一个版本调用 set()
+        """
+        version = await self._get_version(user_id)
+        entry = self._local.get(user_id)
+        if entry is not None and (version is None or entry[0] == version):
+            return entry[1], version
+        
+        if version is not None:
+            try:
+                cached = await get_redis().get(self._codes_key(user_id, version))
+                if cached is not None:
+                    codes = frozenset(json.loads(cached))
+                    self._local.set(user_id, (version, codes))
+                    return codes, version
+            except Exception as e:
+                logger.warning(f"读取权限缓存失败: user_id={user_id}, 错误: {str(e)}")
+        
+        return None, version
+    
+    async def set(self, user_id: str, version: CacheVersion, codes: Iterable[str]) -> FrozenSet[str]:
+        """
+        写入用户的权限编码集合
+        
+        Args:
+            user_id: 用户ID
+            version: get() 返回的版本（加载数据前读取，保证并发失效时不会写入旧数据）
+            codes: 权限编码
+        
+        Returns:
+            权限编码集合
+        """
+        codes = frozenset(codes)
+        self._local.set(user_id, (version, codes))
+        if version is not None:
+            try:
+                await get_redis().setex(
+                    self._codes_key(user_id, version),
+                    self.redis_ttl,
+                    json.dumps(sorted(codes)),
+                )
+            except Exception as e:
+                logger.warning(f"写入权限缓存失败: user_id={user_id}, 错误: {str(e)}")
+        return codes
+    
+    async def invalidate_user(self, user_id: str, db: Optional[AsyncSession] = None) -> None:
+        """
+        使单个用户的权限缓存失效（用户角色变更时调用）
+        
+        Args:
+            user_id: 用户ID
+            db: 当前事务的会话；传入时在事务提交后再失效一次
+        """
+        self._local.pop(user_id)
+        await self._incr(self._user_version_key(user_id))
+        if db is not None:
+            run_after_commit(db, lambda: self.invalidate_user(user_id))
+    
+    async def invalidate_all(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        使所有用户的权限缓存失效（角色权限、权限状态、角色删除时调用）
+        
+        Args:
+            db: 当前事务的会话；传入时在事务提交后再失效一次
+        """
+        self._local.clear()
+        await self._incr(self._global_version_key)
+        if db is not None:
+            run_after_commit(db, self.invalidate_all)
+    
+    async def _get_version(self, user_id: str) -> CacheVersion:
+        """读取 (全局版本号, 用户版本号)，Redis 不可用时返回 None"""
+        try:
+            global_version, user_version = await get_redis().mget(
+                self._global_version_key, self._user_version_key(user_id)
+            )
+            return int(global_version or 0), int(user_version or 0)
+        except RuntimeError:
+            # Redis 未初始化，仅使用进程内缓存
+            return None
+        except Exception as e:
+            logger.warning(f"读取权限缓存版本失败: user_id={user_id}, 错误: {str(e)}")
+            return None
+    
+    async def _incr(self, key: str) -> None:
+        """递增版本号（Redis 不可用时只清理进程内缓存）"""
+        await _incr_version(key)
+
+
+class VersionedCache(Generic[T]):
+    """
+    单一版本号控制的缓存（进程内 LRU + Redis）
+    
+    Redis 中保存 dump() 后的 JSON，进程内保存 parse() 后的对象，
+    同一版本内每个进程只需解析一次。
+    """
+    
+    def __init__(
+        self,
+        key_prefix: str,
+        dump: Callable[[T], Any],
+        parse: Callable[[Any], T],
+        redis_ttl: int = 3600,
+        local_size: int = 256,
+        local_ttl: float = 60.0,
+    ):
+        """
+        初始化缓存
+        
+        Args:
+            key_prefix: Redis 键前缀（版本号键为 {key_prefix}version）
+            dump: 将缓存值转换为可 JSON 序列化的数据
+            parse: 将 JSON 数据还原为缓存值
+            redis_ttl: Redis 中缓存值的过期时间（秒）
+            local_size: 进程内 LRU 最大条目数
+            local_ttl: 进程内条目过期时间（秒），Redis 不可用时限制跨进程的陈旧时间
+        """
+        self.key_prefix = key_prefix
+        self.dump = dump
+        self.parse = parse
+        self.redis_ttl = redis_ttl
+        self._local: TTLLRUCache[str, Tuple[Optional[int], T]] = TTLLRUCache(
+            maxsize=local_size, ttl=local_ttl
+        )
+    
+    @property
+    def _version_key(self) -> str:
+        return f"{self.key_prefix}version"
+    
+    def _value_key(self, key: str, version: int) -> str:
+        return f"{self.key_prefix}{key}:{version}"
+    
+    async def get(self, key: str) -> Tuple[Optional[T], Optional[int]]:
+        """
+        读取缓存
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            (缓存值, 当前版本)；未命中时缓存值为 None，
+            调用方加载数据后用同一个版本调用 set()
+        """
+        version = await self._get_version()
+        entry = self._local.get(key)
+        if entry is not None and (version is None or entry[0] == version):
+            return entry[1], version
+        
+        if version is not None:
+            try:
+                cached = await get_redis().get(self._value_key(key, version))
+                if cached is not None:
+                    value = self.parse(json.loads(cached))
+                    self._local.set(key, (version, value))
+                    return value, version
+            except Exception as e:
+                logger.warning(f"读取缓存失败: {self._value_key(key, version)}, 错误: {str(e)}")
+        
+        return None, version
+    
+    async def set(self, key: str, version: Optional[int], value: T) -> T:
+        """
+        写入缓存
+        
+        Args:
+            key: 缓存键
+            version: get() 返回的版本（加载数据前读取，保证并发失效时不会写入旧数据）
+            value: 缓存值
+        
+        Returns:
+            缓存值
+        """
+        self._local.set(key, (version, value))
+        if version is not None:
+            try:
+                await get_redis().setex(
+                    self._value_key(key, version),
+                    self.redis_ttl,
+                    json.dumps(self.dump(value), ensure_ascii=False),
+                )
+            except Exception as e:
+                logger.warning(f"写入缓存失败: {self._value_key(key, version)}, 错误: {str(e)}")
+        return value
+    
+    async def invalidate(self, db: Optional[AsyncSession] = None) -> None:
+        """
+        使全部缓存失效
+        
+        Args:
+            db: 当前事务的会话；传入时在事务提交后再失效一次
+        """
+        self._local.clear()
+        await _incr_version(self._version_key)
+        if db is not None:
+            run_after_commit(db, self.invalidate)
+    
+    async def _get_version(self) -> Optional[int]:
+        """读取版本号，Redis 不可用时返回 None"""
+        try:
+            return int(await get_redis().get(self._version_key) or 0)
+        except RuntimeError:
+            # Redis 未初始化，仅使用进程内缓存
+            return None
+        except Exception as e:
+            logger.warning(f"读取缓存版本失败: {self._version_key}, 错误: {str(e)}")
+            return None
+
+
+async def _incr_version(key: str) -> None:
+    """递增 Redis 版本号（Redis 不可用时忽略）"""
+    try:
+        await get_redis().incr(key)
+    except RuntimeError:
+        pass
+    except Exception as e:
+        logger.warning(f"更新缓存版本失败: {key}, 错误: {str(e)}")
+
+
+# 全局用户权限缓存实例
+permission_cache = PermissionCache(
+    key_prefix=settings.PERMISSION_CACHE_KEY_PREFIX,
+    redis_ttl=settings.PERMISSION_CACHE_TTL,
+    local_size=settings.PERMISSION_CACHE_LOCAL_SIZE,
+    local_ttl=settings.PERMISSION_CACHE_LOCAL_TTL,
+)
+
+# 全局菜单树缓存实例（菜单响应同时包含中文和印尼语字段，所有语言共用一份）
+menu_tree_cache: VersionedCache[List[MenuResponse]] = VersionedCache(
+    key_prefix=f"{settings.PERMISSION_CACHE_KEY_PREFIX}menu:",
+    dump=lambda menus: [menu.model_dump(mode="json") for menu in menus],
+    parse=lambda data: [MenuResponse(**menu) for menu in data],
+    redis_ttl=settings.PERMISSION_CACHE_TTL,
+    local_ttl=settings.PERMISSION_CACHE_LOCAL_TTL,
+)
+
+# 全局可访问菜单树缓存实例（按排序后的角色编码哈希存储，拥有相同角色的用户共用）
+accessible_menu_cache: VersionedCache[List[UserMenuResponse]] = VersionedCache(
+    key_prefix=f"{settings.PERMISSION_CACHE_KEY_PREFIX}user_menu:",
+    dump=lambda menus: [menu.model_dump(mode="json") for menu in menus],
+    parse=lambda data: [UserMenuResponse(**menu) for menu in data],
+    redis_ttl=settings.PERMISSION_CACHE_TTL,
+    local_ttl=settings.PERMISSION_CACHE_LOCAL_TTL,
+)
+
+
+async def invalidate_menu_caches(db: Optional[AsyncSession] = None) -> None:
+    """
+    使菜单树和可访问菜单树缓存失效（菜单、菜单权限、角色权限、权限变更时调用）
+    
+    Args:
+        db: 当前事务的会话；传入时在事务提交后再失效一次
+    """
+    await menu_tree_cache.invalidate(db)
+    await accessible_menu_cache.invalidate(db)
@@ -0,0 +1,153 @@
+"""
+产品价格簿
+启用的 product_price_list 记录（当前有效及未来生效的）按产品ID加载到进程内，
+查询销售价格时在内存中按有效期选择，不再每次查询数据库。
+
+- 每个产品保存其所有有效期窗口 [effective_from, effective_to)，查询时按时间点选择，
+  价格在 effective_from / effective_to 边界处准确切换，无需等待缓存过期
+- 缓存使用 VersionedCache：Redis 中保存价格记录，进程内保存构建好的价格簿，
+  价格变更时递增版本号，各进程下一次读取时重新加载
+- Redis 不可用时只使用进程内缓存，依靠 TTL 收敛
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from foundation_service.config import settings
+from foundation_service.utils.permission_cache import VersionedCache
+
+# 价格列（客户等级 2-6，CNY / IDR）
+PRICE_COLUMNS = tuple(
+    f"price_level{level}_{currency}" for level in range(2, 7) for currency in ("cny", "idr")
+)
+
+# 时间列
+_DATETIME_COLUMNS = ("effective_from", "effective_to")
+
+# 缓存键（整个价格簿只有一个条目）
+_BOOK_KEY = "book"
+
+
+class ProductPriceBook:
+    """产品价格簿（只读快照，产品ID -> 按生效时间倒序的价格记录）"""
+    
+    def __init__(self, rows: Iterable[Mapping[str, Any]]):
+        """
+        构建价格簿
+        
+        Args:
+            rows: 价格记录（id, product_id, 价格列, effective_from, effective_to）
+        """
+        self._rows: List[Dict[str, Any]] = []
+        self._by_product: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            record = dict(row)
+            self._rows.append(record)
+            self._by_product.setdefault(record["product_id"], []).append(record)
+        for records in self._by_product.values():
+            records.sort(key=lambda record: record["effective_from"], reverse=True)
+    
+    @property
+    def size(self) -> int:
+        """价格记录数量"""
+        return len(self._rows)
+    
+    def lookup(self, product_id: str, at: datetime) -> Optional[Dict[str, Any]]:
+        """
+        查询产品在指定时间点有效的价格记录
+        
+        Args:
+            product_id: 产品ID
+            at: 时间点
+        
+        Returns:
+            effective_from <= at < effective_to 的记录（多条时取生效时间最新的一条），没有时返回 None
+        """
+        for record in self._by_product.get(product_id, ()):
+            if record["effective_from"] <= at and (record["effective_to"] is None or record["effective_to"] > at):
+                return record
+        return None
+    
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """导出价格记录（写入 Redis 缓存，Decimal 和 datetime 转为字符串）"""
+        return [
+            {
+                key: (
+                    str(value) if isinstance(value, Decimal)
+                    else value.isoformat() if isinstance(value, datetime)
+                    else value
+                )
+                for key, value in record.items()
+            }
+            for record in self._rows
+        ]
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> "ProductPriceBook":
+        """从 Redis 缓存的价格记录还原价格簿"""
+        return cls(
+            {
+                **row,
+                **{
+                    column: Decimal(row[column]) if row.get(column) is not None else None
+                    for column in PRICE_COLUMNS
+                },
+                **{
+                    column: datetime.fromisoformat(row[column]) if row.get(column) is not None else None
+                    for column in _DATETIME_COLUMNS
+                },
+            }
+            for row in rows
+        )
+
+
+# 全局产品价格簿缓存实例
+product_price_book_cache: VersionedCache[ProductPriceBook] = VersionedCache(
+    key_prefix=settings.PRICE_BOOK_KEY_PREFIX,
+    dump=lambda book: book.to_rows(),
+    parse=ProductPriceBook.from_rows,
+    redis_ttl=settings.PRICE_BOOK_REDIS_TTL,
+    local_size=1,
+    local_ttl=settings.PRICE_BOOK_LOCAL_TTL,
+)
+
+
+async def get_product_price_book(db: AsyncSession) -> ProductPriceBook:
+    """
+    获取产品价格簿（未命中时一次查询加载所有启用且未过期的价格记录）
+    
+    Args:
+        db: 数据库会话
+    
+    Returns:
+        产品价格簿
+    """
+    book, version = await product_price_book_cache.get(_BOOK_KEY)
+    if book is None:
+        sql = text(f"""
+            SELECT
+                id,
+                product_id,
+                {", ".join(PRICE_COLUMNS)},
+                effective_from,
+                effective_to
+            FROM product_price_list
+            WHERE is_active = 1
+              AND (effective_to IS NULL OR effective_to > :now)
+        """)
+        result = await db.execute(sql, {"now": datetime.now()})
+        book = await product_price_book_cache.set(
+            _BOOK_KEY, version, ProductPriceBook(row._mapping for row in result)
+        )
+    return book
+
+
+async def invalidate_product_price_book(db: Optional[AsyncSession] = None) -> None:
+    """
+    使产品价格簿失效（product_price_list 新增、修改、删除时调用）
+    
+    Args:
+        db: 当前事务的会话；传入时在事务提交后再失效一次
+    """
+    await product_price_book_cache.invalidate(db)
@@ -0,0 +1,198 @@
+"""
+产品依赖图
+整张 product_dependencies 表一次查询加载为进程内的邻接数组，执行顺序和依赖链都在内存中计算。
+
+- 缓存使用 VersionedCache：Redis 中保存边列表，进程内保存构建好的图，
+  product_dependencies 变更时递增版本号，各进程下一次读取时重新加载
+- Redis 不可用时只使用进程内缓存，依靠 TTL 收敛
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from foundation_service.config import settings
+from foundation_service.utils.permission_cache import VersionedCache
+
+# 依赖边：(产品ID, 依赖的产品ID, 依赖类型)
+DependencyEdge = Tuple[str, str, str]
+
+# 缓存键（整张图只有一个条目）
+_GRAPH_KEY = "graph"
+
+
+class ProductDependencyGraph:
+    """产品依赖图（只读快照，节点编号 + 邻接数组）"""
+    
+    def __init__(self, edges: Iterable[Sequence[str]]):
+        """
+        构建依赖图
+        
+        Args:
+            edges: 依赖边 (产品ID, 依赖的产品ID, 依赖类型)，按创建时间排序
+        """
+        self._edges: List[DependencyEdge] = []
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        # 节点 -> 依赖的节点（按依赖类型，保持创建顺序）
+        self._required: List[List[int]] = []
+        self._recommended: List[List[int]] = []
+        
+        for product_id, depends_on_product_id, dependency_type in edges:
+            self._edges.append((product_id, depends_on_product_id, dependency_type))
+            node = self._node(product_id)
+            depends_on = self._node(depends_on_product_id)
+            if dependency_type == "required":
+                self._required[node].append(depends_on)
+            elif dependency_type == "recommended":
+                self._recommended[node].append(depends_on)
+    
+    def _node(self, product_id: str) -> int:
+        """产品ID对应的节点编号（不存在时新建）"""
+        node = self._index.get(product_id)
+        if node is None:
+            node = len(self._ids)
+            self._index[product_id] = node
+            self._ids.append(product_id)
+            self._required.append([])
+            self._recommended.append([])
+        return node
+    
+    @property
+    def edge_count(self) -> int:
+        """依赖边数量"""
+        return len(self._edges)
+    
+    def to_edges(self) -> List[DependencyEdge]:
+        """导出依赖边（写入 Redis 缓存）"""
+        return list(self._edges)
+    
+    def required_dependencies(self, product_id: str) -> List[str]:
+        """产品的直接必需依赖"""
+        node = self._index.get(product_id)
+        if node is None:
+            return []
+        return [self._ids[depends_on] for depends_on in self._required[node]]
+    
+    def recommended_dependencies(self, product_id: str) -> List[str]:
+        """产品的直接推荐依赖"""
+        node = self._index.get(product_id)
+        if node is None:
+            return []
+        return [self._ids[depends_on] for depends_on in self._recommended[node]]
+    
+    def execution_order(self, product_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        产品执行顺序（只考虑选择列表内的必需依赖，Kahn 拓扑排序）
+        
+        存在循环依赖时，环上及依赖环的产品按原始顺序追加到末尾。
+        
+        Args:
+            product_ids: 产品ID列表
+        
+        Returns:
+            [{"product_id": 产品ID, "execution_order": 从1开始的顺序, "dependencies": 列表内的必需依赖}]
+        """
+        selected = list(dict.fromkeys(product_ids))
+        selected_set = set(selected)
+        dependencies = {
+            product_id: [dep for dep in self.required_dependencies(product_id) if dep in selected_set]
+            for product_id in selected
+        }
+        
+        in_degree = {product_id: len(deps) for product_id, deps in dependencies.items()}
+        dependents: Dict[str, List[str]] = {product_id: [] for product_id in selected}
+        for product_id in selected:
+            for dep in dependencies[product_id]:
+                dependents[dep].append(product_id)
+        
+        queue = deque(product_id for product_id in selected if in_degree[product_id] == 0)
+        ordered: List[str] = []
+        while queue:
+            current = queue.popleft()
+            ordered.append(current)
+            for dependent in dependents[current]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+        
+        ordered.extend(product_id for product_id in selected if in_degree[product_id] > 0)
+        return [
+            {
+                "product_id": product_id,
+                "execution_order": order,
+                "dependencies": dependencies[product_id],
+            }
+            for order, product_id in enumerate(ordered, start=1)
+        ]
+    
+    def dependency_chain(self, product_id: str) -> List[str]:
+        """
+        产品的全部必需依赖（直接和间接），依赖在前、依赖它的产品在后
+        
+        Args:
+            product_id: 产品ID
+        
+        Returns:
+            依赖产品ID列表（不含产品本身；存在循环时每个产品只出现一次）
+        """
+        root = self._index.get(product_id)
+        if root is None:
+            return []
+        
+        visited = {root}
+        chain: List[int] = []
+        # 迭代式后序遍历：(节点, 下一个要访问的依赖下标)
+        stack: List[List[int]] = [[root, 0]]
+        while stack:
+            frame = stack[-1]
+            node, position = frame
+            if position < len(self._required[node]):
+                frame[1] += 1
+                depends_on = self._required[node][position]
+                if depends_on not in visited:
+                    visited.add(depends_on)
+                    stack.append([depends_on, 0])
+            else:
+                stack.pop()
+                if node != root:
+                    chain.append(node)
+        return [self._ids[node] for node in chain]
+
+
+# 全局产品依赖图缓存实例
+product_dependency_graph_cache: VersionedCache[ProductDependencyGraph] = VersionedCache(
+    key_prefix=settings.PRODUCT_DEPENDENCY_GRAPH_KEY_PREFIX,
+    dump=lambda graph: graph.to_edges(),
+    parse=lambda edges: ProductDependencyGraph(edges),
+    redis_ttl=settings.PRODUCT_DEPENDENCY_GRAPH_REDIS_TTL,
+    local_size=1,
+    local_ttl=settings.PRODUCT_DEPENDENCY_GRAPH_LOCAL_TTL,
+)
+
+
+async def get_product_dependency_graph(db: AsyncSession) -> ProductDependencyGraph:
+    """
+    获取产品依赖图（未命中时一次查询加载整张依赖表）
+    
+    Args:
+        db: 数据库会话
+    
+    Returns:
+        产品依赖图
+    """
+    from foundation_service.repositories.product_dependency_repository import ProductDependencyRepository
+    
+    graph, version = await product_dependency_graph_cache.get(_GRAPH_KEY)
+    if graph is None:
+        edges = await ProductDependencyRepository(db).get_all_edges()
+        graph = await product_dependency_graph_cache.set(_GRAPH_KEY, version, ProductDependencyGraph(edges))
+    return graph
+
+
+async def invalidate_product_dependency_graph(db: Optional[AsyncSession] = None) -> None:
+    """
+    使产品依赖图失效（product_dependencies 新增、修改、删除时调用）
+    
+    Args:
+        db: 当前事务的会话；传入时在事务提交后再失效一次
+    """
+    await product_dependency_graph_cache.invalidate(db)
@@ -0,0 +1,285 @@
+"""
+单飞（single-flight）缓存，支持软/硬过期（stale-while-revalidate）
+
+- 软过期前：直接返回缓存值
+- 软过期后、硬过期前：返回旧值，同时在后台刷新（同一键在进程内只有一个刷新任务，
+  跨进程通过 Redis 锁只有一个进程刷新）
+- 硬过期后（或无缓存）：同一键在进程内只计算一次（其余请求等待同一个 Future），
+  跨进程通过 Redis 锁只有一个进程计算，其余进程轮询等待结果写入
+
+Redis 中保存 {"soft_expires_at": 软过期时间戳, "data": 数据}，键的过期时间为硬过期时间；
+Redis 不可用时退化为仅进程内单飞，不缓存结果。
+"""
+import asyncio
+import json
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple, Type, TypeVar
+from pydantic import BaseModel
+from common.redis_client import get_redis
+from common.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+# 仅当锁仍由自己持有时才删除（比较令牌后删除）
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlightCache:
+    """单飞缓存（进程内 Future 表 + Redis 锁 + 软/硬过期）"""
+    
+    def __init__(
+        self,
+        key_prefix: str,
+        soft_ttl: int = 300,
+        hard_ttl: int = 1800,
+        lock_ttl: int = 30,
+        lock_wait: float = 5.0,
+        poll_interval: float = 0.05,
+    ):
+        """
+        初始化缓存
+        
+        Args:
+            key_prefix: Redis 键前缀
+            soft_ttl: 软过期时间（秒），超过后返回旧值并在后台刷新
+            hard_ttl: 硬过期时间（秒），超过后必须重新计算
+            lock_ttl: 计算锁的过期时间（秒），防止持锁进程异常退出后锁无法释放
+            lock_wait: 其他进程持锁时等待结果的最长时间（秒），超时后自行计算
+            poll_interval: 等待结果时的轮询间隔（秒）
+        """
+        self.key_prefix = key_prefix
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: Set[str] = set()
+        # 持有后台刷新任务的引用，避免任务在完成前被回收
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def _value_key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+    
+    def _lock_key(self, key: str) -> str:
+        return f"{self.key_prefix}lock:{key}"
+    
+    async def get_or_compute(
+        self,
+        key: str,
+        model_class: Type[T],
+        compute: Callable[[], Awaitable[T]],
+        refresh: Optional[Callable[[], Awaitable[T]]] = None,
+    ) -> T:
+        """
+        读取缓存，未命中时单飞计算
+        
+        Args:
+            key: 缓存键（不含前缀）
+            model_class: Pydantic 模型类
+            compute: 在当前请求中计算结果
+            refresh: 后台刷新时计算结果（不能依赖当前请求的资源，如数据库会话）；
+                     为 None 时使用 compute
+        
+        Returns:
+            缓存值或计算结果
+        """
+        entry = await self._read(key, model_class)
+        if entry is not None:
+            value, stale = entry
+            if stale:
+                logger.info(f"[Cache] 缓存已软过期，返回旧值并后台刷新: {key}")
+                self._schedule_refresh(key, model_class, refresh or compute)
+            else:
+                logger.info(f"[Cache] ✅ 缓存命中: {key}")
+            return value
+        
+        logger.info(f"[Cache] ❌ 缓存未命中: {key}，将查询数据库")
+        return await self._single_flight(key, model_class, compute)
+    
+    async def invalidate(self, key: str) -> None:
+        """删除缓存值（下次读取时重新计算）"""
+        try:
+            await get_redis().delete(self._value_key(key))
+        except RuntimeError:
+            pass
+        except Exception as e:
+            logger.warning(f"[Cache] 删除缓存失败: {key}, 错误: {str(e)}")
+    
+    async def _single_flight(
+        self,
+        key: str,
+        model_class: Type[T],
+        compute: Callable[[], Awaitable[T]],
+    ) -> T:
+        """同一键在进程内只计算一次，其余调用等待同一个 Future"""
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 计算方所在的请求被取消时重新竞争计算；自身被取消时直接抛出
+                if not future.cancelled():
+                    raise
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._compute_with_lock(key, model_class, compute)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有等待方时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+    
+    async def _compute_with_lock(
+        self,
+        key: str,
+        model_class: Type[T],
+        compute: Callable[[], Awaitable[T]],
+    ) -> T:
+        """获取 Redis 锁后计算并写入；其他进程持锁时等待其结果"""
+        acquired, token = await self._acquire_lock(key)
+        if acquired is False:
+            value = await self._wait_for_value(key, model_class)
+            if value is not None:
+                return value
+            logger.warning(f"[Cache] 等待其他进程计算超时，自行计算: {key}")
+        
+        try:
+            value = await compute()
+            await self._write(key, value)
+            return value
+        finally:
+            if token:
+                await self._release_lock(key, token)
+    
+    def _schedule_refresh(
+        self,
+        key: str,
+        model_class: Type[T],
+        refresh: Callable[[], Awaitable[T]],
+    ) -> None:
+        """启动后台刷新任务（同一键已在刷新或计算时跳过）"""
+        if key in self._refreshing or key in self._inflight:
+            return
+        self._refreshing.add(key)
+        task = asyncio.get_running_loop().create_task(self._refresh(key, refresh))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _refresh(self, key: str, refresh: Callable[[], Awaitable[T]]) -> None:
+        """后台刷新：只有拿到锁的进程执行，其他进程继续返回旧值"""
+        try:
+            acquired, token = await self._acquire_lock(key)
+            if acquired is False:
+                return
+            try:
+                await self._write(key, await refresh())
+                logger.info(f"[Cache] 后台刷新完成: {key}")
+            finally:
+                if token:
+                    await self._release_lock(key, token)
+        except Exception as e:
+            logger.warning(f"[Cache] 后台刷新失败: {key}, 错误: {str(e)}")
+        finally:
+            self._refreshing.discard(key)
+    
+    async def _read(self, key: str, model_class: Type[T]) -> Optional[Tuple[T, bool]]:
+        """读取缓存，返回 (值, 是否已软过期)；无缓存或 Redis 不可用时返回 None"""
+        try:
+            cached = await get_redis().get(self._value_key(key))
+        except RuntimeError:
+            # Redis 未初始化，静默失败
+            return None
+        except Exception as e:
+            logger.warning(f"[Cache] 从缓存获取数据失败: {key}, 错误: {str(e)}")
+            return None
+        if not cached:
+            return None
+        
+        try:
+            payload = json.loads(cached)
+            if isinstance(payload, dict) and "data" in payload and "soft_expires_at" in payload:
+                stale = payload["soft_expires_at"] <= time.time()
+                return model_class(**payload["data"]), stale
+            # 旧格式（只有数据，没有软过期时间）：当作已软过期
+            return model_class(**payload), True
+        except Exception as e:
+            logger.warning(f"[Cache] 解析缓存数据失败: {key}, 错误: {str(e)}")
+            return None
+    
+    async def _write(self, key: str, value: BaseModel) -> None:
+        """写入缓存（软过期时间写入数据，硬过期时间作为键的过期时间）"""
+        payload = {
+            "soft_expires_at": time.time() + self.soft_ttl,
+            "data": value.model_dump(mode="json"),
+        }
+        try:
+            await get_redis().setex(
+                self._value_key(key), self.hard_ttl, json.dumps(payload, ensure_ascii=False)
+            )
+            logger.info(f"[Cache] ✅ 数据已写入缓存: {key}, 软过期={self.soft_ttl}秒, 硬过期={self.hard_ttl}秒")
+        except RuntimeError:
+            pass
+        except Exception as e:
+            logger.warning(f"[Cache] 写入缓存失败: {key}, 错误: {str(e)}")
+    
+    async def _acquire_lock(self, key: str) -> Tuple[Optional[bool], Optional[str]]:
+        """
+        获取计算锁
+        
+        Returns:
+            (是否获取成功, 锁令牌)；Redis 不可用时返回 (None, None)，调用方直接计算
+        """
+        token = uuid.uuid4().hex
+        try:
+            acquired = await get_redis().set(self._lock_key(key), token, nx=True, ex=self.lock_ttl)
+        except RuntimeError:
+            return None, None
+        except Exception as e:
+            logger.warning(f"[Cache] 获取缓存锁失败: {key}, 错误: {str(e)}")
+            return None, None
+        return (True, token) if acquired else (False, None)
+    
+    async def _release_lock(self, key: str, token: str) -> None:
+        """释放计算锁（仅当锁仍由自己持有）"""
+        try:
+            await get_redis().eval(_RELEASE_LOCK_SCRIPT, 1, self._lock_key(key), token)
+        except Exception as e:
+            logger.warning(f"[Cache] 释放缓存锁失败: {key}, 错误: {str(e)}")
+    
+    async def _wait_for_value(self, key: str, model_class: Type[T]) -> Optional[T]:
+        """轮询等待其他进程写入结果；锁被释放仍无结果或等待超时时返回 None"""
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            entry = await self._read(key, model_class)
+            if entry is not None:
+                return entry[0]
+            try:
+                if not await get_redis().exists(self._lock_key(key)):
+                    # 持锁方可能在本次读取之后写入并释放锁，再读一次
+                    entry = await self._read(key, model_class)
+                    return entry[0] if entry is not None else None
+            except Exception:
+                return None
+        return None
@@ -0,0 +1,73 @@
+-- ============================================================
+-- 创建每日分析汇总表 (analytics_daily)
+-- ============================================================
+-- 用途：按日期、组织、货币汇总新增客户数、订单数、订单金额和收入
+--       由 foundation_service 后台增量任务维护，趋势和收入接口只读取此表
+-- 同时为 customers.created_at / customers.updated_at / orders.updated_at
+-- 添加索引，供增量任务按时间范围扫描
+-- ============================================================
+
+SET NAMES utf8mb4 COLLATE utf8mb4_0900_ai_ci;
+
+CREATE TABLE IF NOT EXISTS `analytics_daily` (
+  `stat_date` date NOT NULL COMMENT '统计日期',
+  `organization_id` char(36) NOT NULL DEFAULT '' COMMENT '组织ID（客户所属组织，未知时为空字符串）',
+  `currency_code` varchar(10) NOT NULL DEFAULT '' COMMENT '货币代码（只有新增客户的行为空字符串）',
+  `new_customers` int NOT NULL DEFAULT 0 COMMENT '新增客户数',
+  `order_count` int NOT NULL DEFAULT 0 COMMENT '新增订单数',
+  `order_amount` decimal(18,2) NOT NULL DEFAULT 0.00 COMMENT '新增订单金额（final_amount，为空时取 total_amount）',
+  `revenue` decimal(18,2) NOT NULL DEFAULT 0.00 COMMENT '收入（当天创建且已完成订单的金额）',
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '重算时间',
+  PRIMARY KEY (`stat_date`, `organization_id`, `currency_code`),
+  KEY `ix_analytics_daily_org_date` (`organization_id`, `stat_date`),
+  KEY `ix_analytics_daily_updated` (`updated_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='每日分析汇总表';
+
+-- 添加索引（已存在时跳过）
+SET @index_exists = (
+  SELECT COUNT(*)
+  FROM INFORMATION_SCHEMA.STATISTICS
+  WHERE TABLE_SCHEMA = DATABASE()
+    AND TABLE_NAME = 'customers'
+    AND INDEX_NAME = 'ix_customers_created_at'
+);
+SET @sql = IF(
+  @index_exists = 0,
+  'ALTER TABLE `customers` ADD INDEX `ix_customers_created_at` (`created_at`)',
+  'SELECT ''Index ix_customers_created_at already exists'' AS message'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (
+  SELECT COUNT(*)
+  FROM INFORMATION_SCHEMA.STATISTICS
+  WHERE TABLE_SCHEMA = DATABASE()
+    AND TABLE_NAME = 'customers'
+    AND INDEX_NAME = 'ix_customers_updated_at'
+);
+SET @sql = IF(
+  @index_exists = 0,
+  'ALTER TABLE `customers` ADD INDEX `ix_customers_updated_at` (`updated_at`)',
+  'SELECT ''Index ix_customers_updated_at already exists'' AS message'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (
+  SELECT COUNT(*)
+  FROM INFORMATION_SCHEMA.STATISTICS
+  WHERE TABLE_SCHEMA = DATABASE()
+    AND TABLE_NAME = 'orders'
+    AND INDEX_NAME = 'ix_orders_updated'
+);
+SET @sql = IF(
+  @index_exists = 0,
+  'ALTER TABLE `orders` ADD INDEX `ix_orders_updated` (`updated_at`)',
+  'SELECT ''Index ix_orders_updated already exists'' AS message'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
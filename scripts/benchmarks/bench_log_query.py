@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志查询索引基准测试
+
+向本地 mongod 写入合成日志语料（使用 MongoDBSink.ensure_indexes 创建与线上相同的索引），
+对比原有的不区分大小写、无锚定正则条件与 LogService._build_filter 生成的
+$text / 锚定前缀条件，统计分页查询和计数的耗时以及扫描的文档数。
+
+用法（在项目根目录执行，需要本地 mongod）：
+    python scripts/benchmarks/bench_log_query.py --docs 500000 --repeat 5
+    python scripts/benchmarks/bench_log_query.py --uri mongodb://localhost:27017 --drop
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from bson.regex import Regex
+from pymongo import MongoClient
+
+from common.utils.logger import MongoDBSink
+from foundation_service.schemas.log import LogQueryRequest
+from foundation_service.services.log_service import LogService
+
+SERVICE = "bench-service"
+COLLECTION = f"logs_{SERVICE}"
+LEVELS = ["DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR"]
+FILES = [
+    "/app/foundation_service/api/v1/auth.py",
+    "/app/foundation_service/api/v1/users.py",
+    "/app/foundation_service/services/order_service.py",
+    "/app/foundation_service/services/customer_service.py",
+    "/app/foundation_service/middleware/audit_middleware.py",
+]
+FUNCTIONS = ["login", "logout", "list_orders", "get_customer", "create_order", "dispatch"]
+WORDS = [
+    "request", "user", "order", "customer", "timeout", "retry", "cache", "miss",
+    "database", "query", "completed", "started", "token", "expired", "permission",
+]
+
+SCENARIOS = [
+    ("关键词（英文短语）", dict(keyword="token expired")),
+    ("关键词 + 级别", dict(keyword="timeout", levels=["ERROR"])),
+    ("文件前缀", dict(file="^/app/foundation_service/services/order")),
+    ("函数前缀 + 级别", dict(function="^list_", levels=["WARNING", "ERROR"])),
+    ("级别 + 时间范围", dict(levels=["ERROR"], start_time=datetime(2026, 1, 1, 12))),
+]
+
+
+def legacy_filter(query: LogQueryRequest) -> dict:
+    """原有的查询条件：关键词/文件/函数均为不区分大小写的无锚定正则"""
+    conditions = {}
+    if query.levels:
+        conditions["level"] = {"$in": query.levels}
+    if query.start_time or query.end_time:
+        conditions["timestamp"] = {}
+        if query.start_time:
+            conditions["timestamp"]["$gte"] = query.start_time
+        if query.end_time:
+            conditions["timestamp"]["$lte"] = query.end_time
+    if query.keyword:
+        conditions["message"] = Regex(query.keyword, "i")
+    if query.file:
+        conditions["file"] = Regex(query.file.lstrip("^"), "i")
+    if query.function:
+        conditions["function"] = Regex(query.function.lstrip("^"), "i")
+    return conditions
+
+
+def load_corpus(collection, total: int, seed: int) -> None:
+    """写入合成日志语料"""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    batch = []
+    for i in range(total):
+        batch.append({
+            "timestamp": start + timedelta(milliseconds=i * 50),
+            "level": rng.choice(LEVELS),
+            "message": " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))),
+            "service": SERVICE,
+            "name": "bench",
+            "function": rng.choice(FUNCTIONS),
+            "line": rng.randint(1, 500),
+            "file": rng.choice(FILES),
+            "module": "bench",
+            "thread": 1,
+            "process": 1,
+        })
+        if len(batch) == 5000:
+            collection.insert_many(batch, ordered=False)
+            batch.clear()
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def measure(collection, conditions: dict, page_size: int, repeat: int):
+    """返回 (分页查询中位耗时ms, 计数中位耗时ms, 扫描文档数, 匹配数)"""
+    conditions = {"service": SERVICE, **conditions}
+    find_times = []
+    count_times = []
+    matched = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(collection.find(conditions).sort([("timestamp", -1), ("_id", -1)]).limit(page_size))
+        find_times.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        matched = collection.count_documents(conditions)
+        count_times.append((time.perf_counter() - started) * 1000)
+
+    explain = collection.find(conditions).sort([("timestamp", -1), ("_id", -1)]).limit(page_size).explain()
+    examined = explain.get("executionStats", {}).get("totalDocsExamined", -1)
+    return statistics.median(find_times), statistics.median(count_times), examined, matched
+
+
+def run(args) -> None:
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    collection = client[args.database][COLLECTION]
+
+    if collection.estimated_document_count() < args.docs:
+        print(f"写入合成语料: {args.docs} 条 -> {args.database}.{COLLECTION}")
+        collection.drop()
+        started = time.perf_counter()
+        load_corpus(collection, args.docs, args.seed)
+        print(f"写入完成: {time.perf_counter() - started:.1f}s")
+    MongoDBSink.ensure_indexes(collection)
+
+    header = f"{'场景':<16}{'条件':<8}{'分页ms':>10}{'计数ms':>10}{'扫描文档':>12}{'匹配数':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, params in SCENARIOS:
+        query = LogQueryRequest(page_size=args.page_size, **params)
+        for label, conditions in (
+            ("原有", legacy_filter(query)),
+            ("优化", LogService._build_filter(query)),
+        ):
+            find_ms, count_ms, examined, matched = measure(
+                collection, conditions, args.page_size, args.repeat
+            )
+            print(f"{name:<16}{label:<8}{find_ms:>10.1f}{count_ms:>10.1f}{examined:>12}{matched:>10}")
+
+    if args.drop:
+        client.drop_database(args.database)
+    client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="日志查询索引基准测试")
+    parser.add_argument("--uri", default="mongodb://localhost:27017", help="本地 mongod 连接地址")
+    parser.add_argument("--database", default="bantu_crm_bench", help="基准测试数据库")
+    parser.add_argument("--docs", type=int, default=200000, help="合成日志条数")
+    parser.add_argument("--page-size", type=int, default=50, help="分页大小")
+    parser.add_argument("--repeat", type=int, default=5, help="每个场景重复次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--drop", action="store_true", help="结束后删除基准测试数据库")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
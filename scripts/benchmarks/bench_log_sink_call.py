@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MongoDB 日志 Sink 调用线程开销微基准测试
+
+对比原有实现（调用线程上构建完整文档 + ServiceMongoDBSink 包装 + 完整格式化）与
+当前实现（调用线程只打包字段元组入队，文档在后台线程构建），统计每次 logger.info
+在调用线程上的平均耗时。后台线程不启动，不需要 MongoDB。
+
+用法（在项目根目录执行）：
+    python scripts/benchmarks/bench_log_sink_call.py --calls 200000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from loguru import logger
+
+from common.utils.logger import MongoDBSink
+
+LOG_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+    "<level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
+    "<level>{message}</level>"
+)
+
+
+class LegacyMongoDBSink(MongoDBSink):
+    """原有的 __call__ 实现：在调用线程上解析记录并构建完整文档"""
+
+    def __call__(self, message):
+        try:
+            record = message.record
+
+            file_path = ""
+            if hasattr(record, "file") and record.file:
+                if hasattr(record.file, "path"):
+                    file_path = record.file.path
+                elif isinstance(record.file, dict):
+                    file_path = record.file.get("path", "")
+                else:
+                    file_path = str(record.file)
+
+            thread_id = 0
+            if hasattr(record, "thread") and record.thread:
+                if hasattr(record.thread, "id"):
+                    thread_id = record.thread.id
+                elif isinstance(record.thread, dict):
+                    thread_id = record.thread.get("id", 0)
+
+            process_id = 0
+            if hasattr(record, "process") and record.process:
+                if hasattr(record.process, "id"):
+                    process_id = record.process.id
+                elif isinstance(record.process, dict):
+                    process_id = record.process.get("id", 0)
+
+            log_doc = {
+                "timestamp": datetime.fromtimestamp(record["time"].timestamp()),
+                "level": record["level"].name,
+                "message": record["message"],
+                "service": record.get("extra", {}).get("service", "unknown"),
+                "name": record.get("name", ""),
+                "function": record.get("function", ""),
+                "line": record.get("line", 0),
+                "file": file_path,
+                "module": record.get("module", ""),
+                "thread": thread_id,
+                "process": process_id,
+            }
+
+            if record.get("exception"):
+                exc = record["exception"]
+                log_doc["exception"] = {
+                    "type": exc.type.__name__ if hasattr(exc.type, "__name__") else str(exc.type),
+                    "value": str(exc.value) if exc.value else "",
+                    "traceback": str(exc.traceback) if hasattr(exc, "traceback") else "",
+                }
+
+            extra = record.get("extra", {})
+            if extra:
+                extra_copy = {k: v for k, v in extra.items() if k != "service"}
+                if extra_copy:
+                    log_doc["extra"] = extra_copy
+
+            with self._condition:
+                self._queue.append(log_doc)
+        except Exception as e:
+            print(f"MongoDB Sink 处理日志失败: {e}", file=sys.stderr)
+
+
+class LegacyServiceSink:
+    """原有的 service 包装器"""
+
+    def __init__(self, sink, service_name):
+        self.sink = sink
+        self.service_name = service_name
+
+    def __call__(self, message):
+        if not hasattr(message.record, "extra"):
+            message.record["extra"] = {}
+        message.record["extra"]["service"] = self.service_name
+        return self.sink(message)
+
+
+def time_calls(calls: int) -> float:
+    """返回每次日志调用的平均耗时（微秒）"""
+    bound = logger.bind(request_id="bench-request", user_id="bench-user")
+    started = time.perf_counter()
+    for i in range(calls):
+        bound.info("订单列表查询完成: page={}, size={}", i, 20)
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+def run(calls: int, repeat: int) -> None:
+    variants = []
+
+    def noop_sink(message):
+        pass
+
+    variants.append(("空 sink（基线）", lambda: logger.add(noop_sink, format="{message}")))
+
+    legacy = LegacyMongoDBSink(max_queue_size=calls + 1)
+    variants.append((
+        "原有实现",
+        lambda: logger.add(LegacyServiceSink(legacy, "bench-service"), format=LOG_FORMAT),
+    ))
+
+    current = MongoDBSink(max_queue_size=calls + 1, service_name="bench-service")
+    variants.append(("当前实现", lambda: logger.add(current, format="{message}")))
+
+    print(f"{'实现':<16}{'每次调用(us)':>14}")
+    print("-" * 30)
+    for name, install in variants:
+        results = []
+        for _ in range(repeat):
+            logger.remove()
+            install()
+            legacy._queue.clear()
+            current._queue.clear()
+            results.append(time_calls(calls))
+        logger.remove()
+        print(f"{name:<16}{min(results):>14.2f}")
+
+    # 确认后台线程构建的文档与原有字段一致
+    logger.add(current, format="{message}")
+    logger.bind(request_id="check").info("check")
+    logger.remove()
+    print("后台线程构建的文档示例:", current._build_document(current._queue[-1]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MongoDB 日志 Sink 调用线程开销微基准测试")
+    parser.add_argument("--calls", type=int, default=100000, help="每轮日志调用次数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复轮数（取最小值）")
+    args = parser.parse_args()
+    run(args.calls, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
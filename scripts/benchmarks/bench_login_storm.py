@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录风暴下非登录接口延迟基准测试
+
+在进程内启动一个最小 FastAPI 应用（ASGI 直连，不经过网络），/login 分别使用
+事件循环内同步 bcrypt 校验（原有实现）和 password_hasher 线程池校验（当前实现），
+同时按固定时间表请求 /ping（延迟从计划发送时间算起），统计登录风暴期间非登录接口的 p50/p99/最大延迟。
+不需要数据库。
+
+用法（在项目根目录执行）：
+    python scripts/benchmarks/bench_login_storm.py --logins 200 --concurrency 50
+    python scripts/benchmarks/bench_login_storm.py --rounds 10 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import bcrypt
+import httpx
+from fastapi import FastAPI
+
+from foundation_service.utils.password import PasswordHasher, verify_password
+
+PASSWORD = "Bench123456"
+
+
+def build_app(password_hash: str, hasher: PasswordHasher) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login/blocking")
+    async def login_blocking():
+        return {"ok": verify_password(PASSWORD, password_hash)}
+
+    @app.post("/login/executor")
+    async def login_executor():
+        return {"ok": await hasher.verify(PASSWORD, password_hash)}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def storm(client: httpx.AsyncClient, path, logins: int, concurrency: int, interval: float, idle: float = 0.0):
+    """
+    并发发起 logins 次登录，期间每 interval 秒请求一次 /ping，返回 (ping 延迟列表, 登录总耗时)
+    path 为 None 时不发起登录，空载 idle 秒作为基线
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            response = await client.post(path)
+            response.raise_for_status()
+
+    async def probe(latencies):
+        # 按固定时间表发送 /ping，延迟从计划发送时间算起；事件循环被阻塞期间错过的每个时间点
+        # 都按完成时间计入延迟（修正 coordinated omission）
+        scheduled = time.perf_counter()
+        while not done.is_set():
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await client.get("/ping")
+            finished = time.perf_counter()
+            while scheduled <= finished:
+                latencies.append((finished - scheduled) * 1000)
+                scheduled += interval
+
+    latencies = []
+    probe_task = asyncio.create_task(probe(latencies))
+    started = time.perf_counter()
+    if path is None:
+        await asyncio.sleep(idle)
+    else:
+        await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return latencies, elapsed
+
+
+async def run(args) -> None:
+    password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=args.rounds)).decode("utf-8")
+    hasher = PasswordHasher(max_workers=args.workers, max_pending=args.logins + 1)
+    app = build_app(password_hash, hasher)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        baseline, _ = await storm(client, None, 0, 1, args.interval, idle=args.idle)
+
+        print(f"bcrypt rounds={args.rounds}, 登录 {args.logins} 次, 并发 {args.concurrency}, 线程池 {args.workers}")
+        header = f"{'实现':<16}{'ping 样本':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'登录总耗时 s':>14}"
+        print(header)
+        print("-" * len(header))
+        print(f"{'空载基线':<16}{len(baseline):>10}{statistics.median(baseline):>10.2f}"
+              f"{percentile(baseline, 99):>10.2f}{max(baseline):>10.2f}{'-':>14}")
+        for name, path in (("原有（同步）", "/login/blocking"), ("当前（线程池）", "/login/executor")):
+            latencies, elapsed = await storm(client, path, args.logins, args.concurrency, args.interval)
+            print(f"{name:<16}{len(latencies):>10}{statistics.median(latencies):>10.2f}"
+                  f"{percentile(latencies, 99):>10.2f}{max(latencies):>10.2f}{elapsed:>14.2f}")
+
+    print("线程池统计:", hasher.get_stats())
+    hasher.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="登录风暴下非登录接口延迟基准测试")
+    parser.add_argument("--logins", type=int, default=100, help="登录请求总数")
+    parser.add_argument("--concurrency", type=int, default=50, help="登录并发数")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost（与线上一致默认 12）")
+    parser.add_argument("--workers", type=int, default=4, help="密码哈希线程池大小")
+    parser.add_argument("--interval", type=float, default=0.005, help="/ping 请求间隔（秒）")
+    parser.add_argument("--idle", type=float, default=2.0, help="空载基线的持续时间（秒）")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单列表数据库往返次数基准测试
+
+对不同页大小调用 OrderService.list_orders，统计每次调用实际发送到 MySQL 的语句数。
+批量加载关联数据后，往返次数应与页大小无关（count + 列表 + 订单项 + 客户 + 用户）。
+
+用法（在项目根目录执行，DATABASE_URL 指向已有订单数据的库）：
+    python scripts/benchmarks/bench_order_list_round_trips.py --sizes 1 10 50 100
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from sqlalchemy import event
+
+from foundation_service.database import AsyncSessionLocal
+from foundation_service.services.order_service import OrderService
+from common.database import _engine as engine
+
+
+class StatementCounter:
+    """通过 before_cursor_execute 事件统计数据库往返次数"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+async def run(sizes, repeat):
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    results = []
+    try:
+        for size in sizes:
+            round_trips = []
+            elapsed = []
+            for _ in range(repeat):
+                async with AsyncSessionLocal() as session:
+                    service = OrderService(session)
+                    counter.count = 0
+                    start = time.perf_counter()
+                    response = await service.list_orders(page=1, size=size)
+                    elapsed.append((time.perf_counter() - start) * 1000)
+                    round_trips.append(counter.count)
+            results.append((size, len(response.orders), max(round_trips), min(elapsed)))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+        await engine.dispose()
+
+    print(f"{'page_size':>10} {'returned':>10} {'round_trips':>12} {'best_ms':>10}")
+    for size, returned, trips, best_ms in results:
+        print(f"{size:>10} {returned:>10} {trips:>12} {best_ms:>10.2f}")
+
+    distinct_trips = {trips for _, returned, trips, _ in results if returned > 0}
+    if len(distinct_trips) > 1:
+        print(f"FAIL: 往返次数随页大小变化: {sorted(distinct_trips)}")
+        return 1
+    print("OK: 往返次数与页大小无关")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="订单列表往返次数基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.sizes, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()